@@ -1,9 +1,117 @@
-from typing import Iterator
+import hashlib
+import secrets
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Sequence, TypeVar, Union
 
+from fastapi import Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.db.session import get_session
+from app.core.config import get_settings
+from app.crud import versions as versions_crud
+from app.db.session import get_session, new_async_session, new_session
+
+T = TypeVar("T")
+
+
+class Database:
+    """Request-scoped handle that runs sync crud functions without blocking the event loop.
+
+    ``run(fn, ...)`` calls ``fn(session, ...)``. With ``async_db`` enabled this
+    goes through ``AsyncSession.run_sync``, so I/O is awaited on the async
+    driver and no thread is used. Otherwise it runs in Starlette's threadpool.
+    """
+
+    def __init__(self, session: Union[Session, AsyncSession]) -> None:
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
 
 
 def get_db() -> Iterator[Session]:
     yield from get_session()
+
+
+async def get_database() -> AsyncIterator[Database]:
+    async_session = new_async_session()
+    if async_session is not None:
+        async with async_session:
+            yield Database(async_session)
+        return
+
+    session = new_session()
+    try:
+        yield Database(session)
+    finally:
+        await run_in_threadpool(session.close)
+
+
+def page_size(limit: Optional[int] = None) -> int:
+    settings = get_settings()
+    return min(limit or settings.default_page_size, settings.max_page_size)
+
+
+class PageParams:
+    """``cursor``/``limit`` query parameters, with ``limit`` clamped to ``max_page_size``."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+        limit: Optional[int] = Query(None, ge=1),
+    ) -> None:
+        self.cursor = cursor
+        self.limit = page_size(limit)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def conditional(*collections: str) -> Callable[..., Awaitable[None]]:
+    """Dependency adding ETag/Last-Modified for ``collections`` and answering a matching ``If-None-Match`` with 304.
+
+    The versions are read before the handler runs its query, so a concurrent
+    write can leave the ETag older than the body but never newer.
+    """
+
+    async def check(request: Request, response: Response, db: Database = Depends(get_database)) -> None:
+        stamps = await db.run(versions_crud.get_versions, collections)
+        state = ",".join(f"{name}:{version}" for name, (version, _) in sorted(stamps.items()))
+        digest = hashlib.sha1(f"{request.url.path}?{request.url.query}|{state}".encode()).hexdigest()
+        headers = {"ETag": f'"{digest}"', "Cache-Control": "no-cache"}
+        modified = max((updated_at for _, updated_at in stamps.values() if updated_at), default=None)
+        if modified is not None:
+            headers["Last-Modified"] = format_datetime(modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+        # If-Modified-Since is not honoured: one-second resolution could hide a write.
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Guard for the admin API; it is hidden entirely unless ``admin_token`` is configured."""
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def check_batch(items: Sequence[Any], *, ids: Optional[Sequence[int]] = None) -> None:
+    """Reject empty or oversized batches, and repeated ``ids`` when given."""
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > get_settings().max_batch_size:
+        raise HTTPException(status_code=413, detail="Batch is too large")
+    if ids is not None and len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Batch contains duplicate ids")
@@ -0,0 +1,94 @@
+import io
+import tempfile
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import require_admin
+from app.core.cache import get_cache, stats
+from app.core.config import get_settings
+from app.services import transfer
+
+# Uploads larger than this spill from memory to a temporary file.
+IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/cache")
+async def read_cache_stats() -> Dict[str, Any]:
+    cache = get_cache()
+    namespaces = stats.snapshot()
+    hits = sum(counts["hits"] for counts in namespaces.values())
+    misses = sum(counts["misses"] for counts in namespaces.values())
+    return {
+        "backend": type(cache).__name__,
+        "ttl_seconds": get_settings().cache_ttl_seconds,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        "namespaces": namespaces,
+        **cache.info(),
+    }
+
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cache() -> None:
+    get_cache().clear()
+    stats.reset()
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_entity(
+    entity: str = Query(..., description=", ".join(transfer.ENTITIES)),
+    format: str = Query("ndjson", description=", ".join(transfer.FORMATS)),
+) -> StreamingResponse:
+    try:
+        transfer.resolve(entity, format)
+    except transfer.TransferError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return StreamingResponse(
+        transfer.export_chunks(entity, format),
+        media_type=transfer.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'},
+    )
+
+
+@router.post("/import")
+async def import_entity(
+    request: Request,
+    entity: str = Query(..., description=", ".join(transfer.ENTITIES)),
+    format: str = Query("ndjson", description=", ".join(transfer.FORMATS)),
+) -> Dict[str, Any]:
+    """Insert the request body (NDJSON or CSV) into ``entity`` in chunked transactions.
+
+    A failure reports ``inserted``, the rows committed before it; the import
+    can resume from the row after those.
+    """
+    try:
+        transfer.resolve(entity, format)
+    except transfer.TransferError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            inserted = await run_in_threadpool(transfer.import_rows, entity, format, stream)
+        except transfer.ImportAborted as exc:
+            if isinstance(exc.error, IntegrityError):
+                code, message = 409, f"Import conflicts with existing data: {exc.error.orig}"
+            elif isinstance(exc.error, transfer.TransferError):
+                code, message = 400, str(exc.error)
+            else:
+                reason = getattr(exc.error, "orig", exc.error)
+                code, message = 400, f"Import has values the database rejected: {reason}"
+            raise HTTPException(status_code=code, detail={"message": message, "inserted": exc.inserted})
+        finally:
+            stream.detach()
+    return {"entity": entity, "inserted": inserted}
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
-from sqlmodel import Session
 
-from app.api.deps import get_db
+from app.api.deps import Database, get_database
 from app.crud import users as users_crud
 from app.schemas import users as user_schemas
 
@@ -15,8 +14,8 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=user_schemas.UserRead)
-def login(*, session: Session = Depends(get_db), payload: LoginRequest) -> user_schemas.UserRead:
-    user = users_crud.get_by_email(session, payload.email)
+async def login(*, db: Database = Depends(get_database), payload: LoginRequest) -> user_schemas.UserRead:
+    user = await db.run(users_crud.get_by_email, payload.email)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
@@ -1,95 +1,232 @@
-from typing import List
+import json
+from typing import AsyncIterator, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db
+from app.api.deps import Database, PageParams, conditional, get_database
+from app.core.config import get_settings
+from app.core.events import get_broker, user_channel
 from app.crud import match_requests as matches_crud
 from app.crud import timeslots as timeslots_crud
 from app.crud import users as users_crud
 from app.crud import venues as venues_crud
+from app.crud import versions as versions_crud
+from app.db.session import session_scope
 from app.schemas import match_requests as match_schemas
 
 router = APIRouter(prefix="/matches", tags=["matches"])
 
+# Listings can embed users, venues and slots, so those invalidate them too.
+match_listing_versions = conditional(
+    versions_crud.MATCH_REQUESTS, versions_crud.USERS, versions_crud.VENUES, versions_crud.TIME_SLOTS
+)
+
 
 @router.post(
     "/",
     response_model=match_schemas.MatchRequestRead,
     status_code=status.HTTP_201_CREATED,
 )
-def create_match_request(
-    *, session: Session = Depends(get_db), match_in: match_schemas.MatchRequestCreate
+async def create_match_request(
+    *, db: Database = Depends(get_database), match_in: match_schemas.MatchRequestCreate
 ) -> match_schemas.MatchRequestRead:
-    requester = users_crud.get(session, user_id=match_in.requester_id)
-    target = users_crud.get(session, user_id=match_in.target_id)
+    requester = await db.run(users_crud.get, user_id=match_in.requester_id)
+    target = await db.run(users_crud.get, user_id=match_in.target_id)
     if not requester or not target:
         raise HTTPException(status_code=404, detail="Requester or target user not found")
 
-    venue = venues_crud.get(session, venue_id=match_in.venue_id)
+    venue = await db.run(venues_crud.get, venue_id=match_in.venue_id)
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
 
     if match_in.time_slot_id:
-        slot = timeslots_crud.get(session, slot_id=match_in.time_slot_id)
+        slot = await db.run(timeslots_crud.get, slot_id=match_in.time_slot_id)
         if not slot or slot.user_id != match_in.target_id:
             raise HTTPException(status_code=400, detail="Invalid time slot for target user")
+        if slot.status != "available":
+            raise HTTPException(status_code=409, detail="Time slot is not available")
         if match_in.proposed_time != slot.start_time:
             raise HTTPException(
                 status_code=400,
                 detail="Proposed time must match the selected time slot start",
             )
 
-    return matches_crud.create(session, match_in=match_in)
+    return await db.run(matches_crud.create, match_in=match_in)
+
+
+def expand_params(
+    expand: List[str] = Query(
+        default=[],
+        description="Relations to embed: requester, target, venue, time_slot (repeat or comma-separate)",
+    ),
+) -> List[str]:
+    names = [name.strip() for value in expand for name in value.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(matches_crud.EXPANDABLE))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot expand: {', '.join(unknown)}")
+    return names
+
+
+@router.get(
+    "/received/{user_id}",
+    response_model=match_schemas.MatchRequestPage,
+    dependencies=[Depends(match_listing_versions)],
+)
+async def read_received_matches(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    expand: List[str] = Depends(expand_params),
+    user_id: int,
+) -> match_schemas.MatchRequestPage:
+    result = await db.run(
+        matches_crud.get_received,
+        user_id=user_id,
+        cursor=page.cursor,
+        limit=page.limit,
+        expand=expand,
+    )
+    return match_schemas.MatchRequestPage(items=result.items, next_cursor=result.next_cursor)
 
 
 @router.get(
-    "/received/{user_id}", response_model=List[match_schemas.MatchRequestRead]
+    "/sent/{user_id}",
+    response_model=match_schemas.MatchRequestPage,
+    dependencies=[Depends(match_listing_versions)],
 )
-def read_received_matches(
-    *, session: Session = Depends(get_db), user_id: int
-) -> List[match_schemas.MatchRequestRead]:
-    return matches_crud.get_received(session, user_id=user_id)
+async def read_sent_matches(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    expand: List[str] = Depends(expand_params),
+    user_id: int,
+) -> match_schemas.MatchRequestPage:
+    result = await db.run(
+        matches_crud.get_sent,
+        user_id=user_id,
+        cursor=page.cursor,
+        limit=page.limit,
+        expand=expand,
+    )
+    return match_schemas.MatchRequestPage(items=result.items, next_cursor=result.next_cursor)
 
 
 @router.get(
-    "/sent/{user_id}", response_model=List[match_schemas.MatchRequestRead]
+    "/suggestions/{user_id}", response_model=List[match_schemas.MatchSuggestion]
 )
-def read_sent_matches(
-    *, session: Session = Depends(get_db), user_id: int
-) -> List[match_schemas.MatchRequestRead]:
-    return matches_crud.get_sent(session, user_id=user_id)
+async def read_match_suggestions(
+    *,
+    db: Database = Depends(get_database),
+    user_id: int,
+    limit: int = Query(default=10, ge=1, le=100),
+) -> List[match_schemas.MatchSuggestion]:
+    user = await db.run(users_crud.get, user_id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Deferred: the scorer pulls in numpy, which would dominate import time.
+    from app.services import matching
+
+    # Scoring is CPU-bound; keep it off the event loop in both modes.
+    suggestions = await run_in_threadpool(matching.suggest, user_id, limit=limit)
+    candidates = await db.run(users_crud.get_many, [item.user_id for item in suggestions])
+    users = {candidate.id: candidate for candidate in candidates}
+    return [
+        match_schemas.MatchSuggestion(
+            user=users[item.user_id],
+            score=item.score,
+            preference_score=item.preference_score,
+            same_location=item.same_location,
+            overlap_hours=item.overlap_hours,
+        )
+        for item in suggestions
+        if item.user_id in users
+    ]
+
+
+def _user_exists(user_id: int) -> bool:
+    with session_scope() as session:
+        return users_crud.get(session, user_id) is not None
+
+
+@router.get("/stream/{user_id}", response_class=StreamingResponse)
+async def stream_match_events(user_id: int) -> StreamingResponse:
+    """Server-Sent Events feed of match request changes involving ``user_id``."""
+    # A short-lived session: a request-scoped one would hold a connection for the stream's lifetime.
+    if not await run_in_threadpool(_user_exists, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    heartbeat = get_settings().sse_heartbeat_seconds
+
+    async def events() -> AsyncIterator[str]:
+        async with get_broker().subscribe(user_channel(user_id)) as subscription:
+            yield "retry: 5000\n\n"
+            while True:
+                message = await subscription.get(timeout=heartbeat)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: match_request\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.put("/{match_id}", response_model=match_schemas.MatchRequestRead)
-def update_match_request(
-    *, session: Session = Depends(get_db), match_id: int, match_in: match_schemas.MatchRequestUpdate
+async def update_match_request(
+    *, db: Database = Depends(get_database), match_id: int, match_in: match_schemas.MatchRequestUpdate
 ) -> match_schemas.MatchRequestRead:
-    match = matches_crud.get(session, match_id=match_id)
+    match = await db.run(matches_crud.get, match_id=match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match request not found")
 
+    # The client accepts with a plain status update; it must book the slot like /confirm does.
+    if match_in.status in matches_crud.ACCEPT_STATUSES and match.status not in matches_crud.ACCEPT_STATUSES:
+        if any(
+            getattr(match_in, field) is not None for field in ("time_slot_id", "proposed_time", "venue_id", "message")
+        ):
+            raise HTTPException(status_code=400, detail="Accept a match request without changing other fields")
+        return await db.run(matches_crud.confirm, db_match=match)
+
     if match_in.venue_id:
-        venue = venues_crud.get(session, venue_id=match_in.venue_id)
+        venue = await db.run(venues_crud.get, venue_id=match_in.venue_id)
         if not venue:
             raise HTTPException(status_code=404, detail="Venue not found")
 
     if match_in.time_slot_id:
-        slot = timeslots_crud.get(session, slot_id=match_in.time_slot_id)
+        slot = await db.run(timeslots_crud.get, slot_id=match_in.time_slot_id)
         if not slot:
             raise HTTPException(status_code=404, detail="Time slot not found")
+        if slot.id != match.time_slot_id and slot.status != "available":
+            raise HTTPException(status_code=409, detail="Time slot is not available")
         if match_in.proposed_time and match_in.proposed_time != slot.start_time:
             raise HTTPException(
                 status_code=400,
                 detail="Proposed time must match the selected time slot start",
             )
 
-    return matches_crud.update(session, db_match=match, match_in=match_in)
+    return await db.run(matches_crud.update, db_match=match, match_in=match_in)
+
+
+@router.post("/{match_id}/confirm", response_model=match_schemas.MatchRequestRead)
+async def confirm_match_request(
+    *, db: Database = Depends(get_database), match_id: int
+) -> match_schemas.MatchRequestRead:
+    """Accept a pending request and book its time slot; other pending requests for the slot are rejected."""
+    match = await db.run(matches_crud.get, match_id=match_id)
+    if not match:
+        raise HTTPException(status_code=404, detail="Match request not found")
+    return await db.run(matches_crud.confirm, db_match=match)
 
 
 @router.delete("/{match_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_match_request(*, session: Session = Depends(get_db), match_id: int) -> None:
-    match = matches_crud.get(session, match_id=match_id)
+async def delete_match_request(*, db: Database = Depends(get_database), match_id: int) -> None:
+    match = await db.run(matches_crud.get, match_id=match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match request not found")
-    matches_crud.delete(session, db_match=match)
+    await db.run(matches_crud.delete, db_match=match)
@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.deps import Database, conditional, get_database, page_size
+from app.crud import versions as versions_crud
+from app.schemas.bootstrap import BootstrapRead
+from app.services.bootstrap import load_bootstrap
+
+router = APIRouter(prefix="/me", tags=["me"])
+
+
+def _page(page) -> dict:
+    return {"items": page.items, "next_cursor": page.next_cursor}
+
+
+@router.get(
+    "/bootstrap/{user_id}",
+    response_model=BootstrapRead,
+    dependencies=[
+        Depends(
+            conditional(
+                versions_crud.USERS,
+                versions_crud.VENUES,
+                versions_crud.TIME_SLOTS,
+                versions_crud.MATCH_REQUESTS,
+            )
+        )
+    ],
+)
+async def read_bootstrap(
+    *,
+    db: Database = Depends(get_database),
+    user_id: int,
+    limit: Optional[int] = Query(None, ge=1),
+) -> BootstrapRead:
+    """The signed-in user plus the first page of every listing, in one round trip."""
+    data = await db.run(load_bootstrap, user_id, limit=page_size(limit))
+    if data is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return BootstrapRead(
+        user=data.user,
+        users=_page(data.users),
+        venues=_page(data.venues),
+        timeslots=_page(data.timeslots),
+        received=_page(data.received),
+        sent=_page(data.sent),
+    )
@@ -1,21 +1,57 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from app.api.deps import get_db
+from app.api.deps import Database, PageParams, check_batch, conditional, get_database
 from app.crud import preferences as preferences_crud
 from app.crud import users as users_crud
+from app.crud import versions as versions_crud
 from app.schemas import preferences as preference_schemas
+from app.schemas.batch import BatchIds
 
 router = APIRouter(prefix="/preferences", tags=["preferences"])
 
 
-@router.get("/{user_id}", response_model=List[preference_schemas.PreferenceRead])
-def read_preferences(
-    *, session: Session = Depends(get_db), user_id: int
-) -> List[preference_schemas.PreferenceRead]:
-    return preferences_crud.get_by_user(session, user_id=user_id)
+@router.get(
+    "/shared/{user_id}",
+    response_model=preference_schemas.SharedInterestPage,
+    dependencies=[Depends(conditional(versions_crud.PREFERENCES, versions_crud.USERS))],
+)
+async def read_shared_interests(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    user_id: int,
+    min_shared: int = Query(1, ge=1, description="Minimum number of preference values in common"),
+) -> preference_schemas.SharedInterestPage:
+    """Users who share preferences with ``user_id``, highest combined confidence first."""
+    user = await db.run(users_crud.get, user_id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    result = await db.run(
+        preferences_crud.get_shared, user_id=user_id, min_shared=min_shared, cursor=page.cursor, limit=page.limit
+    )
+    return preference_schemas.SharedInterestPage(
+        items=[
+            preference_schemas.SharedInterest(user=other, shared=shared, score=score)
+            for other, shared, score in result.items
+        ],
+        next_cursor=result.next_cursor,
+    )
+
+
+@router.get(
+    "/{user_id}",
+    response_model=preference_schemas.PreferencePage,
+    dependencies=[Depends(conditional(versions_crud.PREFERENCES))],
+)
+async def read_preferences(
+    *, db: Database = Depends(get_database), page: PageParams = Depends(), user_id: int
+) -> preference_schemas.PreferencePage:
+    result = await db.run(
+        preferences_crud.get_by_user, user_id=user_id, cursor=page.cursor, limit=page.limit
+    )
+    return preference_schemas.PreferencePage(items=result.items, next_cursor=result.next_cursor)
 
 
 @router.post(
@@ -23,33 +59,68 @@ def read_preferences(
     response_model=preference_schemas.PreferenceRead,
     status_code=status.HTTP_201_CREATED,
 )
-def create_preference(
-    *, session: Session = Depends(get_db), preference_in: preference_schemas.PreferenceCreate
+async def create_preference(
+    *, db: Database = Depends(get_database), preference_in: preference_schemas.PreferenceCreate
 ) -> preference_schemas.PreferenceRead:
-    user = users_crud.get(session, user_id=preference_in.user_id)
+    user = await db.run(users_crud.get, user_id=preference_in.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return preferences_crud.create(session, preference_in=preference_in)
+    return await db.run(preferences_crud.create, preference_in=preference_in)
+
+
+@router.post("/batch", response_model=BatchIds, status_code=status.HTTP_201_CREATED)
+async def create_preferences_batch(
+    *, db: Database = Depends(get_database), preferences_in: List[preference_schemas.PreferenceCreate]
+) -> BatchIds:
+    check_batch(preferences_in)
+    missing_users = await db.run(
+        users_crud.missing_ids, user_ids=[item.user_id for item in preferences_in]
+    )
+    if missing_users:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing_users}")
+    ids = await db.run(preferences_crud.create_many, preferences_in=preferences_in)
+    return BatchIds(ids=ids)
+
+
+@router.patch("/batch", response_model=BatchIds)
+async def update_preferences_batch(
+    *, db: Database = Depends(get_database), preferences_in: List[preference_schemas.PreferenceBatchUpdate]
+) -> BatchIds:
+    ids = [item.id for item in preferences_in]
+    check_batch(preferences_in, ids=ids)
+    missing = await db.run(preferences_crud.missing_ids, preference_ids=ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Preferences not found: {missing}")
+    return BatchIds(ids=await db.run(preferences_crud.update_many, preferences_in=preferences_in))
+
+
+@router.delete("/batch", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_preferences_batch(*, db: Database = Depends(get_database), batch: BatchIds) -> None:
+    check_batch(batch.ids, ids=batch.ids)
+    missing = await db.run(preferences_crud.missing_ids, preference_ids=batch.ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Preferences not found: {missing}")
+    await db.run(preferences_crud.delete_many, preference_ids=batch.ids)
 
 
 @router.put("/{preference_id}", response_model=preference_schemas.PreferenceRead)
-def update_preference(
+async def update_preference(
     *,
-    session: Session = Depends(get_db),
+    db: Database = Depends(get_database),
     preference_id: int,
     preference_in: preference_schemas.PreferenceUpdate,
 ) -> preference_schemas.PreferenceRead:
-    preference = preferences_crud.get(session, preference_id=preference_id)
+    preference = await db.run(preferences_crud.get, preference_id=preference_id)
     if not preference:
         raise HTTPException(status_code=404, detail="Preference not found")
-    return preferences_crud.update(
-        session, db_preference=preference, preference_in=preference_in
+    return await db.run(
+        preferences_crud.update, db_preference=preference, preference_in=preference_in
     )
 
 
 @router.delete("/{preference_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_preference(*, session: Session = Depends(get_db), preference_id: int) -> None:
-    preference = preferences_crud.get(session, preference_id=preference_id)
+async def delete_preference(*, db: Database = Depends(get_database), preference_id: int) -> None:
+    preference = await db.run(preferences_crud.get, preference_id=preference_id)
     if not preference:
         raise HTTPException(status_code=404, detail="Preference not found")
-    preferences_crud.delete(session, db_preference=preference)
+    await db.run(preferences_crud.delete, db_preference=preference)
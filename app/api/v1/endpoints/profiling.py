@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+
+from app.api.deps import require_admin
+from app.core import profiling
+from app.core.config import get_settings
+
+# Mounted by create_application only when the ``profiling`` setting is on.
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile")
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0),
+    mode: str = Query("sample", description="sample (collapsed stacks) or cprofile (pstats)"),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    include_idle: bool = False,
+) -> Response:
+    """Profile this worker for ``seconds`` and return the result as a download."""
+    max_seconds = get_settings().profile_max_seconds
+    if seconds > max_seconds:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {max_seconds}")
+    if mode not in ("sample", "cprofile"):
+        raise HTTPException(status_code=400, detail="mode must be 'sample' or 'cprofile'")
+
+    try:
+        if mode == "cprofile":
+            content = await profiling.run_cprofile(seconds)
+            return Response(
+                content,
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": f'attachment; filename="{profiling.filename("pstats")}"'},
+            )
+        sampler = await profiling.run_sampler(seconds, interval=interval_ms / 1000, include_idle=include_idle)
+    except profiling.ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return Response(
+        sampler.collapsed(),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="{profiling.filename("collapsed")}"',
+            "X-Profile-Samples": str(sampler.samples),
+        },
+    )
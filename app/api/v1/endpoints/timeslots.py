@@ -1,46 +1,135 @@
+from datetime import datetime, timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
-from app.api.deps import get_db
+from app.api.deps import Database, PageParams, check_batch, conditional, get_database
+from app.api.responses import page_response
+from app.core.config import get_settings
 from app.crud import timeslots as timeslots_crud
+from app.crud import users as users_crud
+from app.crud import versions as versions_crud
 from app.schemas import timeslots as timeslot_schemas
+from app.schemas.batch import BatchIds
 
 router = APIRouter(prefix="/timeslots", tags=["timeslots"])
 
 
-@router.get("/", response_model=List[timeslot_schemas.TimeSlotRead])
-def read_timeslots(
-    *, session: Session = Depends(get_db), user_id: int | None = None
-) -> List[timeslot_schemas.TimeSlotRead]:
+@router.get(
+    "/",
+    response_model=timeslot_schemas.TimeSlotPage,
+    dependencies=[Depends(conditional(versions_crud.TIME_SLOTS))],
+)
+async def read_timeslots(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    user_id: int | None = None,
+    response: Response,
+) -> timeslot_schemas.TimeSlotPage:
+    rows = get_settings().fast_json
     if user_id is not None:
-        return timeslots_crud.get_by_user(session, user_id=user_id)
-    return timeslots_crud.get_available(session)
+        result = await db.run(
+            timeslots_crud.get_by_user, user_id=user_id, cursor=page.cursor, limit=page.limit, rows=rows
+        )
+    else:
+        result = await db.run(timeslots_crud.get_available, cursor=page.cursor, limit=page.limit, rows=rows)
+    if rows:
+        return page_response(result, response)
+    return timeslot_schemas.TimeSlotPage(items=result.items, next_cursor=result.next_cursor)
+
+
+@router.get(
+    "/mutual",
+    response_model=List[timeslot_schemas.AvailabilityWindow],
+    dependencies=[Depends(conditional(versions_crud.TIME_SLOTS))],
+)
+async def read_mutual_availability(
+    *,
+    db: Database = Depends(get_database),
+    user_ids: List[int] = Query(...),
+    start: datetime,
+    end: datetime,
+    min_minutes: int = Query(default=0, ge=0),
+) -> List[timeslot_schemas.AvailabilityWindow]:
+    user_ids = list(dict.fromkeys(user_ids))
+    # Stored slot times are naive UTC; an aware bound would not compare with them.
+    start, end = timeslots_crud.naive_utc(start), timeslots_crud.naive_utc(end)
+    if len(user_ids) < 2:
+        raise HTTPException(status_code=400, detail="At least two distinct users are required")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="End must be after start")
+
+    windows = await db.run(
+        timeslots_crud.get_mutual_availability,
+        user_ids=user_ids,
+        start=start,
+        end=end,
+        min_duration=timedelta(minutes=min_minutes),
+    )
+    return [
+        timeslot_schemas.AvailabilityWindow(start_time=window_start, end_time=window_end)
+        for window_start, window_end in windows
+    ]
 
 
 @router.post(
     "/", response_model=timeslot_schemas.TimeSlotRead, status_code=status.HTTP_201_CREATED
 )
-def create_timeslot(
-    *, session: Session = Depends(get_db), slot_in: timeslot_schemas.TimeSlotCreate
+async def create_timeslot(
+    *, db: Database = Depends(get_database), slot_in: timeslot_schemas.TimeSlotCreate
 ) -> timeslot_schemas.TimeSlotRead:
-    return timeslots_crud.create(session, slot_in=slot_in)
+    return await db.run(timeslots_crud.create, slot_in=slot_in)
+
+
+@router.post("/batch", response_model=BatchIds, status_code=status.HTTP_201_CREATED)
+async def create_timeslots_batch(
+    *, db: Database = Depends(get_database), slots_in: List[timeslot_schemas.TimeSlotCreate]
+) -> BatchIds:
+    check_batch(slots_in)
+    missing_users = await db.run(
+        users_crud.missing_ids, user_ids=[item.user_id for item in slots_in]
+    )
+    if missing_users:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing_users}")
+    ids = await db.run(timeslots_crud.create_many, slots_in=slots_in)
+    return BatchIds(ids=ids)
+
+
+@router.patch("/batch", response_model=BatchIds)
+async def update_timeslots_batch(
+    *, db: Database = Depends(get_database), slots_in: List[timeslot_schemas.TimeSlotBatchUpdate]
+) -> BatchIds:
+    ids = [item.id for item in slots_in]
+    check_batch(slots_in, ids=ids)
+    missing = await db.run(timeslots_crud.missing_ids, slot_ids=ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Time slots not found: {missing}")
+    return BatchIds(ids=await db.run(timeslots_crud.update_many, slots_in=slots_in))
+
+
+@router.delete("/batch", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_timeslots_batch(*, db: Database = Depends(get_database), batch: BatchIds) -> None:
+    check_batch(batch.ids, ids=batch.ids)
+    missing = await db.run(timeslots_crud.missing_ids, slot_ids=batch.ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Time slots not found: {missing}")
+    await db.run(timeslots_crud.delete_many, slot_ids=batch.ids)
 
 
 @router.put("/{slot_id}", response_model=timeslot_schemas.TimeSlotRead)
-def update_timeslot(
-    *, session: Session = Depends(get_db), slot_id: int, slot_in: timeslot_schemas.TimeSlotUpdate
+async def update_timeslot(
+    *, db: Database = Depends(get_database), slot_id: int, slot_in: timeslot_schemas.TimeSlotUpdate
 ) -> timeslot_schemas.TimeSlotRead:
-    slot = timeslots_crud.get(session, slot_id=slot_id)
+    slot = await db.run(timeslots_crud.get, slot_id=slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="Time slot not found")
-    return timeslots_crud.update(session, db_slot=slot, slot_in=slot_in)
+    return await db.run(timeslots_crud.update, db_slot=slot, slot_in=slot_in)
 
 
 @router.delete("/{slot_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_timeslot(*, session: Session = Depends(get_db), slot_id: int) -> None:
-    slot = timeslots_crud.get(session, slot_id=slot_id)
+async def delete_timeslot(*, db: Database = Depends(get_database), slot_id: int) -> None:
+    slot = await db.run(timeslots_crud.get, slot_id=slot_id)
     if not slot:
         raise HTTPException(status_code=404, detail="Time slot not found")
-    timeslots_crud.delete(session, db_slot=slot)
+    await db.run(timeslots_crud.delete, db_slot=slot)
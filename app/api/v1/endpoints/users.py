@@ -1,60 +1,147 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db
+from app.api.deps import Database, PageParams, conditional, get_database
+from app.api.responses import page_response
+from app.core.config import get_settings
 from app.crud import users as users_crud
+from app.crud import versions as versions_crud
 from app.schemas import users as user_schemas
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+MAX_RADIUS_KM = 100.0
 
-@router.get("/", response_model=List[user_schemas.UserRead])
-def read_users(
-    *,
-    session: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
-) -> List[user_schemas.UserRead]:
-    return users_crud.get_multi(session, skip=skip, limit=limit)
+
+@router.get(
+    "/",
+    response_model=user_schemas.UserPage,
+    dependencies=[Depends(conditional(versions_crud.USERS))],
+)
+async def read_users(
+    *, db: Database = Depends(get_database), page: PageParams = Depends(), response: Response
+) -> user_schemas.UserPage:
+    if get_settings().fast_json:
+        rows = await db.run(users_crud.get_multi, cursor=page.cursor, limit=page.limit, rows=True)
+        return page_response(rows, response)
+    result = await db.run(users_crud.get_multi, cursor=page.cursor, limit=page.limit)
+    return user_schemas.UserPage(items=result.items, next_cursor=result.next_cursor)
 
 
 @router.post(
     "/", response_model=user_schemas.UserRead, status_code=status.HTTP_201_CREATED
 )
-def create_user(
-    *, session: Session = Depends(get_db), user_in: user_schemas.UserCreate
+async def create_user(
+    *, db: Database = Depends(get_database), user_in: user_schemas.UserCreate
 ) -> user_schemas.UserRead:
-    existing = users_crud.get_by_email(session, user_in.email)
+    existing = await db.run(users_crud.get_by_email, user_in.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return users_crud.create(session, user_in=user_in)
+    return await db.run(users_crud.create, user_in=user_in)
+
+
+@router.get(
+    "/search",
+    response_model=user_schemas.UserPage,
+    dependencies=[Depends(conditional(versions_crud.USERS))],
+)
+async def search_users(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match in name, bio or location"),
+) -> user_schemas.UserPage:
+    """Users matching every word of ``q`` as a prefix, best match first."""
+    result = await db.run(users_crud.search, query=q, cursor=page.cursor, limit=page.limit)
+    return user_schemas.UserPage(items=result.items, next_cursor=result.next_cursor)
+
 
+@router.get(
+    "/nearby",
+    response_model=user_schemas.UserDistancePage,
+    dependencies=[Depends(conditional(versions_crud.USERS))],
+)
+async def nearby_users(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10.0, gt=0, le=MAX_RADIUS_KM),
+    exclude_id: Optional[int] = Query(None, description="Leave this user out, e.g. the caller"),
+) -> user_schemas.UserDistancePage:
+    """Users within ``radius_km`` of a point, nearest first."""
+    result = await db.run(
+        users_crud.nearby,
+        center=(lat, lon),
+        radius_km=radius_km,
+        exclude_id=exclude_id,
+        cursor=page.cursor,
+        limit=page.limit,
+    )
+    return user_schemas.UserDistancePage(
+        items=[user_schemas.UserDistance(user=user, distance_km=distance) for user, distance in result.items],
+        next_cursor=result.next_cursor,
+    )
 
-@router.get("/{user_id}", response_model=user_schemas.UserRead)
-def read_user(
-    *, session: Session = Depends(get_db), user_id: int
+
+@router.get(
+    "/{user_id}",
+    response_model=user_schemas.UserRead,
+    dependencies=[Depends(conditional(versions_crud.USERS))],
+)
+async def read_user(
+    *, db: Database = Depends(get_database), user_id: int
 ) -> user_schemas.UserRead:
-    user = users_crud.get(session, user_id=user_id)
+    user = await db.run(users_crud.get, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
+@router.get(
+    "/{user_id}/similar",
+    response_model=List[user_schemas.UserSimilarity],
+    dependencies=[Depends(conditional(versions_crud.USERS))],
+)
+async def read_similar_users(
+    *, db: Database = Depends(get_database), user_id: int, k: int = Query(default=10, ge=1, le=100)
+) -> List[user_schemas.UserSimilarity]:
+    """The ``k`` users whose analysis embeddings are closest to this user's, by cosine similarity."""
+    user = await db.run(users_crud.get, user_id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    embedding = await db.run(users_crud.get_embedding, user_id=user_id)
+    if embedding is None:
+        raise HTTPException(status_code=400, detail="User has no analysis to compare")
+
+    # Deferred like the matching scorer: the index needs numpy.
+    from app.services import similarity
+
+    found = await run_in_threadpool(similarity.similar, user_id, embedding, k=k)
+    candidates = await db.run(users_crud.get_many, [other_id for other_id, _ in found])
+    users = {candidate.id: candidate for candidate in candidates}
+    # A user deleted by another worker can linger in the index until its next reload.
+    return [
+        user_schemas.UserSimilarity(user=users[other_id], score=score) for other_id, score in found if other_id in users
+    ]
+
+
 @router.put("/{user_id}", response_model=user_schemas.UserRead)
-def update_user(
-    *, session: Session = Depends(get_db), user_id: int, user_in: user_schemas.UserUpdate
+async def update_user(
+    *, db: Database = Depends(get_database), user_id: int, user_in: user_schemas.UserUpdate
 ) -> user_schemas.UserRead:
-    user = users_crud.get(session, user_id=user_id)
+    user = await db.run(users_crud.get, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return users_crud.update(session, db_user=user, user_in=user_in)
+    return await db.run(users_crud.update, db_user=user, user_in=user_in)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(*, session: Session = Depends(get_db), user_id: int) -> None:
-    user = users_crud.get(session, user_id=user_id)
+async def delete_user(*, db: Database = Depends(get_database), user_id: int) -> None:
+    user = await db.run(users_crud.get, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    users_crud.delete(session, db_user=user)
+    await db.run(users_crud.delete, db_user=user)
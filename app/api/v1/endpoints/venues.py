@@ -1,44 +1,194 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
-from app.api.deps import get_db
+from app.api.deps import Database, PageParams, check_batch, conditional, get_database
+from app.api.responses import page_response
+from app.core.config import get_settings
+from app.crud import users as users_crud
 from app.crud import venues as venues_crud
+from app.crud import versions as versions_crud
 from app.schemas import venues as venue_schemas
+from app.schemas.batch import BatchIds
+from app.services import geo
 
 router = APIRouter(prefix="/venues", tags=["venues"])
 
+MAX_RADIUS_KM = 100.0
+MAX_MIDPOINT_USERS = 10
 
-@router.get("/", response_model=List[venue_schemas.VenueRead])
-def read_venues(
-    *, session: Session = Depends(get_db), venue_type: str | None = None
-) -> List[venue_schemas.VenueRead]:
-    return venues_crud.get_multi(session, venue_type=venue_type)
+
+@router.get(
+    "/",
+    response_model=venue_schemas.VenuePage,
+    dependencies=[Depends(conditional(versions_crud.VENUES))],
+)
+async def read_venues(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    venue_type: str | None = None,
+    response: Response,
+) -> venue_schemas.VenuePage:
+    if get_settings().fast_json:
+        rows = await db.run(
+            venues_crud.get_multi, cursor=page.cursor, limit=page.limit, venue_type=venue_type, rows=True
+        )
+        return page_response(rows, response)
+    result = await db.run(
+        venues_crud.get_multi, cursor=page.cursor, limit=page.limit, venue_type=venue_type
+    )
+    return venue_schemas.VenuePage(items=result.items, next_cursor=result.next_cursor)
+
+
+@router.get(
+    "/search",
+    response_model=venue_schemas.VenuePage,
+    dependencies=[Depends(conditional(versions_crud.VENUES))],
+)
+async def search_venues(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    q: str = Query(
+        ..., min_length=1, max_length=200, description="Words to match in name, description or location"
+    ),
+) -> venue_schemas.VenuePage:
+    """Venues matching every word of ``q`` as a prefix, best match first."""
+    result = await db.run(venues_crud.search, query=q, cursor=page.cursor, limit=page.limit)
+    return venue_schemas.VenuePage(items=result.items, next_cursor=result.next_cursor)
+
+
+@router.get(
+    "/nearby",
+    response_model=venue_schemas.VenueDistancePage,
+    dependencies=[Depends(conditional(versions_crud.VENUES))],
+)
+async def nearby_venues(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(2.0, gt=0, le=MAX_RADIUS_KM),
+    venue_type: str | None = None,
+) -> venue_schemas.VenueDistancePage:
+    """Venues within ``radius_km`` of a point, nearest first."""
+    result = await db.run(
+        venues_crud.nearby,
+        center=(lat, lon),
+        radius_km=radius_km,
+        venue_type=venue_type,
+        cursor=page.cursor,
+        limit=page.limit,
+    )
+    return venue_schemas.VenueDistancePage(
+        items=[venue_schemas.VenueDistance(venue=venue, distance_km=distance) for venue, distance in result.items],
+        next_cursor=result.next_cursor,
+    )
+
+
+@router.get(
+    "/midpoint",
+    response_model=venue_schemas.MidpointVenues,
+    dependencies=[Depends(conditional(versions_crud.USERS, versions_crud.VENUES))],
+)
+async def midpoint_venues(
+    *,
+    db: Database = Depends(get_database),
+    page: PageParams = Depends(),
+    user_ids: List[int] = Query(..., description="Two or more users to meet up"),
+    radius_km: float = Query(5.0, gt=0, le=MAX_RADIUS_KM),
+    venue_type: str | None = None,
+) -> venue_schemas.MidpointVenues:
+    """Venues around the geographic midpoint of the users, nearest to it first."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not 2 <= len(user_ids) <= MAX_MIDPOINT_USERS:
+        raise HTTPException(status_code=400, detail=f"Give between 2 and {MAX_MIDPOINT_USERS} distinct users")
+    users = await db.run(users_crud.get_many, user_ids=user_ids)
+    missing = sorted(set(user_ids) - {user.id for user in users})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing}")
+    unplaced = sorted(user.id for user in users if user.latitude is None or user.longitude is None)
+    if unplaced:
+        raise HTTPException(status_code=400, detail=f"Users without coordinates: {unplaced}")
+    latitude, longitude = geo.midpoint([(user.latitude, user.longitude) for user in users])
+    result = await db.run(
+        venues_crud.nearby,
+        center=(latitude, longitude),
+        radius_km=radius_km,
+        venue_type=venue_type,
+        cursor=page.cursor,
+        limit=page.limit,
+    )
+    return venue_schemas.MidpointVenues(
+        latitude=latitude,
+        longitude=longitude,
+        items=[venue_schemas.VenueDistance(venue=venue, distance_km=distance) for venue, distance in result.items],
+        next_cursor=result.next_cursor,
+    )
 
 
 @router.post(
     "/", response_model=venue_schemas.VenueRead, status_code=status.HTTP_201_CREATED
 )
-def create_venue(
-    *, session: Session = Depends(get_db), venue_in: venue_schemas.VenueCreate
+async def create_venue(
+    *, db: Database = Depends(get_database), venue_in: venue_schemas.VenueCreate
 ) -> venue_schemas.VenueRead:
-    return venues_crud.create(session, venue_in=venue_in)
+    return await db.run(venues_crud.create, venue_in=venue_in)
+
+
+@router.post("/batch", response_model=BatchIds, status_code=status.HTTP_201_CREATED)
+async def create_venues_batch(
+    *, db: Database = Depends(get_database), venues_in: List[venue_schemas.VenueCreate]
+) -> BatchIds:
+    check_batch(venues_in)
+    creator_ids = [item.created_by_id for item in venues_in if item.created_by_id is not None]
+    missing_users = await db.run(users_crud.missing_ids, user_ids=creator_ids)
+    if missing_users:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing_users}")
+    ids = await db.run(venues_crud.create_many, venues_in=venues_in)
+    return BatchIds(ids=ids)
+
+
+@router.patch("/batch", response_model=BatchIds)
+async def update_venues_batch(
+    *, db: Database = Depends(get_database), venues_in: List[venue_schemas.VenueBatchUpdate]
+) -> BatchIds:
+    ids = [item.id for item in venues_in]
+    check_batch(venues_in, ids=ids)
+    missing = await db.run(venues_crud.missing_ids, venue_ids=ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Venues not found: {missing}")
+    creator_ids = [item.created_by_id for item in venues_in if item.created_by_id is not None]
+    missing_users = await db.run(users_crud.missing_ids, user_ids=creator_ids)
+    if missing_users:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing_users}")
+    return BatchIds(ids=await db.run(venues_crud.update_many, venues_in=venues_in))
+
+
+@router.delete("/batch", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_venues_batch(*, db: Database = Depends(get_database), batch: BatchIds) -> None:
+    check_batch(batch.ids, ids=batch.ids)
+    missing = await db.run(venues_crud.missing_ids, venue_ids=batch.ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Venues not found: {missing}")
+    await db.run(venues_crud.delete_many, venue_ids=batch.ids)
 
 
 @router.put("/{venue_id}", response_model=venue_schemas.VenueRead)
-def update_venue(
-    *, session: Session = Depends(get_db), venue_id: int, venue_in: venue_schemas.VenueUpdate
+async def update_venue(
+    *, db: Database = Depends(get_database), venue_id: int, venue_in: venue_schemas.VenueUpdate
 ) -> venue_schemas.VenueRead:
-    venue = venues_crud.get(session, venue_id=venue_id)
+    venue = await db.run(venues_crud.get, venue_id=venue_id)
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
-    return venues_crud.update(session, db_venue=venue, venue_in=venue_in)
+    return await db.run(venues_crud.update, db_venue=venue, venue_in=venue_in)
 
 
 @router.delete("/{venue_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_venue(*, session: Session = Depends(get_db), venue_id: int) -> None:
-    venue = venues_crud.get(session, venue_id=venue_id)
+async def delete_venue(*, db: Database = Depends(get_database), venue_id: int) -> None:
+    venue = await db.run(venues_crud.get, venue_id=venue_id)
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
-    venues_crud.delete(session, db_venue=venue)
+    await db.run(venues_crud.delete, db_venue=venue)
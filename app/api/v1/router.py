@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
 from app.api.v1.endpoints import (
+    admin,
     auth,
     matches,
+    me,
     preferences,
     timeslots,
     users,
@@ -16,3 +18,5 @@ api_router.include_router(venues.router)
 api_router.include_router(matches.router)
 api_router.include_router(preferences.router)
 api_router.include_router(auth.router)
+api_router.include_router(me.router)
+api_router.include_router(admin.router)
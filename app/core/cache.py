@@ -0,0 +1,143 @@
+"""Pluggable key/value cache used in front of hot crud reads.
+
+The default backend is an in-process LRU with per-entry TTL. Any other
+backend (for example a Redis client) only has to implement
+:class:`CacheBackend`. Cached values are plain dicts, lists and tuples of
+column values, so they pickle cleanly.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import Settings, get_settings
+from app.core.imports import import_class
+
+
+class CacheBackend(ABC):
+    """Minimal interface a cache backend has to provide; ``get`` returns ``None`` on a miss."""
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "CacheBackend":
+        return cls()
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def info(self) -> Dict[str, Any]:
+        return {}
+
+
+class NullCache(CacheBackend):
+    """Backend that stores nothing; every read is a miss."""
+
+    def get(self, key: str) -> Any:
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe LRU with optional per-entry expiry."""
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "MemoryCache":
+        return cls(max_entries=settings.cache_max_entries)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class CacheStats:
+    """Hit/miss/invalidation counters per namespace (table name)."""
+
+    COUNTERS = ("hits", "misses", "invalidations")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+
+    def incr(self, namespace: str, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[namespace][counter] += amount
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {namespace: dict(counts) for namespace, counts in self._counts.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+_BACKENDS = {"memory": MemoryCache, "none": NullCache}
+
+
+@lru_cache()
+def get_cache() -> CacheBackend:
+    """Return the process-wide backend named by ``cache_backend`` (a short name or ``module:Class``)."""
+    settings = get_settings()
+    name = settings.cache_backend
+    backend = _BACKENDS.get(name.lower()) or import_class(name, CacheBackend)
+    return backend.from_settings(settings)
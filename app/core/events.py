@@ -0,0 +1,122 @@
+"""Publish/subscribe for pushing change notifications to connected clients.
+
+Publishers are the sync crud functions, which run in worker threads or
+inside ``run_sync``, so :meth:`Broker.publish` has to be thread-safe and
+must never block. Subscribers are streaming responses on the event loop. An
+idle subscriber is one bounded queue; it costs no CPU until something
+arrives or its heartbeat timer fires.
+"""
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import Settings, get_settings
+from app.core.imports import import_class
+
+
+class Subscription(ABC):
+    @abstractmethod
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the next message; ``None`` when ``timeout`` passes first."""
+
+
+class Broker(ABC):
+    """Channel-based pub/sub; a multi-worker deployment swaps in a shared implementation."""
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Broker":
+        return cls()
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Deliver ``message`` to current subscribers of ``channel``; callable from any thread."""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncContextManager[Subscription]:
+        ...
+
+    def info(self) -> Dict[str, Any]:
+        return {}
+
+
+class _QueueSubscription(Subscription):
+    def __init__(self, maxsize: int) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize)
+
+    def deliver(self, message: Dict[str, Any]) -> None:
+        # A slow consumer loses its oldest messages rather than stalling publishers.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker: one bounded asyncio queue per subscriber."""
+
+    def __init__(self, max_queue: int = 100) -> None:
+        self.max_queue = max_queue
+        self._channels: Dict[str, Set[_QueueSubscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InMemoryBroker":
+        return cls(max_queue=settings.event_queue_size)
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, message)
+            except RuntimeError:  # the subscriber's loop has shut down
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        subscription = _QueueSubscription(self.max_queue)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "channels": len(self._channels),
+                "subscribers": sum(len(subscribers) for subscribers in self._channels.values()),
+            }
+
+
+_BROKERS = {"memory": InMemoryBroker}
+
+
+@lru_cache()
+def get_broker() -> Broker:
+    """Return the process-wide broker named by ``event_broker`` (a short name or ``module:Class``)."""
+    settings = get_settings()
+    name = settings.event_broker
+    broker = _BROKERS.get(name.lower()) or import_class(name, Broker)
+    return broker.from_settings(settings)
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
@@ -0,0 +1,15 @@
+import importlib
+from typing import Type, TypeVar
+
+T = TypeVar("T")
+
+
+def import_class(path: str, base: Type[T]) -> Type[T]:
+    """Import ``module:Class`` (or ``module.Class``) and check that it subclasses ``base``."""
+    module_name, _, attribute = path.replace(":", ".").rpartition(".")
+    if not module_name:
+        raise ValueError(f"Expected a 'module:Class' path, got {path!r}")
+    imported = getattr(importlib.import_module(module_name), attribute)
+    if not (isinstance(imported, type) and issubclass(imported, base)):
+        raise ValueError(f"{path!r} is not a {base.__name__}")
+    return imported
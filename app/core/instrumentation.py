@@ -0,0 +1,271 @@
+"""Opt-in per-request instrumentation: wall time, SQL statements, DB time and rows loaded.
+
+The middleware puts a :class:`RequestStats` in a context variable for the
+duration of each request. SQLAlchemy cursor events, registered on the
+``Engine`` class so that engines built later are covered too, add to
+whatever stats object is current. The threadpool and ``run_sync`` both run
+crud code in a copy of the request's context, so nothing has to be passed
+along explicitly. Each response reports its numbers in a ``Server-Timing``
+header, and :class:`Metrics` aggregates them for ``/metrics`` in the
+Prometheus text format.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import cache
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+# Expanded IN lists and multi-row VALUES differ only in their placeholder count.
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_LIST.sub("(?)", statement)).strip()
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "rows", "statements")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run more than ``threshold`` times, most frequent first."""
+        if self.queries <= threshold:
+            return []
+        shapes: Counter = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count > threshold]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+_STARTED = "instrumentation_started"
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    stats = _current.get()
+    started = conn.info.get(_STARTED)
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(context: Any) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time all the same.
+    conn = context.connection
+    started = conn.info.get(_STARTED) if conn is not None else None
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None and context.statement is not None:
+        stats.record(context.statement, elapsed)
+
+
+def _on_load(target: Any, context: Any) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def install() -> None:
+    """Attach the statement and row listeners to every engine, existing or not; safe to call more than once."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+    if not event.contains(Mapper, "load", _on_load):
+        event.listen(Mapper, "load", _on_load)
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Process-wide Prometheus counters, keyed by method and route template."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self._durations: Dict[Tuple[str, str], List[float]] = {}
+        self._db: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0])
+        self._n_plus_one: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe(
+        self, method: str, route: str, status: int, elapsed: float, stats: RequestStats, flagged: bool
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            self._requests[(method, route, status)] += 1
+            # Bucket counts, then sum and count.
+            histogram = self._durations.setdefault(key, [0] * len(DURATION_BUCKETS) + [0.0, 0])
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if elapsed <= bound:
+                    histogram[index] += 1
+            histogram[-2] += elapsed
+            histogram[-1] += 1
+            db = self._db[key]
+            db[0] += stats.queries
+            db[1] += stats.db_time
+            db[2] += stats.rows
+            if flagged:
+                self._n_plus_one[key] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._durations.clear()
+            self._db.clear()
+            self._n_plus_one.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            requests = dict(self._requests)
+            durations = {key: list(values) for key, values in self._durations.items()}
+            db = {key: list(values) for key, values in self._db.items()}
+            n_plus_one = dict(self._n_plus_one)
+
+        family("http_requests_total", "counter", "Requests by method, route and status.")
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_label(route)}",status="{status}"}} {count}')
+
+        family("http_request_duration_seconds", "histogram", "Time from request start to the last body chunk.")
+        for (method, route), histogram in sorted(durations.items()):
+            labels = f'method="{method}",route="{_label(route)}"'
+            for bound, count in zip(DURATION_BUCKETS, histogram):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-1]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram[-2]:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram[-1]}")
+
+        for index, (name, help_text) in enumerate(
+            (
+                ("db_statements_total", "SQL statements executed while serving requests."),
+                ("db_duration_seconds_total", "Time spent in cursor execute while serving requests."),
+                ("db_rows_loaded_total", "ORM rows loaded while serving requests."),
+            )
+        ):
+            family(name, "counter", help_text)
+            for (method, route), values in sorted(db.items()):
+                value = f"{values[index]:.6f}" if isinstance(values[index], float) else values[index]
+                lines.append(f'{name}{{method="{method}",route="{_label(route)}"}} {value}')
+
+        family("db_n_plus_one_total", "counter", "Requests that repeated one statement shape past the threshold.")
+        for (method, route), count in sorted(n_plus_one.items()):
+            lines.append(f'db_n_plus_one_total{{method="{method}",route="{_label(route)}"}} {count}')
+
+        snapshot = cache.stats.snapshot()
+        for counter in cache.CacheStats.COUNTERS:
+            family(f"cache_{counter}_total", "counter", f"Read-through cache {counter} per namespace.")
+            for namespace, counts in sorted(snapshot.items()):
+                lines.append(f'cache_{counter}_total{{namespace="{_label(namespace)}"}} {counts[counter]}')
+        for key, value in sorted(cache.get_cache().info().items()):
+            if isinstance(value, (int, float)):
+                family(f"cache_backend_{key}", "gauge", f"Cache backend {key.replace('_', ' ')}.")
+                lines.append(f"cache_backend_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    # Static files and unmatched paths share one label so the series count stays bounded.
+    return "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware, so the stats context var is visible to the endpoint and its threads."""
+
+    def __init__(self, app: ASGIApp, *, metrics: Metrics = metrics, n_plus_one_threshold: int = 10) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    def server_timing(self, stats: RequestStats, elapsed: float) -> str:
+        entries = [
+            f"app;dur={elapsed * 1000:.1f}",
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows"',
+        ]
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated:
+            entries.append(f'n-plus-one;desc="{repeated[0][1]}x one statement"')
+        return ", ".join(entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", self.server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            route = _route_name(scope)
+            repeated = stats.repeated(self.n_plus_one_threshold)
+            for shape, count in repeated:
+                logger.warning(
+                    "Possible N+1: %s %s ran one statement %d times: %s", scope["method"], route, count, shape[:300]
+                )
+            self.metrics.observe(scope["method"], route, status, elapsed, stats, bool(repeated))
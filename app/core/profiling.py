@@ -0,0 +1,135 @@
+"""On-demand profilers for a live worker, with output for flamegraphs.
+
+:class:`StackSampler` wakes on a background thread every ``interval`` and
+records the Python stack of every other thread from ``sys._current_frames``.
+Its output is collapsed stacks (``frame;frame;frame count`` per line), which
+flamegraph.pl, inferno and speedscope read directly. The overhead is
+proportional to the sampling rate, not the request rate, so it is safe under
+load.
+
+:func:`run_cprofile` profiles the event loop thread deterministically and
+returns a pstats dump. It sees every coroutine but none of the threadpool.
+It is much more expensive than sampling, so keep its windows short.
+
+Only one profile runs at a time. Nothing is installed until a profile is
+requested.
+"""
+
+import asyncio
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+# Python leaf frames of threads parked waiting for work or I/O.
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+_running = threading.Lock()
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.005, *, include_idle: bool = False) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _is_idle(self, frame: FrameType) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (not self.include_idle and self._is_idle(frame)):
+                continue
+            labels: List[str] = []
+            current: Optional[FrameType] = frame
+            while current is not None:
+                labels.append(self._label(current.f_code))
+                current = current.f_back
+            labels.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+async def run_sampler(seconds: float, *, interval: float = 0.005, include_idle: bool = False) -> StackSampler:
+    """Sample every thread for ``seconds`` without blocking the event loop."""
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        sampler = StackSampler(interval, include_idle=include_idle)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await run_in_threadpool(sampler.stop)
+        return sampler
+    finally:
+        _running.release()
+
+
+async def run_cprofile(seconds: float) -> bytes:
+    """Profile the event loop thread for ``seconds``; returns a ``pstats`` dump."""
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        return await run_in_threadpool(_dump, profiler)
+    finally:
+        _running.release()
+
+
+def _dump(profiler: cProfile.Profile) -> bytes:
+    with tempfile.NamedTemporaryFile(suffix=".pstats") as handle:
+        pstats.Stats(profiler).dump_stats(handle.name)
+        return handle.read()
+
+
+def filename(kind: str) -> str:
+    return f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.{kind}"
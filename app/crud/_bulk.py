@@ -0,0 +1,53 @@
+"""Set-based write helpers shared by the crud modules."""
+
+from typing import Any, Dict, Iterator, List, Sequence, Type
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, SQLModel, select
+
+# Stay under SQLite's historical 999 bound-parameter limit.
+CHUNK_SIZE = 900
+
+
+def chunked(values: Sequence[Any], size: int = CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def column_values(instance: SQLModel) -> Dict[str, Any]:
+    """Column values of a new instance, model defaults applied, primary key left out."""
+    table = instance.__table__  # type: ignore[attr-defined]
+    return {column.name: getattr(instance, column.name) for column in table.columns if not column.primary_key}
+
+
+def bulk_insert(session: Session, model: Type[SQLModel], rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert ``rows`` with one executemany and return their new ids in order.
+
+    Does not commit. On SQLite the ids are derived from ``last_insert_rowid()``:
+    the transaction holds the write lock, so the rowids are consecutive.
+    """
+    if not rows:
+        return []
+    table = model.__table__  # type: ignore[attr-defined]
+    dialect = session.get_bind().dialect
+    if dialect.name == "sqlite":
+        session.execute(insert(table), rows)
+        last_id = session.execute(select(func.last_insert_rowid())).scalar_one()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    if getattr(dialect, "insert_executemany_returning", False):
+        return list(session.execute(insert(table).returning(table.c.id), rows).scalars())
+    return [session.execute(insert(table).values(**row).returning(table.c.id)).scalar_one() for row in rows]
+
+
+def missing_ids(session: Session, model: Type[SQLModel], ids: Sequence[int]) -> List[int]:
+    wanted = set(ids)
+    found: set = set()
+    for chunk in chunked(list(wanted)):
+        found.update(session.exec(select(model.id).where(model.id.in_(chunk))))  # type: ignore[attr-defined]
+    return sorted(wanted - found)
+
+
+def delete_ids(session: Session, model: Type[SQLModel], ids: Sequence[int]) -> None:
+    for chunk in chunked(list(ids)):
+        statement = delete(model).where(model.id.in_(chunk))  # type: ignore[attr-defined]
+        session.execute(statement.execution_options(synchronize_session=False))
@@ -0,0 +1,130 @@
+"""Read-through caching of rows and list pages, invalidated by the crud writes.
+
+Rows are cached as dicts of column values and rebuilt into session-bound
+instances without touching the database. Each table has two tokens in the
+cache: one that prefixes row keys and one that prefixes list keys. Replacing
+a token orphans every key under it, so invalidating a whole table is O(1).
+Each cached row also has its own token, dropped when the row is written.
+Readers build their key before they query, so a result read just before a
+write lands under a token the write has already retired. Tokens only see
+this process's writes, so list keys also carry the table's shared version
+from :mod:`app.crud.versions`, the same one the ETags are built from. A
+page can then never be older than the ETag sent with it.
+"""
+
+import uuid
+from typing import Any, Callable, Dict, Hashable, Optional, Type
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlmodel import Session, SQLModel
+
+from app.core.cache import get_cache, stats
+from app.core.config import get_settings
+from app.crud import versions
+from app.crud.pagination import Page
+
+
+def _namespace(model: Type[SQLModel]) -> str:
+    return model.__tablename__  # type: ignore[attr-defined]
+
+
+def _token(name: str, ttl: Optional[float] = None) -> str:
+    cache = get_cache()
+    token = cache.get(name)
+    if token is None:
+        token = uuid.uuid4().hex
+        cache.set(name, token, ttl)
+    return token
+
+
+def _row_token_key(model: Type[SQLModel], ident: Any) -> str:
+    namespace = _namespace(model)
+    return f"{namespace}:{_token(namespace + ':rows')}:{ident}"
+
+
+def _row_key(model: Type[SQLModel], ident: Any) -> str:
+    token_key = _row_token_key(model, ident)
+    # Expires with the entries it prefixes, so tokens of rows nobody reads do not pile up.
+    return f"{token_key}:{_token(token_key, get_settings().cache_ttl_seconds)}"
+
+
+def _snapshot(instance: SQLModel) -> Dict[str, Any]:
+    """Loaded column values; deferred columns that were never read stay out."""
+    table = instance.__table__  # type: ignore[attr-defined]
+    unloaded = inspect(instance).unloaded
+    return {column.name: getattr(instance, column.name) for column in table.columns if column.name not in unloaded}
+
+
+def _detached(model: Type[SQLModel], data: Dict[str, Any]) -> SQLModel:
+    instance = model(**data)
+    # Columns the snapshot left out load on access, rather than reading as their defaults.
+    for column in model.__table__.columns:  # type: ignore[attr-defined]
+        if column.name not in data:
+            instance.__dict__.pop(column.name, None)
+    make_transient_to_detached(instance)
+    return instance
+
+
+def get(session: Session, model: Type[SQLModel], ident: int) -> Optional[SQLModel]:
+    """Cached ``session.get``; a hit is merged into ``session`` without a query."""
+    existing = session.identity_map.get(identity_key(model, ident))
+    if existing is not None:
+        return existing
+
+    namespace = _namespace(model)
+    key = _row_key(model, ident)
+    data = get_cache().get(key)
+    if data is not None:
+        stats.incr(namespace, "hits")
+        return session.merge(_detached(model, data), load=False)
+
+    stats.incr(namespace, "misses")
+    instance = session.get(model, ident)
+    if instance is not None:
+        get_cache().set(key, _snapshot(instance), get_settings().cache_ttl_seconds)
+    return instance
+
+
+def page(
+    session: Session, model: Type[SQLModel], params: Hashable, load: Callable[[], Page], *, rows: bool = False
+) -> Page:
+    """Cached list page keyed by ``params``; hits return detached, read-only instances.
+
+    With ``rows`` the page holds plain dicts, which are cached and returned as they are.
+    """
+    namespace = _namespace(model)
+    # Collection versions are named after their tables.
+    version, _ = versions.get_versions(session, [namespace])[namespace]
+    key = f"{namespace}:list:{_token(namespace + ':lists')}:{version}:{(rows, params)!r}"
+    data = get_cache().get(key)
+    if data is not None:
+        stats.incr(namespace, "hits")
+        items, next_cursor = data
+        if rows:
+            return Page(items=list(items), next_cursor=next_cursor)
+        return Page(items=[_detached(model, item) for item in items], next_cursor=next_cursor)
+
+    stats.incr(namespace, "misses")
+    result = load()
+    entry = (list(result.items) if rows else [_snapshot(item) for item in result.items], result.next_cursor)
+    get_cache().set(key, entry, get_settings().cache_ttl_seconds)
+    return result
+
+
+def invalidate(model: Type[SQLModel], *idents: Any) -> None:
+    """Drop cached rows ``idents`` and every cached list page of ``model``; call after commit."""
+    namespace = _namespace(model)
+    cache = get_cache()
+    if idents:
+        cache.delete(*(_row_token_key(model, ident) for ident in idents))
+    cache.set(namespace + ":lists", uuid.uuid4().hex)
+    stats.incr(namespace, "invalidations")
+
+
+def invalidate_all(model: Type[SQLModel]) -> None:
+    """Drop every cached row and list page of ``model``."""
+    namespace = _namespace(model)
+    get_cache().set(namespace + ":rows", uuid.uuid4().hex)
+    invalidate(model)
@@ -0,0 +1,22 @@
+"""Column-tuple reads for list endpoints that skip ORM instances.
+
+Selecting just the columns of a read schema avoids building entities and
+filling the identity map. The rows come back as plain dicts, ready to
+encode.
+"""
+
+from typing import Any, Dict, List, Type
+
+from sqlmodel import SQLModel
+
+from app.crud.pagination import Page
+
+
+def read_columns(model: Type[SQLModel], schema: Type[SQLModel]) -> List[Any]:
+    """Columns of ``model`` for each field of ``schema``, in field order."""
+    fields = schema.model_fields if hasattr(schema, "model_fields") else schema.__fields__
+    return [getattr(model, name) for name in fields]
+
+
+def as_dicts(page: Page) -> Page[Dict[str, Any]]:
+    return Page(items=[dict(row._mapping) for row in page.items], next_cursor=page.next_cursor)
@@ -1,8 +1,14 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
+from sqlalchemy import update as sql_update
+from sqlalchemy.orm import noload, selectinload
 from sqlmodel import Session, select
 
+from app.core.events import get_broker, user_channel
+from app.crud import _cache, versions
+from app.crud.pagination import Page, paginate
 from app.models.match_request import MatchRequest
+from app.models.timeslot import TimeSlot
 from app.schemas.match_requests import MatchRequestCreate, MatchRequestUpdate
 
 
@@ -18,21 +24,83 @@ def get(session: Session, match_id: int) -> Optional[MatchRequest]:
     return session.get(MatchRequest, match_id)
 
 
-def get_received(session: Session, user_id: int) -> List[MatchRequest]:
-    statement = select(MatchRequest).where(MatchRequest.target_id == user_id)
-    return list(session.exec(statement))
+# Relationships that list endpoints can embed via ``expand``.
+EXPANDABLE = {
+    "requester": MatchRequest.requester,
+    "target": MatchRequest.target,
+    "venue": MatchRequest.venue,
+    "time_slot": MatchRequest.time_slot,
+}
 
 
-def get_sent(session: Session, user_id: int) -> List[MatchRequest]:
-    statement = select(MatchRequest).where(MatchRequest.requester_id == user_id)
-    return list(session.exec(statement))
+def _with_relations(statement, expand: Sequence[str]):
+    """Load expanded relations in one extra query each and leave the rest unloaded."""
+    options = [
+        selectinload(attribute) if name in expand else noload(attribute)
+        for name, attribute in EXPANDABLE.items()
+    ]
+    return statement.options(*options)
+
+
+def get_received(
+    session: Session,
+    user_id: int,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    expand: Sequence[str] = (),
+) -> Page[MatchRequest]:
+    statement = _with_relations(select(MatchRequest).where(MatchRequest.target_id == user_id), expand)
+    return paginate(session, statement, [MatchRequest.id], cursor=cursor, limit=limit)
+
+
+def get_sent(
+    session: Session,
+    user_id: int,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    expand: Sequence[str] = (),
+) -> Page[MatchRequest]:
+    statement = _with_relations(select(MatchRequest).where(MatchRequest.requester_id == user_id), expand)
+    return paginate(session, statement, [MatchRequest.id], cursor=cursor, limit=limit)
+
+
+# Statuses the web client sends; ``confirmed`` is the older API word for ``accepted``.
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+ACCEPT_STATUSES = (ACCEPTED, "confirmed")
+
+
+class BookingConflict(RuntimeError):
+    pass
+
+
+def _publish(event: str, match_id: int, requester_id: int, target_id: int, status: str) -> None:
+    message = {
+        "event": event,
+        "id": match_id,
+        "requester_id": requester_id,
+        "target_id": target_id,
+        "status": status,
+    }
+    broker = get_broker()
+    for user_id in {requester_id, target_id}:
+        broker.publish(user_channel(user_id), message)
+
+
+def _notify(match: MatchRequest, event: str) -> None:
+    """Push ``event`` to both participants; call after commit so subscribers never see a rolled-back change."""
+    _publish(event, match.id, match.requester_id, match.target_id, match.status)
 
 
 def create(session: Session, match_in: MatchRequestCreate) -> MatchRequest:
     match = MatchRequest(**_model_dump(match_in))
     session.add(match)
+    versions.bump(session, versions.MATCH_REQUESTS)
     session.commit()
     session.refresh(match)
+    _notify(match, "created")
     return match
 
 
@@ -41,11 +109,78 @@ def update(session: Session, db_match: MatchRequest, match_in: MatchRequestUpdat
     for field, value in update_data.items():
         setattr(db_match, field, value)
     session.add(db_match)
+    versions.bump(session, versions.MATCH_REQUESTS)
     session.commit()
     session.refresh(db_match)
+    _notify(db_match, "updated")
+    return db_match
+
+
+def confirm(session: Session, db_match: MatchRequest) -> MatchRequest:
+    """Accept ``db_match``, book its time slot and reject the other pending requests for it, in one commit.
+
+    Each step is a conditional ``UPDATE``, so concurrent confirms only
+    contend on the slot row. The first to book it wins; for the others the
+    ``status = 'available'`` guard matches no row and they raise
+    :class:`BookingConflict` without waiting on a lock held for a read.
+    Writing first also makes SQLite take its write lock at the start of the
+    transaction, rather than failing to upgrade from a stale read snapshot.
+    """
+    slot_id = db_match.time_slot_id
+    rejected: List[Tuple[int, int, int]] = []
+    try:
+        if slot_id is not None:
+            booked = session.execute(
+                sql_update(TimeSlot)
+                .where(TimeSlot.id == slot_id, TimeSlot.status == "available")
+                .values(status="booked")
+            )
+            if booked.rowcount != 1:
+                raise BookingConflict("Time slot is no longer available")
+        accepted = session.execute(
+            sql_update(MatchRequest)
+            .where(
+                MatchRequest.id == db_match.id,
+                MatchRequest.status == "pending",
+                MatchRequest.time_slot_id == slot_id,
+            )
+            .values(status=ACCEPTED)
+        )
+        if accepted.rowcount != 1:
+            raise BookingConflict("Match request is no longer pending")
+        if slot_id is not None:
+            rejected = [
+                tuple(row)
+                for row in session.execute(
+                    select(MatchRequest.id, MatchRequest.requester_id, MatchRequest.target_id).where(
+                        MatchRequest.time_slot_id == slot_id, MatchRequest.status == "pending"
+                    )
+                )
+            ]
+            if rejected:
+                session.execute(
+                    sql_update(MatchRequest)
+                    .where(MatchRequest.id.in_([match_id for match_id, _, _ in rejected]))
+                    .values(status=REJECTED)
+                )
+            versions.bump(session, versions.MATCH_REQUESTS, versions.TIME_SLOTS)
+        else:
+            versions.bump(session, versions.MATCH_REQUESTS)
+        session.commit()
+    except BookingConflict:
+        session.rollback()
+        raise
+    if slot_id is not None:
+        _cache.invalidate(TimeSlot, slot_id)
+    session.refresh(db_match)
+    _notify(db_match, "updated")
+    for match_id, requester_id, target_id in rejected:
+        _publish("updated", match_id, requester_id, target_id, REJECTED)
     return db_match
 
 
 def delete(session: Session, db_match: MatchRequest) -> None:
     session.delete(db_match)
+    versions.bump(session, versions.MATCH_REQUESTS)
     session.commit()
+    _notify(db_match, "deleted")
@@ -0,0 +1,70 @@
+"""Radius queries over the latitude/longitude columns.
+
+On SQLite the R*Tree index from :mod:`app.db.rtree` yields the ids whose
+point falls in the circle's bounding box. Other databases get the same box
+as a plain range filter. Within the box, rows are filtered and ordered by
+the equirectangular distance approximation. Over the radii this API
+allows, it ranks like the great-circle distance, and it is cheap enough to
+compute in SQL. Exact haversine distances are computed only for the rows
+returned.
+"""
+
+import math
+from typing import Any, List, Optional, Tuple, Type
+
+from sqlalchemy import and_
+from sqlmodel import Session, select
+
+from app.crud.pagination import Page, decode_offset, offset_page
+from app.db.rtree import RtreeIndex
+from app.services import geo
+
+
+def nearby(
+    session: Session,
+    model: Type[Any],
+    index: RtreeIndex,
+    center: geo.Coordinates,
+    radius_km: float,
+    *,
+    where: Optional[Any] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page[Tuple[Any, float]]:
+    """``(row, distance_km)`` for rows of ``model`` within ``radius_km`` of ``center``, nearest first.
+
+    The cursor is an offset, as distance from a point has no seekable key.
+    """
+    offset = decode_offset(cursor)
+    south, north, west, east = geo.bounding_box(center, radius_km)
+    latitude, longitude = center
+    scale = math.cos(math.radians(latitude))
+    squared_degrees = (model.latitude - latitude) * (model.latitude - latitude) + (
+        (model.longitude - longitude) * scale
+    ) * ((model.longitude - longitude) * scale)
+
+    statement = select(model)
+    if session.get_bind().dialect.name == "sqlite":
+        rtree = index.table()
+        statement = statement.join(rtree, rtree.c.id == model.id).where(
+            rtree.c.max_lat >= south,
+            rtree.c.min_lat <= north,
+            rtree.c.max_lon >= west,
+            rtree.c.min_lon <= east,
+        )
+    else:
+        statement = statement.where(
+            and_(model.latitude.between(south, north), model.longitude.between(west, east))
+        )
+    if where is not None:
+        statement = statement.where(where)
+    statement = (
+        statement.where(squared_degrees <= (radius_km / geo.KM_PER_DEGREE) ** 2)
+        .order_by(squared_degrees, model.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    rows: List[Tuple[Any, float]] = [
+        (row, round(geo.haversine_km(center, (row.latitude, row.longitude)), 3)) for row in session.exec(statement)
+    ]
+    return offset_page(rows, offset=offset, limit=limit)
@@ -0,0 +1,101 @@
+"""Keyset pagination with opaque cursors.
+
+A cursor encodes the sort key of the last row on a page, so the next page is
+a range scan from that key instead of an ``OFFSET`` that re-reads every
+skipped row.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import tuple_
+from sqlmodel import Session
+
+T = TypeVar("T")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and set(value) == {"dt"}:
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        return value
+    raise InvalidCursor("Invalid cursor")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+    """Decode a cursor produced by :func:`encode_cursor`; raises ``InvalidCursor`` if malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if not isinstance(payload, list) or not payload:
+        raise InvalidCursor("Invalid cursor")
+    return tuple(_decode_value(value) for value in payload)
+
+
+def paginate(
+    session: Session,
+    statement: Any,
+    columns: Sequence[Any],
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page:
+    """Run ``statement`` ordered by ``columns`` and return the page that follows ``cursor``."""
+    if cursor:
+        after = decode_cursor(cursor)
+        if len(after) != len(columns):
+            raise InvalidCursor("Cursor does not match this listing")
+        if len(columns) == 1:
+            statement = statement.where(columns[0] > after[0])
+        else:
+            statement = statement.where(tuple_(*columns) > tuple_(*after))
+    statement = statement.order_by(*columns).limit(limit + 1)
+    rows = list(session.exec(statement))
+    if len(rows) <= limit:
+        return Page(items=rows)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(items=rows, next_cursor=encode_cursor([getattr(last, column.key) for column in columns]))
+
+
+def decode_offset(cursor: Optional[str]) -> int:
+    """Offset carried by a cursor from :func:`offset_page`; ``0`` for the first page."""
+    if not cursor:
+        return 0
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+        raise InvalidCursor("Cursor does not match this listing")
+    return values[0]
+
+
+def offset_page(rows: List[T], *, offset: int, limit: int) -> Page[T]:
+    """Page for ranked listings that have no seekable sort key; ``rows`` holds up to ``limit + 1`` rows."""
+    if len(rows) <= limit:
+        return Page(items=rows)
+    return Page(items=rows[:limit], next_cursor=encode_cursor([offset + limit]))
@@ -0,0 +1,103 @@
+"""Dictionary of normalized preference values.
+
+Free-text preferences are case- and whitespace-folded and interned to one
+``preference_values`` row per ``(preference_type, value)``. Each
+``user_preferences`` row points at its entry through ``value_id``, and the
+``(value_id, user_id)`` index on it is the posting list from a value to
+the users that hold it.
+"""
+
+from typing import Dict, Iterable, Set, Tuple
+
+from sqlalchemy import bindparam, tuple_, update
+from sqlmodel import Session, select
+
+from app.crud._bulk import chunked
+from app.models.preference_value import PreferenceValue
+from app.models.user_preference import UserPreference
+
+Key = Tuple[str, str]
+
+BACKFILL_BATCH = 5000
+
+
+def normalize(preference_type: str, preference_value: str) -> Key:
+    return preference_type.strip().lower(), " ".join(preference_value.lower().split())
+
+
+def _insert_ignoring_duplicates(session: Session, rows: list) -> None:
+    table = PreferenceValue.__table__  # type: ignore[attr-defined]
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        session.execute(table.insert(), rows)
+        return
+    # A concurrent writer may intern the same value first.
+    session.execute(insert(table).on_conflict_do_nothing(index_elements=["preference_type", "value"]), rows)
+
+
+def _lookup(session: Session, keys: Set[Key]) -> Dict[Key, int]:
+    found: Dict[Key, int] = {}
+    columns = tuple_(PreferenceValue.preference_type, PreferenceValue.value)
+    # Two bound parameters per key.
+    for chunk in chunked(sorted(keys), 450):
+        statement = select(PreferenceValue.id, PreferenceValue.preference_type, PreferenceValue.value).where(
+            columns.in_(chunk)
+        )
+        for value_id, preference_type, value in session.exec(statement):
+            found[(preference_type, value)] = value_id
+    return found
+
+
+def intern(session: Session, pairs: Iterable[Tuple[str, str]]) -> Dict[Key, int]:
+    """Ids for the normalized form of every ``(preference_type, preference_value)``, adding new ones.
+
+    Does not commit. The result is keyed by the normalized pair.
+    """
+    keys = {normalize(preference_type, value) for preference_type, value in pairs}
+    if not keys:
+        return {}
+    ids = _lookup(session, keys)
+    missing = keys - set(ids)
+    if missing:
+        _insert_ignoring_duplicates(
+            session, [{"preference_type": preference_type, "value": value} for preference_type, value in missing]
+        )
+        ids.update(_lookup(session, missing))
+    return ids
+
+
+def value_id(session: Session, preference_type: str, preference_value: str) -> int:
+    return intern(session, [(preference_type, preference_value)])[normalize(preference_type, preference_value)]
+
+
+def backfill(session: Session, *, batch_size: int = BACKFILL_BATCH) -> int:
+    """Set ``value_id`` on preferences written without one (older rows, raw imports); returns the count."""
+    table = UserPreference.__table__  # type: ignore[attr-defined]
+    assign = (
+        update(table)
+        .where(table.c.id == bindparam("preference_id"))
+        .values(value_id=bindparam("new_value_id"))
+    )
+    updated = 0
+    while True:
+        rows = session.execute(
+            select(table.c.id, table.c.preference_type, table.c.preference_value)
+            .where(table.c.value_id.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        ids = intern(session, [(preference_type, value) for _, preference_type, value in rows])
+        session.execute(
+            assign,
+            [
+                {"preference_id": preference_id, "new_value_id": ids[normalize(preference_type, value)]}
+                for preference_id, preference_type, value in rows
+            ],
+        )
+        session.commit()
+        updated += len(rows)
@@ -1,9 +1,14 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
 
+from app.crud import _bulk, preference_values, versions
+from app.crud.pagination import Page, decode_offset, offset_page, paginate
+from app.models.user import User
 from app.models.user_preference import UserPreference
-from app.schemas.preferences import PreferenceCreate, PreferenceUpdate
+from app.schemas.preferences import PreferenceBatchUpdate, PreferenceCreate, PreferenceUpdate
 
 
 def _model_dump(model) -> dict:
@@ -18,14 +23,67 @@ def get(session: Session, preference_id: int) -> Optional[UserPreference]:
     return session.get(UserPreference, preference_id)
 
 
-def get_by_user(session: Session, user_id: int) -> List[UserPreference]:
+def get_by_user(
+    session: Session, user_id: int, *, cursor: Optional[str] = None, limit: int = 100
+) -> Page[UserPreference]:
     statement = select(UserPreference).where(UserPreference.user_id == user_id)
-    return list(session.exec(statement))
+    return paginate(session, statement, [UserPreference.id], cursor=cursor, limit=limit)
+
+
+def get_shared(
+    session: Session, user_id: int, *, min_shared: int = 1, cursor: Optional[str] = None, limit: int = 100
+) -> Page[Tuple[User, int, int]]:
+    """``(user, shared, score)`` for users holding at least ``min_shared`` of ``user_id``'s preference values.
+
+    ``score`` sums both sides' confidence over the shared values, and
+    results are ordered by it, best first. Each side counts a value once,
+    at its highest confidence, however many rows normalize to it. The join
+    walks the ``(value_id, user_id)`` posting list of each of the user's
+    values.
+    """
+    mine = (
+        select(UserPreference.value_id, func.max(UserPreference.confidence).label("confidence"))
+        .where(UserPreference.user_id == user_id, UserPreference.value_id.is_not(None))
+        .group_by(UserPreference.value_id)
+        .subquery()
+    )
+    theirs = aliased(UserPreference)
+    pairs = (
+        select(
+            theirs.user_id.label("user_id"),
+            (mine.c.confidence + func.max(theirs.confidence)).label("confidence"),
+        )
+        .select_from(mine)
+        .join(theirs, theirs.value_id == mine.c.value_id)
+        .where(theirs.user_id != user_id)
+        .group_by(theirs.user_id, theirs.value_id, mine.c.confidence)
+        .subquery()
+    )
+    shared = func.count()
+    ranked = (
+        select(pairs.c.user_id, shared.label("shared"), func.sum(pairs.c.confidence).label("score"))
+        .group_by(pairs.c.user_id)
+        .having(shared >= min_shared)
+        .subquery()
+    )
+    offset = decode_offset(cursor)
+    statement = (
+        select(User, ranked.c.shared, ranked.c.score)
+        .join(ranked, ranked.c.user_id == User.id)
+        .order_by(ranked.c.score.desc(), ranked.c.shared.desc(), User.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    return offset_page([tuple(row) for row in session.exec(statement)], offset=offset, limit=limit)
 
 
 def create(session: Session, preference_in: PreferenceCreate) -> UserPreference:
     preference = UserPreference(**_model_dump(preference_in))
+    preference.value_id = preference_values.value_id(
+        session, preference.preference_type, preference.preference_value
+    )
     session.add(preference)
+    versions.bump(session, versions.PREFERENCES)
     session.commit()
     session.refresh(preference)
     return preference
@@ -35,7 +93,12 @@ def update(session: Session, db_preference: UserPreference, preference_in: Prefe
     update_data = _model_dump(preference_in)
     for field, value in update_data.items():
         setattr(db_preference, field, value)
+    if "preference_type" in update_data or "preference_value" in update_data:
+        db_preference.value_id = preference_values.value_id(
+            session, db_preference.preference_type, db_preference.preference_value
+        )
     session.add(db_preference)
+    versions.bump(session, versions.PREFERENCES)
     session.commit()
     session.refresh(db_preference)
     return db_preference
@@ -43,4 +106,64 @@ def update(session: Session, db_preference: UserPreference, preference_in: Prefe
 
 def delete(session: Session, db_preference: UserPreference) -> None:
     session.delete(db_preference)
+    versions.bump(session, versions.PREFERENCES)
+    session.commit()
+
+
+def missing_ids(session: Session, preference_ids: Sequence[int]) -> List[int]:
+    return _bulk.missing_ids(session, UserPreference, preference_ids)
+
+
+def create_many(session: Session, preferences_in: Sequence[PreferenceCreate]) -> List[int]:
+    rows = [_bulk.column_values(UserPreference(**_model_dump(item))) for item in preferences_in]
+    value_ids = preference_values.intern(
+        session, [(row["preference_type"], row["preference_value"]) for row in rows]
+    )
+    for row in rows:
+        row["value_id"] = value_ids[preference_values.normalize(row["preference_type"], row["preference_value"])]
+    ids = _bulk.bulk_insert(session, UserPreference, rows)
+    versions.bump(session, versions.PREFERENCES)
+    session.commit()
+    return ids
+
+
+def _assign_value_ids(session: Session, mappings: List[dict]) -> None:
+    """Set ``value_id`` on update mappings that change the type or value, filling the other from the row."""
+    changed = [mapping for mapping in mappings if "preference_type" in mapping or "preference_value" in mapping]
+    if not changed:
+        return
+    current = {}
+    for chunk in _bulk.chunked([mapping["id"] for mapping in changed]):
+        statement = select(
+            UserPreference.id, UserPreference.preference_type, UserPreference.preference_value
+        ).where(UserPreference.id.in_(chunk))
+        current.update({row[0]: row[1:] for row in session.exec(statement)})
+    pairs = {}
+    for mapping in changed:
+        preference_type, preference_value = current.get(mapping["id"], (None, None))
+        pairs[mapping["id"]] = (
+            mapping.get("preference_type", preference_type),
+            mapping.get("preference_value", preference_value),
+        )
+    # Rows that no longer exist are left for bulk_update_mappings to skip.
+    pairs = {key: pair for key, pair in pairs.items() if None not in pair}
+    value_ids = preference_values.intern(session, pairs.values())
+    for mapping in changed:
+        if mapping["id"] in pairs:
+            mapping["value_id"] = value_ids[preference_values.normalize(*pairs[mapping["id"]])]
+
+
+def update_many(session: Session, preferences_in: Sequence[PreferenceBatchUpdate]) -> List[int]:
+    mappings = [_model_dump(item) for item in preferences_in]
+    _assign_value_ids(session, mappings)
+    # rows that only carry an id have nothing to update
+    session.bulk_update_mappings(UserPreference, [mapping for mapping in mappings if len(mapping) > 1])
+    versions.bump(session, versions.PREFERENCES)
+    session.commit()
+    return [mapping["id"] for mapping in mappings]
+
+
+def delete_many(session: Session, preference_ids: Sequence[int]) -> None:
+    _bulk.delete_ids(session, UserPreference, preference_ids)
+    versions.bump(session, versions.PREFERENCES)
     session.commit()
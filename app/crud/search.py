@@ -0,0 +1,65 @@
+"""Ranked full-text search over the FTS5 indexes in :mod:`app.db.fts`."""
+
+import re
+from typing import Any, Optional, Type
+
+from sqlalchemy import column, table, text
+from sqlmodel import Session, select
+
+from app.crud.pagination import Page, decode_offset, offset_page
+from app.db.fts import FtsIndex
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+# Dropped unless the query has nothing else, so "engineer in Seattle" is not forced to match "in*".
+STOPWORDS = frozenset({"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with"})
+
+
+class SearchUnavailable(RuntimeError):
+    pass
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match as a prefix.
+
+    Words are quoted, so FTS5 operators and column filters in user input are
+    matched as plain text.
+    """
+    terms = [term.lower() for term in _TERM.findall(query)]
+    terms = [term for term in terms if term not in STOPWORDS] or terms
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in dict.fromkeys(terms))
+
+
+def search(
+    session: Session,
+    model: Type[Any],
+    index: FtsIndex,
+    query: str,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page:
+    """Rows of ``model`` matching ``query``, best BM25 score first.
+
+    Relevance order has no stable key to seek from, so the cursor is an
+    offset. Deep pages of a search are rare, and each page still reads only
+    the matching rowids from the index.
+    """
+    if session.get_bind().dialect.name != "sqlite":
+        raise SearchUnavailable("Full-text search requires SQLite FTS5")
+    expression = match_expression(query)
+    if expression is None:
+        return Page()
+    offset = decode_offset(cursor)
+
+    fts = table(index.name, column("rowid"))
+    statement = (
+        select(model)
+        .join(fts, fts.c.rowid == model.id)
+        .where(text(f"{index.name} MATCH :expression").bindparams(expression=expression))
+        .order_by(text(index.rank), model.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    return offset_page(list(session.exec(statement)), offset=offset, limit=limit)
@@ -1,9 +1,14 @@
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from sqlmodel import Session, select
 
+from app.crud import _bulk, _cache, _rows, versions
+from app.crud.pagination import Page, paginate
 from app.models.timeslot import TimeSlot
-from app.schemas.timeslots import TimeSlotCreate, TimeSlotUpdate
+from app.schemas.timeslots import TimeSlotBatchUpdate, TimeSlotCreate, TimeSlotRead, TimeSlotUpdate
+
+READ_COLUMNS = _rows.read_columns(TimeSlot, TimeSlotRead)
 
 
 def _model_dump(model) -> dict:
@@ -15,23 +20,104 @@ def _model_dump(model) -> dict:
 
 
 def get(session: Session, slot_id: int) -> Optional[TimeSlot]:
-    return session.get(TimeSlot, slot_id)
-
-
-def get_by_user(session: Session, user_id: int) -> List[TimeSlot]:
-    statement = select(TimeSlot).where(TimeSlot.user_id == user_id)
-    return list(session.exec(statement))
-
+    return _cache.get(session, TimeSlot, slot_id)
+
+
+def _page(session: Session, where: Any, cursor: Optional[str], limit: int, rows: bool) -> Page:
+    statement = (select(*READ_COLUMNS) if rows else select(TimeSlot)).where(where)
+    result = paginate(session, statement, [TimeSlot.start_time, TimeSlot.id], cursor=cursor, limit=limit)
+    return _rows.as_dicts(result) if rows else result
+
+
+def get_by_user(
+    session: Session, user_id: int, *, cursor: Optional[str] = None, limit: int = 100, rows: bool = False
+) -> Page:
+    """A user's slots by start time; with ``rows`` as ``TimeSlotRead`` column dicts."""
+    return _page(session, TimeSlot.user_id == user_id, cursor, limit, rows)
+
+
+def get_available(session: Session, *, cursor: Optional[str] = None, limit: int = 100, rows: bool = False) -> Page:
+    return _page(session, TimeSlot.status == "available", cursor, limit, rows)
+
+
+def naive_utc(value: datetime) -> datetime:
+    """``value`` as the naive UTC datetime slot times are stored as; aware values are converted."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _merge(intervals: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    merged: List[Tuple[datetime, datetime]] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _intersect(
+    left: List[Tuple[datetime, datetime]], right: List[Tuple[datetime, datetime]]
+) -> List[Tuple[datetime, datetime]]:
+    overlaps: List[Tuple[datetime, datetime]] = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        end = min(left[i][1], right[j][1])
+        if start < end:
+            overlaps.append((start, end))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return overlaps
+
+
+def get_mutual_availability(
+    session: Session,
+    user_ids: Sequence[int],
+    start: datetime,
+    end: datetime,
+    min_duration: timedelta = timedelta(0),
+) -> List[Tuple[datetime, datetime]]:
+    """Return the windows inside ``[start, end)`` where every user is available.
+
+    Only the involved users' slots are read, through the
+    ``(user_id, status, start_time)`` index, already ordered by start time;
+    each user's slots are merged and the lists are intersected pairwise.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    statement = (
+        select(TimeSlot.user_id, TimeSlot.start_time, TimeSlot.end_time)
+        .where(
+            TimeSlot.user_id.in_(user_ids),
+            TimeSlot.status == "available",
+            TimeSlot.start_time < end,
+            TimeSlot.end_time > start,
+        )
+        .order_by(TimeSlot.start_time)
+    )
+    per_user: Dict[int, List[Tuple[datetime, datetime]]] = {user_id: [] for user_id in user_ids}
+    for user_id, slot_start, slot_end in session.exec(statement):
+        per_user[user_id].append((max(slot_start, start), min(slot_end, end)))
 
-def get_available(session: Session) -> List[TimeSlot]:
-    statement = select(TimeSlot).where(TimeSlot.status == "available")
-    return list(session.exec(statement))
+    windows: Optional[List[Tuple[datetime, datetime]]] = None
+    for intervals in per_user.values():
+        merged = _merge(intervals)
+        windows = merged if windows is None else _intersect(windows, merged)
+        if not windows:
+            return []
+    return [(lo, hi) for lo, hi in windows or [] if hi - lo >= min_duration]
 
 
 def create(session: Session, slot_in: TimeSlotCreate) -> TimeSlot:
     slot = TimeSlot(**_model_dump(slot_in))
     session.add(slot)
+    versions.bump(session, versions.TIME_SLOTS)
     session.commit()
+    _cache.invalidate(TimeSlot)
     session.refresh(slot)
     return slot
 
@@ -41,11 +127,47 @@ def update(session: Session, db_slot: TimeSlot, slot_in: TimeSlotUpdate) -> Time
     for field, value in update_data.items():
         setattr(db_slot, field, value)
     session.add(db_slot)
+    versions.bump(session, versions.TIME_SLOTS)
     session.commit()
     session.refresh(db_slot)
+    _cache.invalidate(TimeSlot, db_slot.id)
     return db_slot
 
 
 def delete(session: Session, db_slot: TimeSlot) -> None:
+    slot_id = db_slot.id
     session.delete(db_slot)
+    versions.bump(session, versions.TIME_SLOTS)
+    session.commit()
+    _cache.invalidate(TimeSlot, slot_id)
+
+
+def missing_ids(session: Session, slot_ids: Sequence[int]) -> List[int]:
+    return _bulk.missing_ids(session, TimeSlot, slot_ids)
+
+
+def create_many(session: Session, slots_in: Sequence[TimeSlotCreate]) -> List[int]:
+    rows = [_bulk.column_values(TimeSlot(**_model_dump(item))) for item in slots_in]
+    ids = _bulk.bulk_insert(session, TimeSlot, rows)
+    versions.bump(session, versions.TIME_SLOTS)
+    session.commit()
+    _cache.invalidate(TimeSlot)
+    return ids
+
+
+def update_many(session: Session, slots_in: Sequence[TimeSlotBatchUpdate]) -> List[int]:
+    mappings = [_model_dump(item) for item in slots_in]
+    # rows that only carry an id have nothing to update
+    session.bulk_update_mappings(TimeSlot, [mapping for mapping in mappings if len(mapping) > 1])
+    versions.bump(session, versions.TIME_SLOTS)
+    session.commit()
+    ids = [mapping["id"] for mapping in mappings]
+    _cache.invalidate(TimeSlot, *ids)
+    return ids
+
+
+def delete_many(session: Session, slot_ids: Sequence[int]) -> None:
+    _bulk.delete_ids(session, TimeSlot, slot_ids)
+    versions.bump(session, versions.TIME_SLOTS)
     session.commit()
+    _cache.invalidate(TimeSlot, *slot_ids)
@@ -1,10 +1,21 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
 from pydantic import EmailStr
+from sqlalchemy import exists, literal, or_, union_all
 from sqlmodel import Session, select
 
+from app.crud import _bulk, _cache, _rows, nearby as _nearby, search as _search, versions
+from app.crud.pagination import Page, paginate
+from app.db import fts, rtree
+from app.models.match_request import MatchRequest
+from app.models.timeslot import TimeSlot
 from app.models.user import User
-from app.schemas.users import UserCreate, UserUpdate
+from app.models.user_preference import UserPreference
+from app.models.venue import Venue
+from app.schemas.users import UserCreate, UserRead, UserUpdate
+from app.services import embeddings, geo
+
+READ_COLUMNS = _rows.read_columns(User, UserRead)
 
 
 def _model_dump(model) -> dict:
@@ -16,7 +27,12 @@ def _model_dump(model) -> dict:
 
 
 def get(session: Session, user_id: int) -> Optional[User]:
-    return session.get(User, user_id)
+    return _cache.get(session, User, user_id)
+
+
+def get_embedding(session: Session, user_id: int) -> Optional[bytes]:
+    """The stored vector alone; ``User.embedding`` is deferred and cached rows leave it out."""
+    return session.exec(select(User.embedding).where(User.id == user_id)).first()
 
 
 def get_by_email(session: Session, email: EmailStr) -> Optional[User]:
@@ -24,29 +40,99 @@ def get_by_email(session: Session, email: EmailStr) -> Optional[User]:
     return session.exec(statement).first()
 
 
-def get_multi(session: Session, *, skip: int = 0, limit: int = 100) -> List[User]:
-    statement = select(User).offset(skip).limit(limit)
+def get_many(session: Session, user_ids: Sequence[int]) -> List[User]:
+    if not user_ids:
+        return []
+    statement = select(User).where(User.id.in_(user_ids))
     return list(session.exec(statement))
 
 
+def missing_ids(session: Session, user_ids: Sequence[int]) -> List[int]:
+    return _bulk.missing_ids(session, User, user_ids)
+
+
+def get_multi(session: Session, *, cursor: Optional[str] = None, limit: int = 100, rows: bool = False) -> Page:
+    """A page of users, or with ``rows`` a page of ``UserRead`` column dicts."""
+    statement = select(*READ_COLUMNS) if rows else select(User)
+
+    def load() -> Page:
+        result = paginate(session, statement, [User.id], cursor=cursor, limit=limit)
+        return _rows.as_dicts(result) if rows else result
+
+    return _cache.page(session, User, (cursor, limit), load, rows=rows)
+
+
+def search(session: Session, query: str, *, cursor: Optional[str] = None, limit: int = 100) -> Page[User]:
+    return _search.search(session, User, fts.USERS, query, cursor=cursor, limit=limit)
+
+
+def nearby(
+    session: Session,
+    center: geo.Coordinates,
+    radius_km: float,
+    *,
+    exclude_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page[Tuple[User, float]]:
+    where: Any = User.id != exclude_id if exclude_id is not None else None
+    return _nearby.nearby(session, User, rtree.USERS, center, radius_km, where=where, cursor=cursor, limit=limit)
+
+
 def create(session: Session, user_in: UserCreate) -> User:
-    user = User(**_model_dump(user_in))
+    values = _model_dump(user_in)
+    geo.fill_coordinates(values)
+    embeddings.fill_embedding(values)
+    user = User(**values)
     session.add(user)
+    versions.bump(session, versions.USERS)
     session.commit()
+    _cache.invalidate(User)
     session.refresh(user)
+    if values.get("embedding") is not None:
+        embeddings.changed(user.id, values["embedding"])
     return user
 
 
 def update(session: Session, db_user: User, user_in: UserUpdate) -> User:
     update_data = _model_dump(user_in)
+    geo.fill_coordinates(update_data)
+    embeddings.fill_embedding(update_data)
     for field, value in update_data.items():
         setattr(db_user, field, value)
     session.add(db_user)
+    versions.bump(session, versions.USERS)
     session.commit()
     session.refresh(db_user)
+    _cache.invalidate(User, db_user.id)
+    if "embedding" in update_data:
+        embeddings.changed(db_user.id, update_data["embedding"])
     return db_user
 
 
+def _referencing(session: Session, user_id: int) -> List[str]:
+    """Collections with rows pointing at ``user_id``; deleting the user nulls those references."""
+    references = (
+        (versions.TIME_SLOTS, TimeSlot.user_id == user_id),
+        (versions.VENUES, Venue.created_by_id == user_id),
+        (versions.MATCH_REQUESTS, or_(MatchRequest.requester_id == user_id, MatchRequest.target_id == user_id)),
+        (versions.PREFERENCES, UserPreference.user_id == user_id),
+    )
+    statement = union_all(
+        *(select(literal(name).label("name")).where(exists().where(condition)) for name, condition in references)
+    )
+    return list(session.execute(statement).scalars())
+
+
 def delete(session: Session, db_user: User) -> None:
+    user_id = db_user.id
+    touched = _referencing(session, user_id)
     session.delete(db_user)
+    versions.bump(session, versions.USERS, *touched)
     session.commit()
+    _cache.invalidate(User, user_id)
+    embeddings.changed(user_id, None)
+    if versions.TIME_SLOTS in touched:
+        _cache.invalidate_all(TimeSlot)
+    if versions.VENUES in touched:
+        _cache.invalidate_all(Venue)
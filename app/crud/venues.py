@@ -1,9 +1,15 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 from sqlmodel import Session, select
 
+from app.crud import _bulk, _cache, _rows, nearby as _nearby, search as _search, versions
+from app.crud.pagination import Page, paginate
+from app.db import fts, rtree
 from app.models.venue import Venue
-from app.schemas.venues import VenueCreate, VenueUpdate
+from app.schemas.venues import VenueBatchUpdate, VenueCreate, VenueRead, VenueUpdate
+from app.services import geo
+
+READ_COLUMNS = _rows.read_columns(Venue, VenueRead)
 
 
 def _model_dump(model) -> dict:
@@ -15,35 +21,108 @@ def _model_dump(model) -> dict:
 
 
 def get(session: Session, venue_id: int) -> Optional[Venue]:
-    return session.get(Venue, venue_id)
+    return _cache.get(session, Venue, venue_id)
 
 
-def get_multi(session: Session, *, skip: int = 0, limit: int = 100, venue_type: Optional[str] = None) -> List[Venue]:
-    statement = select(Venue)
+def get_multi(
+    session: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    venue_type: Optional[str] = None,
+    rows: bool = False,
+) -> Page:
+    """A page of venues, or with ``rows`` a page of ``VenueRead`` column dicts."""
+    statement = select(*READ_COLUMNS) if rows else select(Venue)
     if venue_type:
         statement = statement.where(Venue.type == venue_type)
-    statement = statement.offset(skip).limit(limit)
-    return list(session.exec(statement))
+
+    def load() -> Page:
+        result = paginate(session, statement, [Venue.id], cursor=cursor, limit=limit)
+        return _rows.as_dicts(result) if rows else result
+
+    return _cache.page(session, Venue, (venue_type, cursor, limit), load, rows=rows)
+
+
+def search(session: Session, query: str, *, cursor: Optional[str] = None, limit: int = 100) -> Page[Venue]:
+    return _search.search(session, Venue, fts.VENUES, query, cursor=cursor, limit=limit)
+
+
+def nearby(
+    session: Session,
+    center: geo.Coordinates,
+    radius_km: float,
+    *,
+    venue_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page[Tuple[Venue, float]]:
+    where = Venue.type == venue_type if venue_type else None
+    return _nearby.nearby(session, Venue, rtree.VENUES, center, radius_km, where=where, cursor=cursor, limit=limit)
+
+
+def _values(item) -> dict:
+    values = _model_dump(item)
+    geo.fill_coordinates(values)
+    return values
 
 
 def create(session: Session, venue_in: VenueCreate) -> Venue:
-    venue = Venue(**_model_dump(venue_in))
+    venue = Venue(**_values(venue_in))
     session.add(venue)
+    versions.bump(session, versions.VENUES)
     session.commit()
+    _cache.invalidate(Venue)
     session.refresh(venue)
     return venue
 
 
 def update(session: Session, db_venue: Venue, venue_in: VenueUpdate) -> Venue:
-    update_data = _model_dump(venue_in)
+    update_data = _values(venue_in)
     for field, value in update_data.items():
         setattr(db_venue, field, value)
     session.add(db_venue)
+    versions.bump(session, versions.VENUES)
     session.commit()
     session.refresh(db_venue)
+    _cache.invalidate(Venue, db_venue.id)
     return db_venue
 
 
 def delete(session: Session, db_venue: Venue) -> None:
+    venue_id = db_venue.id
     session.delete(db_venue)
+    versions.bump(session, versions.VENUES)
+    session.commit()
+    _cache.invalidate(Venue, venue_id)
+
+
+def missing_ids(session: Session, venue_ids: Sequence[int]) -> List[int]:
+    return _bulk.missing_ids(session, Venue, venue_ids)
+
+
+def create_many(session: Session, venues_in: Sequence[VenueCreate]) -> List[int]:
+    rows = [_bulk.column_values(Venue(**_values(item))) for item in venues_in]
+    ids = _bulk.bulk_insert(session, Venue, rows)
+    versions.bump(session, versions.VENUES)
+    session.commit()
+    _cache.invalidate(Venue)
+    return ids
+
+
+def update_many(session: Session, venues_in: Sequence[VenueBatchUpdate]) -> List[int]:
+    mappings = [_values(item) for item in venues_in]
+    # rows that only carry an id have nothing to update
+    session.bulk_update_mappings(Venue, [mapping for mapping in mappings if len(mapping) > 1])
+    versions.bump(session, versions.VENUES)
+    session.commit()
+    ids = [mapping["id"] for mapping in mappings]
+    _cache.invalidate(Venue, *ids)
+    return ids
+
+
+def delete_many(session: Session, venue_ids: Sequence[int]) -> None:
+    _bulk.delete_ids(session, Venue, venue_ids)
+    versions.bump(session, versions.VENUES)
     session.commit()
+    _cache.invalidate(Venue, *venue_ids)
@@ -0,0 +1,65 @@
+"""Per-collection version stamps backing ETag/Last-Modified on read endpoints."""
+
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models.collection_version import CollectionVersion
+
+USERS = "users"
+VENUES = "venues"
+TIME_SLOTS = "time_slots"
+MATCH_REQUESTS = "match_requests"
+PREFERENCES = "user_preferences"
+
+ALL = (USERS, VENUES, TIME_SLOTS, MATCH_REQUESTS, PREFERENCES)
+
+
+def _upsert(dialect_name: str):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def bump(session: Session, *names: str) -> None:
+    """Increment the versions of ``names``; does not commit, so it lands with the caller's write.
+
+    Each collection is one row, so concurrent writers to a collection
+    serialize on its row lock from the bump until they commit. On
+    PostgreSQL that caps write throughput per collection, whatever the
+    replicas add for reads. Call it as the last statement before
+    ``commit`` to keep the lock short, and bump only the collections the
+    write changed.
+    """
+    now = datetime.utcnow()
+    table = CollectionVersion.__table__  # type: ignore[attr-defined]
+    insert = _upsert(session.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(table).values([{"name": name, "version": 1, "updated_at": now} for name in names])
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"version": table.c.version + 1, "updated_at": statement.excluded.updated_at},
+        )
+        session.execute(statement)
+        return
+    for name in names:
+        result = session.execute(
+            update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        )
+        if not result.rowcount:
+            session.execute(table.insert().values(name=name, version=1, updated_at=now))
+
+
+def get_versions(session: Session, names: Sequence[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    """``name -> (version, updated_at)``; collections never written report ``(0, None)``."""
+    statement = select(CollectionVersion.name, CollectionVersion.version, CollectionVersion.updated_at).where(
+        CollectionVersion.name.in_(names)  # type: ignore[attr-defined]
+    )
+    found = {name: (version, updated_at) for name, version, updated_at in session.exec(statement)}
+    return {name: found.get(name, (0, None)) for name in names}
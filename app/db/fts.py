@@ -0,0 +1,74 @@
+"""SQLite FTS5 indexes mirroring searchable text columns.
+
+Each index is an external-content FTS5 table: it stores only the inverted
+index and reads the text back from the source table by rowid. Triggers on
+the source table keep it in sync, so every writer keeps the index current
+without knowing it exists. That includes the ORM, Core inserts from
+imports and raw sqlite3 loads. Prefix indexes on 2 and 3 characters keep
+short ``term*`` queries from scanning the whole term list.
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+PREFIXES = "2 3"
+
+
+@dataclass(frozen=True)
+class FtsIndex:
+    source: str
+    columns: Sequence[str]
+    # bm25 weight per column, in ``columns`` order.
+    weights: Sequence[float]
+
+    @property
+    def name(self) -> str:
+        return f"{self.source}_fts"
+
+    @property
+    def rank(self) -> str:
+        return f"bm25({self.name}, {', '.join(str(weight) for weight in self.weights)})"
+
+    def ddl(self) -> List[str]:
+        """``CREATE`` statements for the table and its sync triggers; all are idempotent."""
+        columns = ", ".join(self.columns)
+        new = ", ".join(f"new.{column}" for column in self.columns)
+        old = ", ".join(f"old.{column}" for column in self.columns)
+        insert = f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new});"
+        delete = f"INSERT INTO {self.name}({self.name}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5({columns}, content='{self.source}', "
+            f"content_rowid='id', tokenize='{TOKENIZER}', prefix='{PREFIXES}')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {self.source} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {self.source} BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE OF {columns} ON {self.source} "
+            f"BEGIN {delete} {insert} END",
+        ]
+
+    def rebuild(self) -> str:
+        """Reindex every source row; used after bulk loads and when the table is first created."""
+        return f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"
+
+
+USERS = FtsIndex("users", ("name", "bio", "location"), (10.0, 1.0, 5.0))
+VENUES = FtsIndex("venues", ("name", "description", "location"), (10.0, 1.0, 5.0))
+INDEXES = (USERS, VENUES)
+
+
+def create_fts(engine: Engine) -> None:
+    """Create missing FTS tables and triggers, indexing existing rows; a no-op on other databases."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for index in INDEXES:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": index.name}
+            ).first()
+            for statement in index.ddl():
+                connection.execute(text(statement))
+            if not exists:
+                connection.execute(text(index.rebuild()))
@@ -0,0 +1,71 @@
+"""SQLite R*Tree indexes over the latitude/longitude columns.
+
+Each index holds one zero-area box per row that has both coordinates.
+Triggers on the source table keep it current, like the FTS indexes in
+:mod:`app.db.fts`. R*Tree stores 32-bit floats, so it narrows the
+candidates and the exact coordinates on the source row decide.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import TableClause
+
+
+@dataclass(frozen=True)
+class RtreeIndex:
+    source: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.source}_rtree"
+
+    def table(self) -> TableClause:
+        return table(self.name, column("id"), column("min_lat"), column("max_lat"), column("min_lon"), column("max_lon"))
+
+    def _insert_new(self) -> str:
+        return (
+            f"INSERT INTO {self.name} SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude "
+            "WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;"
+        )
+
+    def ddl(self) -> List[str]:
+        """``CREATE`` statements for the index and its sync triggers; all are idempotent."""
+        delete_old = f"DELETE FROM {self.name} WHERE id = old.id;"
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {self.source} BEGIN {self._insert_new()} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {self.source} BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE OF latitude, longitude ON {self.source} "
+            f"BEGIN {delete_old} {self._insert_new()} END",
+        ]
+
+    def rebuild(self) -> List[str]:
+        return [
+            f"DELETE FROM {self.name}",
+            f"INSERT INTO {self.name} SELECT id, latitude, latitude, longitude, longitude FROM {self.source} "
+            "WHERE latitude IS NOT NULL AND longitude IS NOT NULL",
+        ]
+
+
+USERS = RtreeIndex("users")
+VENUES = RtreeIndex("venues")
+INDEXES = (USERS, VENUES)
+
+
+def create_rtree(engine: Engine) -> None:
+    """Create missing R*Tree indexes and triggers, loading existing rows; a no-op on other databases."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for index in INDEXES:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": index.name}
+            ).first()
+            for statement in index.ddl():
+                connection.execute(text(statement))
+            if not exists:
+                for statement in index.rebuild():
+                    connection.execute(text(statement))
@@ -1,16 +1,207 @@
+import os
+import random
+import threading
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Iterator, List, Optional, Sequence
 
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 from sqlmodel import Session, SQLModel, create_engine
 
-from app.core.config import get_settings
+from app.core.config import Settings, async_url, get_settings
+from app.db import fts, rtree
 
 
-settings = get_settings()
-_engine = create_engine(
-    settings.database_url,
-    echo=settings.echo_sql,
-    connect_args={"check_same_thread": False},
+def _sqlite_pragmas(settings: Settings) -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+    ]
+
+
+def _install_sqlite_pragmas(engine: Engine, settings: Settings) -> None:
+    pragmas = _sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def _pool_options(settings: Settings, url: str, writer: bool) -> dict:
+    return {
+        "pool_size": 1 if writer else settings.db_pool_size,
+        "max_overflow": 0 if writer else settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": settings.db_pool_pre_ping and not url.startswith("sqlite"),
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
+
+def create_db_engine(settings: Settings, *, url: Optional[str] = None, writer: bool = False) -> Engine:
+    """Build a pooled engine for ``url`` (the primary by default); SQLite connections get the tuning pragmas.
+
+    ``writer`` builds the single-connection engine used when
+    ``sqlite_single_writer`` is enabled.
+    """
+    url = url or settings.database_url
+    is_sqlite = url.startswith("sqlite")
+    engine = create_engine(
+        url,
+        echo=settings.echo_sql,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        poolclass=QueuePool,
+        **_pool_options(settings, url, writer),
+    )
+    if is_sqlite:
+        _install_sqlite_pragmas(engine, settings)
+    return engine
+
+
+def create_async_db_engine(settings: Settings, *, url: Optional[str] = None, writer: bool = False) -> AsyncEngine:
+    """Async counterpart of :func:`create_db_engine` (aiosqlite or asyncpg)."""
+    url = async_url(url or settings.database_url)
+    engine = create_async_engine(
+        url,
+        echo=settings.echo_sql,
+        poolclass=AsyncAdaptedQueuePool,
+        **_pool_options(settings, url, writer),
+    )
+    if url.startswith("sqlite"):
+        _install_sqlite_pragmas(engine.sync_engine, settings)
+    return engine
+
+
+class RoutingSession(Session):
+    """Route reads to a replica and writes to the primary (or ``writer``); once a session has written, it stays there.
+
+    The session's own bind is the primary. Each session picks one replica
+    and keeps it, so a request never sees one replica's data and then an
+    older one's. Flushes, DML and :func:`pin_primary` mark the session as
+    having written. Every later statement, reads included, then goes to the
+    primary, so a request reads its own writes whatever the replication lag.
+    """
+
+    def __init__(
+        self, *args: Any, writer: Optional[Engine] = None, replicas: Sequence[Engine] = (), **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+        self.replicas = list(replicas)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):  # type: ignore[override]
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+        if self.info.get("wrote"):
+            if self.writer is not None:
+                return self.writer
+        elif self.replicas:
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(self.replicas)
+            return self.info["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def pin_primary(session: Session) -> None:
+    """Send every later statement of ``session`` to the primary (or ``writer``).
+
+    Call it before a write ``get_bind`` cannot recognise, such as a
+    ``text()`` statement or a function with side effects run from a SELECT.
+    For an ``AsyncSession`` pass its ``sync_session``.
+    """
+    session.info["wrote"] = True
+
+
+class _Engines:
+    """Every engine the app uses, built together from one ``Settings``."""
+
+    def __init__(self, settings: Settings) -> None:
+        # The dedicated writer connection only helps SQLite, which allows one writer at a time.
+        single_writer = settings.sqlite_single_writer and settings.database_url.startswith("sqlite")
+        self.primary = create_db_engine(settings)
+        self.writer = create_db_engine(settings, writer=True) if single_writer else None
+        self.replicas = [create_db_engine(settings, url=url) for url in settings.replica_dsns]
+        self.async_primary: Optional[AsyncEngine] = None
+        self.async_writer: Optional[AsyncEngine] = None
+        self.async_replicas: List[AsyncEngine] = []
+        if settings.async_db:
+            self.async_primary = create_async_db_engine(settings)
+            if single_writer:
+                self.async_writer = create_async_db_engine(settings, writer=True)
+            self.async_replicas = [create_async_db_engine(settings, url=url) for url in settings.replica_dsns]
+
+    def async_engines(self) -> List[AsyncEngine]:
+        engines = [self.async_primary, self.async_writer, *self.async_replicas]
+        return [engine for engine in engines if engine is not None]
+
+    def sync_engines(self) -> List[Engine]:
+        engines = [self.primary, self.writer, *self.replicas]
+        engines += [engine.sync_engine for engine in self.async_engines()]
+        return [engine for engine in engines if engine is not None]
+
+
+# Built on first use, so importing the app (e.g. gunicorn --preload) opens no pools.
+_engines: Optional[_Engines] = None
+_engines_lock = threading.Lock()
+
+
+def _get_engines() -> _Engines:
+    global _engines
+    engines = _engines
+    if engines is None:
+        with _engines_lock:
+            if _engines is None:
+                _engines = _Engines(get_settings())
+            engines = _engines
+    return engines
+
+
+def get_engine() -> Engine:
+    """The primary engine."""
+    return _get_engines().primary
+
+
+def _after_fork_in_child() -> None:
+    """Drop pooled connections inherited from the parent without closing them; the parent still owns them."""
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    if _engines is not None:
+        for engine in _engines.sync_engines():
+            engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _add_missing_columns(engine: Engine) -> None:
+    """Add nullable columns that models gained after their table was created; create_all never alters."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable or column.server_default is not None:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+# Indexes that older schemas created and the models have since dropped; create_all never removes them.
+_DROPPED_INDEXES = (
+    "ix_time_slots_user_id",  # the composite time_slots indexes lead with user_id
 )
 
 
@@ -22,19 +213,76 @@ def init_db() -> None:
     import app.models.venue  # noqa: F401
     import app.models.match_request  # noqa: F401
     import app.models.user_preference  # noqa: F401
+    import app.models.collection_version  # noqa: F401
+    import app.models.preference_value  # noqa: F401
+
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+    _add_missing_columns(engine)
+    # create_all skips indexes on tables that already exist
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        for name in _DROPPED_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    fts.create_fts(engine)
+    rtree.create_rtree(engine)
+
+    from app.crud import preference_values
+
+    with new_session(primary=True) as session:
+        preference_values.backfill(session)
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections; aiosqlite keeps a thread per open connection.
+
+    The engines are rebuilt on next use.
+    """
+    global _engines
+    engines, _engines = _engines, None
+    if engines is None:
+        return
+    for async_engine in engines.async_engines():
+        await async_engine.dispose()
+    for engine in (engines.primary, engines.writer, *engines.replicas):
+        if engine is not None:
+            engine.dispose()
+
+
+def sync_engines() -> list[Engine]:
+    """Every engine in use; async engines are given as their sync core, which is where events fire."""
+    return _get_engines().sync_engines()
+
+
+def new_session(*, primary: bool = False) -> Session:
+    """A session that reads from a replica until it writes; ``primary`` skips the replicas entirely."""
+    engines = _get_engines()
+    return RoutingSession(engines.primary, writer=engines.writer, replicas=() if primary else engines.replicas)
+
 
-    SQLModel.metadata.create_all(_engine)
+def new_async_session() -> Optional[AsyncSession]:
+    """Return an async session when ``async_db`` is enabled, otherwise ``None``."""
+    engines = _get_engines()
+    if engines.async_primary is None:
+        return None
+    writer = engines.async_writer.sync_engine if engines.async_writer is not None else None
+    replicas = [engine.sync_engine for engine in engines.async_replicas]
+    return AsyncSession(
+        engines.async_primary, sync_session_class=RoutingSession, writer=writer, replicas=replicas
+    )
 
 
 def get_session() -> Iterator[Session]:
-    with Session(_engine) as session:
+    with new_session() as session:
         yield session
 
 
 @contextmanager
 def session_scope() -> Iterator[Session]:
     """Provide a transactional scope around a series of operations."""
-    with Session(_engine) as session:
+    with new_session() as session:
         try:
             yield session
             session.commit()
@@ -1,13 +1,18 @@
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.api.v1.endpoints import profiling
 from app.api.v1.router import api_router
+from app.core import instrumentation
 from app.core.config import get_settings
-from app.db.session import init_db
+from app.crud.match_requests import BookingConflict
+from app.crud.pagination import InvalidCursor
+from app.crud.search import SearchUnavailable
+from app.db.session import dispose_engines, init_db
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -19,11 +24,38 @@ def create_application() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(_: FastAPI):
-        init_db()
+        if settings.init_db_on_startup:
+            init_db()
         yield
+        await dispose_engines()
 
     application = FastAPI(title=settings.app_name, lifespan=lifespan)
     application.include_router(api_router, prefix=settings.api_v1_str)
+    if settings.profiling:
+        application.include_router(profiling.router, prefix=settings.api_v1_str)
+
+    @application.exception_handler(InvalidCursor)
+    async def invalid_cursor_handler(_: Request, exc: InvalidCursor) -> JSONResponse:
+        return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+    @application.exception_handler(BookingConflict)
+    async def booking_conflict_handler(_: Request, exc: BookingConflict) -> JSONResponse:
+        return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+    @application.exception_handler(SearchUnavailable)
+    async def search_unavailable_handler(_: Request, exc: SearchUnavailable) -> JSONResponse:
+        return JSONResponse(status_code=501, content={"detail": str(exc)})
+
+    if settings.instrumentation:
+        instrumentation.install()
+        application.add_middleware(
+            instrumentation.InstrumentationMiddleware,
+            n_plus_one_threshold=settings.n_plus_one_threshold,
+        )
+
+        @application.get("/metrics", include_in_schema=False)
+        async def metrics() -> PlainTextResponse:
+            return PlainTextResponse(instrumentation.metrics.render(), media_type=instrumentation.CONTENT_TYPE)
 
     if STATIC_DIR.exists():
         application.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class CollectionVersion(SQLModel, table=True):
+    """Change counter per collection, bumped in the same transaction as every write to it."""
+
+    __tablename__ = "collection_versions"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
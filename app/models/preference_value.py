@@ -0,0 +1,15 @@
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class PreferenceValue(SQLModel, table=True):
+    """One normalized ``(preference_type, value)`` pair; preferences refer to it by id."""
+
+    __tablename__ = "preference_values"
+    __table_args__ = (UniqueConstraint("preference_type", "value", name="uq_preference_values_type_value"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    preference_type: str
+    value: str
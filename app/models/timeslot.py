@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -9,9 +10,16 @@ if TYPE_CHECKING:  # pragma: no cover
 
 class TimeSlot(SQLModel, table=True):
     __tablename__ = "time_slots"
+    __table_args__ = (
+        # Covers per-user availability lookups ordered by start time.
+        Index("ix_time_slots_user_status_start", "user_id", "status", "start_time", "end_time"),
+        # Keyset pagination by (start_time, id), per user and over available slots.
+        Index("ix_time_slots_user_start", "user_id", "start_time"),
+        Index("ix_time_slots_status_start", "status", "start_time"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id", index=True)
+    user_id: int = Field(foreign_key="users.id")
     start_time: datetime
     end_time: datetime
     status: str = Field(default="available")
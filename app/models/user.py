@@ -1,6 +1,8 @@
 from typing import List, Optional, TYPE_CHECKING
 
 from pydantic import EmailStr
+from sqlalchemy import Column, LargeBinary
+from sqlalchemy.orm import deferred
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -10,15 +12,24 @@ if TYPE_CHECKING:  # pragma: no cover
     from app.models.venue import Venue
 
 
+_embedding = Column("embedding", LargeBinary, nullable=True)
+
+
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    # Only the similarity paths need the vector; everything else leaves it unloaded.
+    __mapper_args__ = {"properties": {"embedding": deferred(_embedding)}}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     email: EmailStr = Field(index=True, sa_column_kwargs={"unique": True})
     bio: Optional[str] = Field(default=None)
     location: Optional[str] = Field(default=None)
+    latitude: Optional[float] = Field(default=None, index=True)
+    longitude: Optional[float] = None
     ai_analysis_json: Optional[str] = None
+    # float32 unit vector derived from ai_analysis_json; see app.services.embeddings.
+    embedding: Optional[bytes] = Field(default=None, sa_column=_embedding)
 
     time_slots: List["TimeSlot"] = Relationship(back_populates="user")
     sent_requests: List["MatchRequest"] = Relationship(
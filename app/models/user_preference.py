@@ -1,18 +1,27 @@
 from typing import Optional, TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
+# value_id's foreign key needs the table registered wherever preferences are.
+from app.models.preference_value import PreferenceValue  # noqa: F401
+
 if TYPE_CHECKING:  # pragma: no cover
     from app.models.user import User
 
 
 class UserPreference(SQLModel, table=True):
     __tablename__ = "user_preferences"
+    __table_args__ = (
+        # Posting list from a normalized value to its users; covers the shared-interest join.
+        Index("ix_user_preferences_value_user", "value_id", "user_id", "confidence"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", index=True)
     preference_type: str
     preference_value: str
     confidence: int = Field(default=1)
+    value_id: Optional[int] = Field(default=None, foreign_key="preference_values.id")
 
     user: "User" = Relationship(back_populates="preferences")
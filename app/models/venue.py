@@ -14,6 +14,8 @@ class Venue(SQLModel, table=True):
     type: str = Field(description="coffee or restaurant")
     price_range: str
     location: str
+    latitude: Optional[float] = Field(default=None, index=True)
+    longitude: Optional[float] = None
     description: str = Field(default="")
     created_by_id: Optional[int] = Field(default=None, foreign_key="users.id", index=True)
 
@@ -0,0 +1,7 @@
+from typing import List
+
+from sqlmodel import SQLModel
+
+
+class BatchIds(SQLModel):
+    ids: List[int]
@@ -0,0 +1,15 @@
+from sqlmodel import SQLModel
+
+from app.schemas.match_requests import MatchRequestPage
+from app.schemas.timeslots import TimeSlotPage
+from app.schemas.users import UserPage, UserRead
+from app.schemas.venues import VenuePage
+
+
+class BootstrapRead(SQLModel):
+    user: UserRead
+    users: UserPage
+    venues: VenuePage
+    timeslots: TimeSlotPage
+    received: MatchRequestPage
+    sent: MatchRequestPage
@@ -1,8 +1,12 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from sqlmodel import SQLModel
 
+from app.schemas.timeslots import TimeSlotRead
+from app.schemas.users import UserRead
+from app.schemas.venues import VenueRead
+
 
 class MatchRequestBase(SQLModel):
     requester_id: int
@@ -29,3 +33,23 @@ class MatchRequestRead(MatchRequestBase):
     id: int
     status: str
     created_at: datetime
+
+
+class MatchRequestReadExpanded(MatchRequestRead):
+    requester: Optional[UserRead] = None
+    target: Optional[UserRead] = None
+    venue: Optional[VenueRead] = None
+    time_slot: Optional[TimeSlotRead] = None
+
+
+class MatchSuggestion(SQLModel):
+    user: UserRead
+    score: float
+    preference_score: float
+    same_location: bool
+    overlap_hours: int
+
+
+class MatchRequestPage(SQLModel):
+    items: List[MatchRequestReadExpanded]
+    next_cursor: Optional[str] = None
@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import List, Optional
 
 from sqlmodel import SQLModel
 
+from app.schemas.users import UserRead
+
 
 class PreferenceBase(SQLModel):
     user_id: int
@@ -20,5 +22,27 @@ class PreferenceUpdate(SQLModel):
     confidence: Optional[int] = None
 
 
+class PreferenceBatchUpdate(PreferenceUpdate):
+    id: int
+
+
 class PreferenceRead(PreferenceBase):
     id: int
+
+
+class PreferencePage(SQLModel):
+    items: List[PreferenceRead]
+    next_cursor: Optional[str] = None
+
+
+class SharedInterest(SQLModel):
+    user: UserRead
+    # Distinct normalized preference values both users hold.
+    shared: int
+    # Sum of both users' confidence over the shared values.
+    score: int
+
+
+class SharedInterestPage(SQLModel):
+    items: List[SharedInterest]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from sqlmodel import SQLModel
 
@@ -20,6 +20,20 @@ class TimeSlotUpdate(SQLModel):
     status: Optional[str] = None
 
 
+class TimeSlotBatchUpdate(TimeSlotUpdate):
+    id: int
+
+
 class TimeSlotRead(TimeSlotBase):
     id: int
     user_id: int
+
+
+class AvailabilityWindow(SQLModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class TimeSlotPage(SQLModel):
+    items: List[TimeSlotRead]
+    next_cursor: Optional[str] = None
@@ -1,7 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import EmailStr
-from sqlmodel import SQLModel
+from sqlmodel import Field, SQLModel
 
 
 class UserBase(SQLModel):
@@ -9,6 +9,8 @@ class UserBase(SQLModel):
     email: EmailStr
     bio: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     ai_analysis_json: Optional[str] = None
 
 
@@ -20,8 +22,30 @@ class UserUpdate(SQLModel):
     name: Optional[str] = None
     bio: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     ai_analysis_json: Optional[str] = None
 
 
 class UserRead(UserBase):
     id: int
+
+
+class UserPage(SQLModel):
+    items: List[UserRead]
+    next_cursor: Optional[str] = None
+
+
+class UserDistance(SQLModel):
+    user: UserRead
+    distance_km: float
+
+
+class UserSimilarity(SQLModel):
+    user: UserRead
+    score: float
+
+
+class UserDistancePage(SQLModel):
+    items: List[UserDistance]
+    next_cursor: Optional[str] = None
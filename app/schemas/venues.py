@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 
-from sqlmodel import SQLModel
+from sqlmodel import Field, SQLModel
 
 
 class VenueBase(SQLModel):
@@ -8,6 +8,8 @@ class VenueBase(SQLModel):
     type: str
     price_range: str
     location: str
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     description: Optional[str] = None
     created_by_id: Optional[int] = None
 
@@ -21,9 +23,36 @@ class VenueUpdate(SQLModel):
     type: Optional[str] = None
     price_range: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     description: Optional[str] = None
     created_by_id: Optional[int] = None
 
 
+class VenueBatchUpdate(VenueUpdate):
+    id: int
+
+
 class VenueRead(VenueBase):
     id: int
+
+
+class VenuePage(SQLModel):
+    items: List[VenueRead]
+    next_cursor: Optional[str] = None
+
+
+class VenueDistance(SQLModel):
+    venue: VenueRead
+    distance_km: float
+
+
+class VenueDistancePage(SQLModel):
+    items: List[VenueDistance]
+    next_cursor: Optional[str] = None
+
+
+class MidpointVenues(VenueDistancePage):
+    # Geographic midpoint of the users; distances are measured from it.
+    latitude: float
+    longitude: float
@@ -0,0 +1,43 @@
+"""Everything the web client needs right after login, loaded in one session."""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlmodel import Session
+
+from app.crud import match_requests as matches_crud
+from app.crud import timeslots as timeslots_crud
+from app.crud import users as users_crud
+from app.crud import venues as venues_crud
+from app.crud.pagination import Page
+from app.models.user import User
+
+
+# Enough for the client to render match cards without the full directory.
+MATCH_EXPAND = ("requester", "target", "venue")
+
+
+@dataclass
+class Bootstrap:
+    user: User
+    users: Page
+    venues: Page
+    timeslots: Page
+    received: Page
+    sent: Page
+
+
+def load_bootstrap(session: Session, user_id: int, *, limit: int) -> Optional[Bootstrap]:
+    """Load the first page of every listing the client shows, or ``None`` for an unknown user."""
+    # Not the per-process row cache: this response's ETag comes from the shared versions.
+    user = session.get(User, user_id)
+    if user is None:
+        return None
+    return Bootstrap(
+        user=user,
+        users=users_crud.get_multi(session, limit=limit),
+        venues=venues_crud.get_multi(session, limit=limit),
+        timeslots=timeslots_crud.get_by_user(session, user_id, limit=limit),
+        received=matches_crud.get_received(session, user_id, limit=limit, expand=MATCH_EXPAND),
+        sent=matches_crud.get_sent(session, user_id, limit=limit, expand=MATCH_EXPAND),
+    )
@@ -0,0 +1,131 @@
+"""User embeddings derived from ``ai_analysis_json``.
+
+Each user with an analysis payload gets a unit-length float32 vector of
+``DIMENSIONS`` values. It is stored little-endian in ``users.embedding``, so
+an index loads a whole table with one ``numpy.frombuffer``. A payload whose
+``"embedding"`` key holds exactly ``DIMENSIONS`` numbers is used as is.
+Anything else is feature-hashed. Each string leaf becomes a ``path=value``
+feature, each number a ``path`` feature weighted by its value, and list
+items share their list's path. Nothing here needs numpy, so writes stay
+cheap to import. :mod:`app.services.similarity` does the searching.
+"""
+
+import hashlib
+import json
+import math
+import struct
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlmodel import Session, select
+
+from app.models.user import User
+
+DIMENSIONS = 64
+BLOB_SIZE = DIMENSIONS * 4
+BACKFILL_BATCH = 1000
+
+_PACK = struct.Struct(f"<{DIMENSIONS}f")
+
+Listener = Callable[[int, Optional[bytes]], None]
+_listeners: List[Listener] = []
+
+
+def _features(value: Any, path: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _features(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for item in value:
+            yield from _features(item, path)
+    elif isinstance(value, bool):
+        yield f"{path}={value}".lower(), 1.0
+    elif isinstance(value, (int, float)):
+        if math.isfinite(value):
+            yield path, float(value)
+    elif isinstance(value, str):
+        yield f"{path}={' '.join(value.lower().split())}", 1.0
+
+
+def _hashed(payload: Any) -> List[float]:
+    vector = [0.0] * DIMENSIONS
+    for feature, weight in _features(payload):
+        # Python's own hash() is salted per process; stored vectors must not depend on it.
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        vector[digest % DIMENSIONS] += weight if digest >> 63 else -weight
+    return vector
+
+
+def embed(analysis_json: Optional[str]) -> Optional[List[float]]:
+    """The unit vector for an analysis payload, or ``None`` when it is empty or not JSON."""
+    if not analysis_json:
+        return None
+    try:
+        payload = json.loads(analysis_json)
+    except ValueError:
+        return None
+    explicit = payload.get("embedding") if isinstance(payload, dict) else None
+    if (
+        isinstance(explicit, list)
+        and len(explicit) == DIMENSIONS
+        and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in explicit)
+    ):
+        vector = [float(value) for value in explicit]
+    else:
+        vector = _hashed(payload)
+    norm = math.sqrt(sum(value * value for value in vector))
+    if not norm or not math.isfinite(norm):
+        return None
+    return [value / norm for value in vector]
+
+
+def to_blob(vector: List[float]) -> bytes:
+    return _PACK.pack(*vector)
+
+
+def fill_embedding(values: Dict[str, Any]) -> None:
+    """Set ``embedding`` in create or update data that sets ``ai_analysis_json``."""
+    if "ai_analysis_json" not in values:
+        return
+    vector = embed(values["ai_analysis_json"])
+    values["embedding"] = to_blob(vector) if vector is not None else None
+
+
+def on_change(listener: Listener) -> None:
+    """Call ``listener(user_id, embedding)`` after every committed change; ``None`` means removed."""
+    _listeners.append(listener)
+
+
+def changed(user_id: int, embedding: Optional[bytes]) -> None:
+    for listener in _listeners:
+        listener(user_id, embedding)
+
+
+def backfill(session: Session, *, batch_size: int = BACKFILL_BATCH) -> int:
+    """Embed users that have an analysis but no embedding; returns how many were filled.
+
+    Commits every batch. Payloads that yield no vector are left as they are.
+    """
+    table = User.__table__  # type: ignore[attr-defined]
+    assign = update(table).where(table.c.id == bindparam("row_id")).values(embedding=bindparam("new_embedding"))
+    filled = 0
+    after = 0
+    while True:
+        rows = session.execute(
+            select(table.c.id, table.c.ai_analysis_json)
+            .where(table.c.id > after, table.c.ai_analysis_json.is_not(None), table.c.embedding.is_(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        after = rows[-1][0]
+        values = []
+        for row_id, analysis_json in rows:
+            vector = embed(analysis_json)
+            if vector is not None:
+                values.append({"row_id": row_id, "new_embedding": to_blob(vector)})
+        if values:
+            session.execute(assign, values)
+            session.commit()
+        filled += len(values)
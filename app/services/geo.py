@@ -0,0 +1,154 @@
+"""Offline geocoding and great-circle helpers.
+
+Locations are free-form ``"City, Region"`` strings. They resolve against a
+gazetteer bundled in ``app/data/gazetteer.csv``, with no network access.
+The lookup tries the full place first. It then falls back to the city name
+alone, but only when that name is unambiguous in the gazetteer.
+"""
+
+import csv
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import bindparam, update
+from sqlmodel import Session, select
+
+BACKFILL_BATCH = 1000
+
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+Coordinates = Tuple[float, float]
+
+_PUNCTUATION = re.compile(r"[.]")
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(_PUNCTUATION.sub("", text).lower().split())
+
+
+class Gazetteer:
+    def __init__(self, places: Iterable[Tuple[str, str, float, float]]) -> None:
+        self._places: Dict[str, Coordinates] = {}
+        cities: Dict[str, Optional[Coordinates]] = {}
+        for name, region, latitude, longitude in places:
+            coordinates = (latitude, longitude)
+            self._places[f"{_fold(name)}, {_fold(region)}"] = coordinates
+            city = _fold(name)
+            # A name shared by two places (Portland OR/ME) is only usable with its region.
+            cities[city] = coordinates if city not in cities else None
+        self._cities = cities
+
+    @classmethod
+    def load(cls, path: Path = GAZETTEER_PATH) -> "Gazetteer":
+        with path.open(newline="", encoding="utf-8") as handle:
+            return cls(
+                (row["name"], row["region"], float(row["latitude"]), float(row["longitude"]))
+                for row in csv.DictReader(handle)
+            )
+
+    def lookup(self, location: str) -> Optional[Coordinates]:
+        parts = [_fold(part) for part in location.split(",") if part.strip()]
+        if not parts:
+            return None
+        if len(parts) >= 2:
+            found = self._places.get(f"{parts[0]}, {parts[1]}")
+            if found is not None:
+                return found
+        return self._cities.get(parts[0])
+
+
+@lru_cache()
+def get_gazetteer() -> Gazetteer:
+    return Gazetteer.load()
+
+
+def geocode(location: Optional[str]) -> Optional[Coordinates]:
+    if not location:
+        return None
+    return get_gazetteer().lookup(location)
+
+
+def fill_coordinates(values: Dict[str, Any]) -> None:
+    """Geocode ``values`` in place when it sets a location without coordinates.
+
+    Used on create and update data. A new location that the gazetteer does
+    not know clears the coordinates, so they never describe a different
+    place.
+    """
+    if "location" not in values or values.get("latitude") is not None or values.get("longitude") is not None:
+        return
+    coordinates = geocode(values["location"])
+    values["latitude"], values["longitude"] = coordinates if coordinates else (None, None)
+
+
+def backfill(session: Session, model: Type[Any], *, batch_size: int = BACKFILL_BATCH) -> int:
+    """Geocode rows of ``model`` that have a location but no coordinates; returns how many were filled.
+
+    Commits every batch. Rows whose location the gazetteer does not know are
+    left as they are.
+    """
+    table = model.__table__
+    assign = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(latitude=bindparam("new_latitude"), longitude=bindparam("new_longitude"))
+    )
+    filled = 0
+    after = 0
+    while True:
+        rows = session.execute(
+            select(table.c.id, table.c.location)
+            .where(table.c.id > after, table.c.location.is_not(None), table.c.latitude.is_(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        after = rows[-1][0]
+        found = [(row_id, geocode(location)) for row_id, location in rows]
+        values = [
+            {"row_id": row_id, "new_latitude": coordinates[0], "new_longitude": coordinates[1]}
+            for row_id, coordinates in found
+            if coordinates is not None
+        ]
+        if values:
+            session.execute(assign, values)
+            session.commit()
+        filled += len(values)
+
+
+def haversine_km(a: Coordinates, b: Coordinates) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def bounding_box(center: Coordinates, radius_km: float) -> Tuple[float, float, float, float]:
+    """``(south, north, west, east)`` in degrees enclosing the circle; longitudes are not wrapped."""
+    latitude, longitude = center
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(latitude - delta_lat, -90.0),
+        min(latitude + delta_lat, 90.0),
+        max(longitude - delta_lon, -180.0),
+        min(longitude + delta_lon, 180.0),
+    )
+
+
+def midpoint(points: Sequence[Coordinates]) -> Coordinates:
+    """Geographic centre of ``points``: the normalized mean of their unit vectors."""
+    x = y = z = 0.0
+    for latitude, longitude in points:
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        x += math.cos(lat) * math.cos(lon)
+        y += math.cos(lat) * math.sin(lon)
+        z += math.sin(lat)
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
@@ -0,0 +1,319 @@
+"""Candidate ranking for match suggestions.
+
+Every user is reduced to a sparse feature vector once (preferences, location,
+hourly availability buckets) and a whole candidate pool is scored at once by
+walking posting lists into dense NumPy arrays. A user who signed up after
+the index was built is scored against it from their own rows, and the index
+is rebuilt in the background so it also ranks them for everyone else.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.crud.preference_values import normalize
+from app.db.session import session_scope
+from app.models.timeslot import TimeSlot
+from app.models.user import User
+from app.models.user_preference import UserPreference
+
+PREFERENCE_WEIGHT = 0.6
+LOCATION_WEIGHT = 0.2
+AVAILABILITY_WEIGHT = 0.2
+# Overlapping hours beyond this add nothing to the availability score.
+AVAILABILITY_CAP_HOURS = 4
+
+
+Profile = Tuple[np.ndarray, np.ndarray, float, int, np.ndarray]  # (fids, confidences, norm, location code, buckets)
+
+
+@dataclass
+class Suggestion:
+    user_id: int
+    score: float
+    preference_score: float
+    same_location: bool
+    overlap_hours: int
+
+
+def _hour_buckets(start: datetime, end: datetime) -> range:
+    first = int(start.timestamp() // 3600)
+    last = int((end.timestamp() - 1) // 3600)
+    return range(first, last + 1)
+
+
+class CandidateIndex:
+    """Precomputed per-user features with posting lists for batched scoring."""
+
+    def __init__(
+        self,
+        users: Iterable[Tuple[int, Optional[str]]],
+        preferences: Iterable[Tuple[int, str, str, int]],
+        slots: Iterable[Tuple[int, datetime, datetime]],
+    ) -> None:
+        user_ids: List[int] = []
+        location_codes: List[int] = []
+        locations: Dict[str, int] = {}
+        for user_id, location in users:
+            user_ids.append(user_id)
+            key = " ".join(location.lower().split()) if location else ""
+            location_codes.append(locations.setdefault(key, len(locations)) if key else -1)
+
+        self.locations = locations
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.location_codes = np.asarray(location_codes, dtype=np.int32)
+        self.positions: Dict[int, int] = {user_id: pos for pos, user_id in enumerate(user_ids)}
+
+        # user position -> {feature id: confidence}; duplicates keep the strongest signal
+        features: Dict[Tuple[str, str], int] = {}
+        user_features: Dict[int, Dict[int, float]] = {}
+        for user_id, preference_type, preference_value, confidence in preferences:
+            pos = self.positions.get(user_id)
+            if pos is None:
+                continue
+            fid = features.setdefault(normalize(preference_type, preference_value), len(features))
+            weights = user_features.setdefault(pos, {})
+            weights[fid] = max(weights.get(fid, 0.0), float(confidence or 1))
+        self.features = features
+
+        user_buckets: Dict[int, set] = {}
+        for user_id, start, end in slots:
+            pos = self.positions.get(user_id)
+            if pos is None or end <= start:
+                continue
+            user_buckets.setdefault(pos, set()).update(_hour_buckets(start, end))
+
+        self.norms = np.zeros(len(user_ids), dtype=np.float32)
+        self.user_features: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        feature_postings: Dict[int, Tuple[List[int], List[float]]] = {}
+        for pos, weights in user_features.items():
+            fids = np.fromiter(weights.keys(), dtype=np.int32, count=len(weights))
+            confs = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+            self.user_features[pos] = (fids, confs)
+            self.norms[pos] = float(np.sqrt(np.dot(confs, confs)))
+            for fid, conf in weights.items():
+                members, values = feature_postings.setdefault(fid, ([], []))
+                members.append(pos)
+                values.append(conf)
+        self.feature_postings = {
+            fid: (np.asarray(members, dtype=np.int32), np.asarray(values, dtype=np.float32))
+            for fid, (members, values) in feature_postings.items()
+        }
+
+        self.user_buckets: Dict[int, np.ndarray] = {}
+        bucket_postings: Dict[int, List[int]] = {}
+        for pos, buckets in user_buckets.items():
+            self.user_buckets[pos] = np.fromiter(buckets, dtype=np.int64, count=len(buckets))
+            for bucket in buckets:
+                bucket_postings.setdefault(bucket, []).append(pos)
+        self.bucket_postings = {
+            bucket: np.asarray(members, dtype=np.int32) for bucket, members in bucket_postings.items()
+        }
+
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.positions
+
+    def _profile(self, pos: int) -> Profile:
+        fids, confs = self.user_features.get(pos, (np.empty(0, np.int32), np.empty(0, np.float32)))
+        buckets = self.user_buckets.get(pos, np.empty(0, np.int64))
+        return fids, confs, float(self.norms[pos]), int(self.location_codes[pos]), buckets
+
+    def profile(
+        self,
+        location: Optional[str],
+        preferences: Iterable[Tuple[str, str, int]],
+        slots: Iterable[Tuple[datetime, datetime]],
+    ) -> Profile:
+        """Features of a user outside the index, in its feature ids; values nobody indexed are dropped."""
+        key = " ".join(location.lower().split()) if location else ""
+        weights: Dict[int, float] = {}
+        for preference_type, preference_value, confidence in preferences:
+            fid = self.features.get(normalize(preference_type, preference_value))
+            if fid is not None:
+                weights[fid] = max(weights.get(fid, 0.0), float(confidence or 1))
+        buckets: set = set()
+        for start, end in slots:
+            if end > start:
+                buckets.update(_hour_buckets(start, end))
+        fids = np.fromiter(weights.keys(), dtype=np.int32, count=len(weights))
+        confs = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+        return (
+            fids,
+            confs,
+            float(np.sqrt(np.dot(confs, confs))),
+            self.locations.get(key, -1) if key else -1,
+            np.fromiter(buckets, dtype=np.int64, count=len(buckets)),
+        )
+
+    def score(
+        self, user_id: int, profile: Optional[Profile] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Score every indexed user against ``user_id``, or against ``profile`` for a user not indexed.
+
+        Returns the combined score plus its preference, location and
+        availability components, each aligned with ``user_ids``.
+        """
+        pos = self.positions.get(user_id)
+        fids, confs, norm, code, buckets = profile if profile is not None else self._profile(pos)
+        size = len(self.user_ids)
+
+        dots = np.zeros(size, dtype=np.float32)
+        for fid, conf in zip(fids.tolist(), confs.tolist()):
+            members, values = self.feature_postings[fid]
+            dots[members] += values * conf
+        denominators = self.norms * norm
+        preference = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+
+        same_location = (self.location_codes == code) if code >= 0 else np.zeros(size, dtype=bool)
+
+        overlap = np.zeros(size, dtype=np.int32)
+        for bucket in buckets.tolist():
+            members = self.bucket_postings.get(bucket)
+            if members is not None:
+                overlap[members] += 1
+
+        combined = (
+            PREFERENCE_WEIGHT * preference
+            + LOCATION_WEIGHT * same_location
+            + AVAILABILITY_WEIGHT * np.minimum(overlap, AVAILABILITY_CAP_HOURS) / AVAILABILITY_CAP_HOURS
+        ).astype(np.float32)
+        if pos is not None:
+            combined[pos] = 0.0
+        return combined, preference, same_location, overlap
+
+    def top_k(
+        self, user_id: int, k: int, exclude: Sequence[int] = (), *, profile: Optional[Profile] = None
+    ) -> List[Suggestion]:
+        combined, preference, same_location, overlap = self.score(user_id, profile)
+        for other_id in exclude:
+            other = self.positions.get(other_id)
+            if other is not None:
+                combined[other] = 0.0
+
+        candidates = np.flatnonzero(combined > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-combined[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-combined[candidates], kind="stable")]
+        return [
+            Suggestion(
+                user_id=int(self.user_ids[idx]),
+                score=round(float(combined[idx]), 4),
+                preference_score=round(float(preference[idx]), 4),
+                same_location=bool(same_location[idx]),
+                overlap_hours=int(overlap[idx]),
+            )
+            for idx in candidates.tolist()
+        ]
+
+
+def _window(now: Optional[datetime]) -> Tuple[datetime, datetime]:
+    now = now or datetime.utcnow()
+    return now, now + timedelta(days=get_settings().matching_horizon_days)
+
+
+def build_index(session: Session, *, now: Optional[datetime] = None) -> CandidateIndex:
+    now, horizon = _window(now)
+    users = session.exec(select(User.id, User.location))
+    preferences = session.exec(
+        select(
+            UserPreference.user_id,
+            UserPreference.preference_type,
+            UserPreference.preference_value,
+            UserPreference.confidence,
+        )
+    )
+    slots = session.exec(
+        select(TimeSlot.user_id, TimeSlot.start_time, TimeSlot.end_time).where(
+            TimeSlot.status == "available",
+            TimeSlot.end_time > now,
+            TimeSlot.start_time < horizon,
+        )
+    )
+    return CandidateIndex(users, preferences, slots)
+
+
+def load_profile(session: Session, index: CandidateIndex, user_id: int) -> Optional[Profile]:
+    """``user_id``'s features in ``index``'s terms, read straight from the tables; ``None`` if no such user."""
+    user = session.get(User, user_id)
+    if user is None:
+        return None
+    now, horizon = _window(None)
+    preferences = session.exec(
+        select(UserPreference.preference_type, UserPreference.preference_value, UserPreference.confidence).where(
+            UserPreference.user_id == user_id
+        )
+    )
+    slots = session.exec(
+        select(TimeSlot.start_time, TimeSlot.end_time).where(
+            TimeSlot.user_id == user_id,
+            TimeSlot.status == "available",
+            TimeSlot.end_time > now,
+            TimeSlot.start_time < horizon,
+        )
+    )
+    return index.profile(user.location, preferences, slots)
+
+
+_index: Optional[CandidateIndex] = None
+_index_lock = threading.Lock()
+
+
+def _rebuild(index: Optional[CandidateIndex]) -> None:
+    """Replace ``index`` with a fresh build; the caller holds ``_index_lock``."""
+    global _index
+    try:
+        if _index is index:
+            with session_scope() as session:
+                _index = build_index(session)
+    finally:
+        _index_lock.release()
+
+
+def get_index(*, refresh: bool = False) -> CandidateIndex:
+    """Return the shared index, rebuilding it once it is older than the TTL.
+
+    Only the very first call waits for a build. After that a stale index, or
+    one that ``refresh`` asks to replace, is rebuilt on a background thread
+    while requests keep serving the previous one.
+    """
+    global _index
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                with session_scope() as session:
+                    _index = build_index(session)
+        return _index
+    if (refresh or time.monotonic() - index.built_at >= get_settings().matching_index_ttl_seconds) and (
+        _index_lock.acquire(blocking=False)
+    ):
+        threading.Thread(target=_rebuild, args=(index,), name="matching-index", daemon=True).start()
+    return index
+
+
+def suggest(user_id: int, *, limit: int = 10) -> List[Suggestion]:
+    """Rank candidates for ``user_id``; CPU-bound, so async callers should use a thread.
+
+    A user the index does not know yet is scored from their own rows, and
+    the index is rebuilt in the background to take them in.
+    """
+    index = get_index()
+    if user_id in index:
+        return index.top_k(user_id, limit)
+    with session_scope() as session:
+        profile = load_profile(session, index, user_id)
+    if profile is None:
+        return []
+    get_index(refresh=True)
+    return index.top_k(user_id, limit, profile=profile)
@@ -0,0 +1,236 @@
+"""Batch pairing for a matching round ("coffee roulette").
+
+Users with open slots in the round window and at least one preference are
+split by location, each location is paired in its own process, and the
+resulting match requests are written in a single bulk insert. Users who
+already have a pending or accepted request in the window sit the round
+out, so running it again for the same window adds nothing.
+"""
+
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import cycle
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, union
+from sqlalchemy.sql.expression import CompoundSelect
+from sqlmodel import Session, select
+
+from app.crud import versions
+from app.crud.match_requests import ACCEPT_STATUSES
+from app.crud.timeslots import naive_utc
+from app.models.match_request import MatchRequest
+from app.models.timeslot import TimeSlot
+from app.models.user import User
+from app.models.user_preference import UserPreference
+from app.models.venue import Venue
+from app.services.matching import CandidateIndex
+
+Slot = Tuple[int, datetime, datetime]  # (slot id, start, end)
+
+
+@dataclass
+class RoundGroup:
+    location: str
+    users: List[Tuple[int, Optional[str]]] = field(default_factory=list)
+    preferences: List[Tuple[int, str, str, int]] = field(default_factory=list)
+    slots: Dict[int, List[Slot]] = field(default_factory=dict)
+
+
+@dataclass
+class Pairing:
+    requester_id: int
+    target_id: int
+    time_slot_id: int
+    proposed_time: datetime
+    score: float
+
+
+@dataclass
+class RoundResult:
+    pairings: List[Pairing] = field(default_factory=list)
+    # Matched pairs left out because neither user's slots contain the other's start.
+    unscheduled: List[Tuple[int, int]] = field(default_factory=list)
+
+
+def _booked(start: datetime, end: datetime) -> CompoundSelect:
+    """Ids of users with a pending or accepted request proposed inside the window."""
+    conditions = (
+        MatchRequest.status.in_(("pending", *ACCEPT_STATUSES)),
+        MatchRequest.proposed_time >= start,
+        MatchRequest.proposed_time < end,
+    )
+    return union(
+        select(MatchRequest.requester_id).where(*conditions),
+        select(MatchRequest.target_id).where(*conditions),
+    )
+
+
+def load_round(session: Session, start: datetime, end: datetime) -> List[RoundGroup]:
+    start, end = naive_utc(start), naive_utc(end)
+    slots: Dict[int, List[Slot]] = defaultdict(list)
+    statement = (
+        select(TimeSlot.id, TimeSlot.user_id, TimeSlot.start_time, TimeSlot.end_time)
+        .where(
+            TimeSlot.status == "available",
+            TimeSlot.start_time >= start,
+            TimeSlot.start_time < end,
+        )
+        .order_by(TimeSlot.start_time)
+    )
+    booked = set(session.exec(_booked(start, end)).scalars())
+    for slot_id, user_id, slot_start, slot_end in session.exec(statement):
+        if user_id not in booked:
+            slots[user_id].append((slot_id, slot_start, slot_end))
+
+    preferences: Dict[int, List[Tuple[int, str, str, int]]] = defaultdict(list)
+    statement = select(
+        UserPreference.user_id,
+        UserPreference.preference_type,
+        UserPreference.preference_value,
+        UserPreference.confidence,
+    )
+    for row in session.exec(statement):
+        if row[0] in slots:
+            preferences[row[0]].append(tuple(row))
+
+    groups: Dict[str, RoundGroup] = {}
+    for user_id, location in session.exec(select(User.id, User.location)):
+        if user_id not in slots or user_id not in preferences:
+            continue
+        key = " ".join((location or "").lower().split())
+        group = groups.setdefault(key, RoundGroup(location=key))
+        group.users.append((user_id, location))
+        group.preferences.extend(preferences[user_id])
+        group.slots[user_id] = slots[user_id]
+    return sorted(groups.values(), key=lambda group: len(group.users), reverse=True)
+
+
+def _greedy_matching(edges: Dict[Tuple[int, int], float]) -> Dict[int, int]:
+    """Heaviest-edge-first matching improved by one pass of 3-edge swaps."""
+    mate: Dict[int, int] = {}
+    for (a, b), _ in sorted(edges.items(), key=lambda item: item[1], reverse=True):
+        if a not in mate and b not in mate:
+            mate[a], mate[b] = b, a
+
+    neighbours: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for (a, b), weight in edges.items():
+        neighbours[a].append((b, weight))
+        neighbours[b].append((a, weight))
+
+    def weight(a: int, b: int) -> float:
+        return edges.get((min(a, b), max(a, b)), 0.0)
+
+    # Replace v-w with u-v and w-x when u and x are both unmatched and it pays.
+    for u in list(neighbours):
+        if u in mate:
+            continue
+        for v, uv in sorted(neighbours[u], key=lambda item: item[1], reverse=True):
+            w = mate.get(v)
+            if w is None:
+                mate[u], mate[v] = v, u
+                break
+            free = [(x, wx) for x, wx in neighbours[w] if x not in mate and x != u]
+            if not free:
+                continue
+            x, wx = max(free, key=lambda item: item[1])
+            if uv + wx > weight(v, w):
+                mate[u], mate[v] = v, u
+                mate[w], mate[x] = x, w
+                break
+    return mate
+
+
+def _meeting_slot(requester: List[Slot], target: List[Slot]) -> Optional[Slot]:
+    """Earliest target slot whose start falls inside one of the requester's slots."""
+    for slot in target:
+        if any(start <= slot[1] < end for _, start, end in requester):
+            return slot
+    return None
+
+
+def pair_group(group: RoundGroup, candidates_per_user: int = 20) -> RoundResult:
+    index = CandidateIndex(
+        group.users,
+        group.preferences,
+        ((user_id, start, end) for user_id, slots in group.slots.items() for _, start, end in slots),
+    )
+    edges: Dict[Tuple[int, int], float] = {}
+    for user_id, _ in group.users:
+        for suggestion in index.top_k(user_id, candidates_per_user):
+            if not suggestion.overlap_hours:
+                continue
+            key = (min(user_id, suggestion.user_id), max(user_id, suggestion.user_id))
+            edges[key] = max(edges.get(key, 0.0), suggestion.score)
+
+    result = RoundResult()
+    for a, b in _greedy_matching(edges).items():
+        if a > b:
+            continue
+        for requester, target in ((a, b), (b, a)):
+            slot = _meeting_slot(group.slots[requester], group.slots[target])
+            if slot:
+                result.pairings.append(
+                    Pairing(
+                        requester_id=requester,
+                        target_id=target,
+                        time_slot_id=slot[0],
+                        proposed_time=slot[1],
+                        score=edges[(a, b)],
+                    )
+                )
+                break
+        else:
+            result.unscheduled.append((a, b))
+    return result
+
+
+def pair_groups(
+    groups: Iterable[RoundGroup], *, workers: Optional[int] = None, candidates_per_user: int = 20
+) -> RoundResult:
+    groups = [group for group in groups if len(group.users) > 1]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(groups) <= 1:
+        results: Iterable[RoundResult] = [pair_group(group, candidates_per_user) for group in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(pair_group, groups, [candidates_per_user] * len(groups)))
+
+    merged = RoundResult()
+    for result in results:
+        merged.pairings.extend(result.pairings)
+        merged.unscheduled.extend(result.unscheduled)
+    return merged
+
+
+def write_pairings(session: Session, pairings: List[Pairing], *, message: str = "") -> int:
+    """Insert one pending match request per pairing in a single transaction."""
+    venue_ids = list(session.exec(select(Venue.id).where(Venue.type == "coffee").order_by(Venue.id)))
+    if not venue_ids:
+        venue_ids = list(session.exec(select(Venue.id).order_by(Venue.id)))
+    if not venue_ids:
+        raise ValueError("At least one venue is required to schedule a round")
+
+    created_at = datetime.utcnow()
+    venues = cycle(venue_ids)
+    rows = [
+        {
+            "requester_id": pairing.requester_id,
+            "target_id": pairing.target_id,
+            "time_slot_id": pairing.time_slot_id,
+            "proposed_time": pairing.proposed_time,
+            "venue_id": next(venues),
+            "status": "pending",
+            "message": message,
+            "created_at": created_at,
+        }
+        for pairing in pairings
+    ]
+    if rows:
+        session.execute(insert(MatchRequest), rows)
+        versions.bump(session, versions.MATCH_REQUESTS)
+        session.commit()
+    return len(rows)
@@ -0,0 +1,256 @@
+"""Nearest-neighbour search over user embeddings.
+
+All vectors sit in one float32 matrix, and rows are unit length, so cosine
+similarity is a single matrix-vector product. Small indexes are scanned in
+full. From ``embedding_ivf_min_rows`` up, an inverted-file layer narrows the
+scan to the rows filed under the ``embedding_ivf_probes`` centroids closest
+to the query, roughly ``probes / sqrt(n)`` of the matrix. Writes in this
+process reach the index through :func:`app.services.embeddings.on_change`.
+Changes made by other processes arrive with the periodic reload. It runs on
+a background thread, keeps the trained centroids and replays the local
+writes it raced with.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.session import session_scope
+from app.models.user import User
+from app.services import embeddings
+
+KMEANS_ITERATIONS = 10
+# Training rows per centroid; more barely moves the centroids.
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_CHUNK = 65536
+
+
+def _train(vectors: np.ndarray, lists: int) -> np.ndarray:
+    """Spherical k-means centroids over a fixed-seed sample of ``vectors``."""
+    rng = np.random.default_rng(0)
+    sample_size = min(len(vectors), lists * KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, size=lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        nearest = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, nearest, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # An empty list keeps its old centroid.
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return centroids.astype(np.float32)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    nearest = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start : start + ASSIGN_CHUNK]
+        nearest[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return nearest
+
+
+class EmbeddingIndex:
+    """Unit vectors by user id, with an optional inverted-file layer for large sets."""
+
+    def __init__(
+        self,
+        rows: Iterable[Tuple[int, bytes]],
+        *,
+        ivf_min_rows: int,
+        probes: int,
+        centroids: Optional[np.ndarray] = None,
+    ) -> None:
+        user_ids: List[int] = []
+        blobs: List[bytes] = []
+        for user_id, blob in rows:
+            # Vectors from another DIMENSIONS would misalign the matrix.
+            if blob is not None and len(blob) == embeddings.BLOB_SIZE:
+                user_ids.append(user_id)
+                blobs.append(blob)
+        size = len(user_ids)
+        capacity = max(size, 1024)
+        self.vectors = np.zeros((capacity, embeddings.DIMENSIONS), dtype=np.float32)
+        self.vectors[:size] = np.frombuffer(b"".join(blobs), dtype="<f4").reshape(size, embeddings.DIMENSIONS)
+        self.user_ids = np.zeros(capacity, dtype=np.int64)
+        self.user_ids[:size] = user_ids
+        self.live = np.zeros(capacity, dtype=bool)
+        self.live[:size] = True
+        self.size = size
+        self.positions: Dict[int, int] = {user_id: pos for pos, user_id in enumerate(user_ids)}
+        self.probes = probes
+        self._lock = threading.Lock()
+
+        self.centroids: Optional[np.ndarray] = None
+        if size >= ivf_min_rows:
+            lists = max(1, int(math.sqrt(size)))
+            if centroids is not None and len(centroids) * 2 > lists and len(centroids) < lists * 2:
+                self.centroids = centroids
+            else:
+                self.centroids = _train(self.vectors[:size], lists)
+            self.assignments = np.full(capacity, -1, dtype=np.int32)
+            self.assignments[:size] = _assign(self.vectors[:size], self.centroids)
+            order = np.argsort(self.assignments[:size], kind="stable").astype(np.int32)
+            bounds = np.searchsorted(self.assignments[:size][order], np.arange(len(self.centroids) + 1))
+            self.lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(self.centroids))]
+            # Positions filed since the lists were built; stale entries are filtered by ``assignments``.
+            self.appended: Dict[int, List[int]] = {}
+
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _grow(self) -> None:
+        capacity = len(self.vectors) * 2
+        self.vectors = np.resize(self.vectors, (capacity, embeddings.DIMENSIONS))
+        self.user_ids = np.resize(self.user_ids, capacity)
+        self.live = np.concatenate([self.live, np.zeros(capacity - len(self.live), dtype=bool)])
+        if self.centroids is not None:
+            self.assignments = np.concatenate(
+                [self.assignments, np.full(capacity - len(self.assignments), -1, dtype=np.int32)]
+            )
+
+    def upsert(self, user_id: int, blob: Optional[bytes]) -> None:
+        """Add, replace or (with ``blob=None``) remove one user's vector."""
+        with self._lock:
+            pos = self.positions.get(user_id)
+            if blob is None or len(blob) != embeddings.BLOB_SIZE:
+                if pos is not None:
+                    self.live[pos] = False
+                    del self.positions[user_id]
+                return
+            if pos is None:
+                if self.size == len(self.vectors):
+                    self._grow()
+                pos = self.size
+                self.size += 1
+                self.positions[user_id] = pos
+                self.user_ids[pos] = user_id
+            self.vectors[pos] = np.frombuffer(blob, dtype="<f4")
+            self.live[pos] = True
+            if self.centroids is not None:
+                nearest = int(np.argmax(self.centroids @ self.vectors[pos]))
+                if nearest != self.assignments[pos]:
+                    self.assignments[pos] = nearest
+                    self.appended.setdefault(nearest, []).append(pos)
+
+    def _scored(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions worth scoring and their scores; removed rows score ``-inf``."""
+        if self.centroids is None:
+            # One pass over the matrix; gathering live rows first would copy all of it.
+            scores = self.vectors[: self.size] @ query
+            scores[~self.live[: self.size]] = -np.inf
+            return np.arange(self.size), scores
+        # A stable sort breaks ties the way ``upsert``'s argmax does, so a vector always probes its own list.
+        nearest = np.argsort(-(self.centroids @ query), kind="stable")[: self.probes]
+        parts = [self.lists[i] for i in nearest.tolist()]
+        moved = [np.asarray(self.appended[i], dtype=np.int32) for i in nearest.tolist() if i in self.appended]
+        candidates = np.concatenate(parts + moved)
+        if moved:
+            # A vector that moved away and back is filed twice.
+            candidates = np.unique(candidates)
+        candidates = candidates[self.live[candidates] & np.isin(self.assignments[candidates], nearest)]
+        return candidates, self.vectors[candidates] @ query
+
+    def search(self, query: np.ndarray, k: int, *, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """The ``k`` most similar users to a unit ``query`` as ``(user_id, cosine)``, best first."""
+        with self._lock:
+            positions, scores = self._scored(query)
+            excluded = self.positions.get(exclude) if exclude is not None else None
+            if excluded is not None:
+                scores[positions == excluded] = -np.inf
+            if len(positions) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                positions, scores = positions[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            # Unrelated (orthogonal) and removed rows are not similar at all.
+            order = order[scores[order] > 0]
+            return [
+                (int(user_id), round(float(score), 4))
+                for user_id, score in zip(self.user_ids[positions[order]].tolist(), scores[order].tolist())
+            ]
+
+
+def build_index(session: Session, *, centroids: Optional[np.ndarray] = None) -> EmbeddingIndex:
+    settings = get_settings()
+    rows = session.exec(select(User.id, User.embedding).where(User.embedding.is_not(None)))
+    return EmbeddingIndex(
+        rows,
+        ivf_min_rows=settings.embedding_ivf_min_rows,
+        probes=settings.embedding_ivf_probes,
+        centroids=centroids,
+    )
+
+
+_index: Optional[EmbeddingIndex] = None
+_index_lock = threading.Lock()
+# Changes seen while a build runs, replayed onto the new index before it is swapped in.
+_pending: Optional[List[Tuple[int, Optional[bytes]]]] = None
+_pending_lock = threading.Lock()
+
+
+def _swap(index: Optional[EmbeddingIndex]) -> None:
+    """Build a replacement for ``index`` and install it; the caller holds ``_index_lock``."""
+    global _index, _pending
+    with _pending_lock:
+        _pending = []
+    try:
+        with session_scope() as session:
+            fresh = build_index(session, centroids=index.centroids if index is not None else None)
+        with _pending_lock:
+            for user_id, blob in _pending:
+                fresh.upsert(user_id, blob)
+            _index = fresh
+    finally:
+        with _pending_lock:
+            _pending = None
+
+
+def _rebuild(index: EmbeddingIndex) -> None:
+    """Reload in the background; the caller holds ``_index_lock``."""
+    try:
+        _swap(index)
+    finally:
+        _index_lock.release()
+
+
+def get_index() -> EmbeddingIndex:
+    """Return the shared index, reloading it once it is older than the TTL.
+
+    Only the very first call waits for a build. As with the matching index,
+    a stale index is reloaded on a background thread while requests keep
+    searching the previous one.
+    """
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                _swap(None)
+        return _index
+    if time.monotonic() - index.built_at >= get_settings().embedding_index_ttl_seconds and (
+        _index_lock.acquire(blocking=False)
+    ):
+        threading.Thread(target=_rebuild, args=(index,), name="embedding-index", daemon=True).start()
+    return index
+
+
+def _apply(user_id: int, blob: Optional[bytes]) -> None:
+    with _pending_lock:
+        if _index is not None:
+            _index.upsert(user_id, blob)
+        if _pending is not None:
+            _pending.append((user_id, blob))
+
+
+embeddings.on_change(_apply)
+
+
+def similar(user_id: int, embedding: bytes, *, k: int = 10) -> List[Tuple[int, float]]:
+    """Users closest to ``embedding``, leaving out ``user_id``; CPU-bound, so async callers should use a thread."""
+    query = np.frombuffer(embedding, dtype="<f4")
+    return get_index().search(query, k, exclude=user_id)
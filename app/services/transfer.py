@@ -0,0 +1,286 @@
+"""Streaming export and import of whole tables as NDJSON or CSV.
+
+Exports read plain column tuples through a server-side cursor and yield
+text in batches, so memory stays flat however large the table is. Imports
+parse a text stream row by row, check each row against the API's create
+schema, and insert it in chunks, one transaction per chunk. A failed import
+reports how many rows were committed before it, so the rest of the file can
+be retried from there.
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Type
+
+from sqlalchemy import DateTime, Float, Integer, func, insert, select, text
+from pydantic import ValidationError
+from sqlalchemy.exc import StatementError
+from sqlmodel import Session, SQLModel
+
+from app.crud import _cache, preference_values, versions
+from app.db.session import new_session, pin_primary
+from app.models.match_request import MatchRequest
+from app.models.timeslot import TimeSlot
+from app.models.user import User
+from app.models.user_preference import UserPreference
+from app.models.venue import Venue
+from app.schemas.match_requests import MatchRequestCreate
+from app.schemas.preferences import PreferenceCreate
+from app.schemas.timeslots import TimeSlotCreate
+from app.schemas.users import UserCreate
+from app.schemas.venues import VenueCreate
+from app.services import embeddings, geo
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Entity:
+    model: Type[SQLModel]
+    collection: str
+    # The API's create schema; every imported row must pass it.
+    schema: Type[SQLModel]
+    # Columns computed from other data; neither exported nor imported.
+    derived: Tuple[str, ...] = ()
+    # Fills ``derived`` or missing columns for imported rows; runs after the last chunk commits.
+    after_import: Optional[Callable[[Session], Any]] = None
+
+    def columns(self) -> List[Any]:
+        table = self.model.__table__  # type: ignore[attr-defined]
+        return [column for column in table.columns if column.name not in self.derived]
+
+
+def _after_user_import(session: Session) -> None:
+    geo.backfill(session, User)
+    embeddings.backfill(session)
+
+
+ENTITIES = {
+    "users": Entity(User, versions.USERS, UserCreate, derived=("embedding",), after_import=_after_user_import),
+    "venues": Entity(Venue, versions.VENUES, VenueCreate, after_import=partial(geo.backfill, model=Venue)),
+    "timeslots": Entity(TimeSlot, versions.TIME_SLOTS, TimeSlotCreate),
+    "matches": Entity(MatchRequest, versions.MATCH_REQUESTS, MatchRequestCreate),
+    "preferences": Entity(
+        UserPreference,
+        versions.PREFERENCES,
+        PreferenceCreate,
+        derived=("value_id",),
+        after_import=preference_values.backfill,
+    ),
+}
+
+
+class TransferError(ValueError):
+    pass
+
+
+class ImportAborted(Exception):
+    """An import stopped at ``error`` after its first ``inserted`` rows were committed."""
+
+    def __init__(self, error: Exception, inserted: int) -> None:
+        super().__init__(str(error))
+        self.error = error
+        self.inserted = inserted
+
+
+def resolve(entity: str, fmt: str) -> Entity:
+    if entity not in ENTITIES:
+        raise TransferError(f"Unknown entity {entity!r}; expected one of {', '.join(ENTITIES)}")
+    if fmt not in FORMATS:
+        raise TransferError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return ENTITIES[entity]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def export_chunks(entity: str, fmt: str, *, batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    """Yield ``entity`` as text, one chunk per ``batch_size`` rows, from a dedicated session."""
+    target = resolve(entity, fmt)
+    columns = target.columns()
+    names = [column.name for column in columns]
+    table = target.model.__table__  # type: ignore[attr-defined]
+    statement = select(*columns).order_by(table.c.id).execution_options(yield_per=batch_size)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(names)
+
+    with new_session() as session:
+        for partition in session.execute(statement).partitions():
+            for row in partition:
+                if writer is not None:
+                    writer.writerow(
+                        "" if value is None else value.isoformat() if isinstance(value, datetime) else value
+                        for value in row
+                    )
+                else:
+                    buffer.write(json.dumps(dict(zip(names, row)), default=_json_default))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _parse(fmt: str, stream: TextIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(line number, row)``; a CSV row's number is the line it ends on."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise TransferError(f"Line {line_number}: {exc.msg}") from exc
+        if not isinstance(row, dict):
+            raise TransferError(f"Line {line_number}: expected a JSON object")
+        yield line_number, row
+
+
+_CONVERTERS = ((DateTime, datetime.fromisoformat), (Integer, int), (Float, float))
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+def _row_builder(target: Entity) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Coerce text values to column types, fill model defaults for missing columns and check the create schema."""
+    model = target.model
+    converters: Dict[str, Optional[Callable[[str], Any]]] = {}
+    for column in target.columns():
+        converters[column.name] = next(
+            (convert for kind, convert in _CONVERTERS if isinstance(column.type, kind)), None
+        )
+    if hasattr(model, "model_fields"):
+        optional = {name: field for name, field in model.model_fields.items() if not field.is_required()}
+    else:
+        optional = {name: field for name, field in model.__fields__.items() if not field.required}
+    defaults = {
+        name: field.default_factory or (lambda value=field.default: value)
+        for name, field in optional.items()
+        if name in converters
+    }
+    nullable = {column.name for column in target.columns() if column.nullable}
+    schema = target.schema
+    checked = set(schema.model_fields if hasattr(schema, "model_fields") else schema.__fields__)
+
+    def validate(data: Dict[str, Any]) -> Dict[str, Any]:
+        if hasattr(schema, "model_validate"):
+            return schema.model_validate(data).model_dump(exclude_unset=True)
+        return schema.parse_obj(data).dict(exclude_unset=True)
+
+    def build(raw: Dict[str, Any]) -> Dict[str, Any]:
+        row: Dict[str, Any] = {}
+        for name, convert in converters.items():
+            value = raw.get(name)
+            if value == "" and (name in nullable or name == "id"):
+                value = None
+            if value is None:
+                if name == "id":
+                    continue
+                if name in defaults and name not in raw:
+                    value = defaults[name]()
+            elif isinstance(value, (dict, list)):
+                raise TransferError(f"Invalid value for {name!r}: {value!r}")
+            elif convert is not None and isinstance(value, str):
+                try:
+                    value = convert(value)
+                except ValueError as exc:
+                    raise TransferError(f"Invalid value for {name!r}: {value!r}") from exc
+            row[name] = value
+        try:
+            # Only what the row set goes back; schema defaults must not replace the model's.
+            row.update(validate({name: value for name, value in row.items() if name in checked}))
+        except ValidationError as exc:
+            raise TransferError(_validation_message(exc)) from exc
+        return row
+
+    return build
+
+
+def import_rows(entity: str, fmt: str, stream: TextIO, *, chunk_size: int = BATCH_SIZE) -> int:
+    """Insert every row in ``stream``, committing each chunk; returns the number of rows inserted.
+
+    Rows keep their ``id`` when one is given, so an export can be restored
+    as-is. A failing chunk is rolled back; chunks before it stay committed,
+    get their derived columns, and are counted in the :class:`ImportAborted`
+    raised for the failure.
+    """
+    target = resolve(entity, fmt)
+    table = target.model.__table__  # type: ignore[attr-defined]
+    build = _row_builder(target)
+
+    def numbered_rows() -> Iterator[Dict[str, Any]]:
+        for line_number, raw in _parse(fmt, stream):
+            try:
+                yield build(raw)
+            except TransferError as exc:
+                raise TransferError(f"Line {line_number}: {exc}") from exc
+
+    rows = numbered_rows()
+
+    inserted = 0
+    explicit_ids = False
+    failure: Optional[Exception] = None
+    with new_session() as session:
+        try:
+            try:
+                while True:
+                    chunk: List[Dict[str, Any]] = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    # executemany needs one key set per statement
+                    with_ids = [row for row in chunk if "id" in row]
+                    without_ids = [row for row in chunk if "id" not in row]
+                    for group in (with_ids, without_ids):
+                        if group:
+                            session.execute(insert(table), group)
+                    explicit_ids = explicit_ids or bool(with_ids)
+                    versions.bump(session, target.collection)
+                    session.commit()
+                    inserted += len(chunk)
+            # The sqlite3 driver raises a bare OverflowError for integers past 64 bits.
+            except (TransferError, StatementError, OverflowError) as exc:
+                session.rollback()
+                failure = exc
+            if explicit_ids and session.get_bind().dialect.name == "postgresql":
+                _reset_sequence(session, table)
+                session.commit()
+            if target.after_import is not None and inserted:
+                target.after_import(session)
+                versions.bump(session, target.collection)
+                session.commit()
+        finally:
+            _cache.invalidate_all(target.model)
+    if failure is not None:
+        raise ImportAborted(failure, inserted) from failure
+    return inserted
+
+
+def _reset_sequence(session: Any, table: Any) -> None:
+    # setval is a write hidden in a SELECT; a replica would reject it.
+    pin_primary(session)
+    max_id = session.execute(select(func.max(table.c.id))).scalar()
+    if max_id is not None:
+        session.execute(
+            text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :value)"),
+            {"table": table.name, "value": max_id},
+        )
+
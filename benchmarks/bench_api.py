@@ -0,0 +1,338 @@
+"""Latency and throughput of the API hot paths at several data sizes, checked against a baseline.
+
+    python -m benchmarks.bench_api --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks.bench_api --baseline benchmarks/baseline.json --update-baseline
+    python -m benchmarks.bench_api --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.bench_api --server uvicorn --concurrency 8
+
+Each size gets a database from ``scripts.generate_data``, cached in
+``--data-dir`` and copied before every run so writes never leak into the
+next one. ``--server inprocess`` drives the app through ``TestClient`` in a
+child process, which keeps import-time engines apart between sizes.
+``--server uvicorn`` starts a local uvicorn instead and sends real HTTP.
+Environment settings such as ``ASYNC_DB`` or ``CACHE_BACKEND`` pass through
+to the app.
+
+The run exits non-zero when a scenario answers with an unexpected status,
+or when ``--metric`` is more than ``--threshold`` above the baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from benchmarks.load_profile import API, DEFAULT_PROFILE, LoadProfile, Operation, Request
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+START_DAY = date(2030, 1, 7)
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+
+def scenarios(counts: Dict[str, int]) -> Dict[str, Sequence[Operation]]:
+    """Single-operation mixes for each hot path, plus the full production mix as ``mixed``."""
+    venues, slots = counts["venues"], counts["time_slots"]
+
+    def login(params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"email": f"user{params['user_id']}@example.com"}
+
+    def match_validation(params: Dict[str, Any]) -> Dict[str, Any]:
+        # Passes the user and venue lookups, then fails the time slot check, so nothing is written.
+        return {
+            "requester_id": params["user_id"],
+            "target_id": params["other_id"],
+            "venue_id": params["user_id"] % venues + 1,
+            "time_slot_id": params["user_id"] * 7919 % slots + 1,
+            "proposed_time": params["start"],
+        }
+
+    single = [
+        Operation("login", 1, "POST", API + "/auth/login", body=login),
+        Operation("match_validation", 1, "POST", API + "/matches/", body=match_validation),
+        Operation("list_users", 1, "GET", API + "/users/?limit=50"),
+        Operation("list_venues", 1, "GET", API + "/venues/?limit=50"),
+        Operation("received", 1, "GET", API + "/matches/received/{user_id}?expand=requester,venue"),
+        Operation("sent", 1, "GET", API + "/matches/sent/{user_id}"),
+        Operation("preferences", 1, "GET", API + "/preferences/{user_id}"),
+        Operation("user_slots", 1, "GET", API + "/timeslots/?user_id={user_id}"),
+        Operation("available_slots", 1, "GET", API + "/timeslots/?limit=50"),
+        Operation(
+            "mutual_slots",
+            1,
+            "GET",
+            API + "/timeslots/mutual?user_ids={user_id}&user_ids={other_id}&start={start}&end={end}",
+        ),
+    ]
+    mixes: Dict[str, Sequence[Operation]] = {operation.name: [operation] for operation in single}
+    mixes["mixed"] = DEFAULT_PROFILE
+    return mixes
+
+
+EXPECTED: Dict[str, Set[int]] = {"match_validation": {400}, "create_slot": {201}}
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int) -> Dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "mean_ms": float(values.mean()),
+    }
+
+
+def measure(client: Any, requests: Sequence[Request], *, warmup: int, concurrency: int) -> Dict[str, float]:
+    """Send ``requests`` through ``client`` (an ``httpx.Client`` or ``TestClient``) and time each one."""
+    for request in requests[:warmup]:
+        client.request(request.method, request.path, json=request.json)
+    timed = requests[warmup:]
+
+    def run(batch: Sequence[Request]) -> tuple:
+        latencies: List[float] = []
+        errors = 0
+        for request in batch:
+            began = time.perf_counter()
+            response = client.request(request.method, request.path, json=request.json)
+            latencies.append(time.perf_counter() - began)
+            if response.status_code not in EXPECTED.get(request.name, {200}):
+                errors += 1
+        return latencies, errors
+
+    began = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(run, [timed[worker::concurrency] for worker in range(concurrency)]))
+    else:
+        results = [run(timed)]
+    elapsed = time.perf_counter() - began
+    return summarize([value for latencies, _ in results for value in latencies], elapsed, sum(e for _, e in results))
+
+
+def run_scenarios(client: Any, spec: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    counts = spec["counts"]
+    start = datetime.combine(date.fromisoformat(spec["start"]), datetime.min.time())
+    results = {}
+    for name, operations in scenarios(counts).items():
+        if spec["scenarios"] and name not in spec["scenarios"]:
+            continue
+        profile = LoadProfile(counts["users"], operations=operations, seed=spec["seed"], start=start)
+        requests = list(profile.sample(spec["warmup"] + spec["requests"]))
+        results[name] = measure(client, requests, warmup=spec["warmup"], concurrency=spec["concurrency"])
+    return results
+
+
+def worker(spec: Dict[str, Any]) -> None:
+    """Child process for ``--server inprocess``; ``SQLITE_FILE`` is already set."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        results = run_scenarios(client, spec)
+    print(json.dumps(results))
+
+
+def run_inprocess(database: Path, spec: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_api", "--worker", json.dumps(spec)],
+        env={**os.environ, "SQLITE_FILE": str(database)},
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(database: Path, spec: Dict[str, Any], workers: int) -> Dict[str, Dict[str, float]]:
+    import httpx
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers)]
+        + ["--log-level", "warning", "--no-access-log"],
+        env={**os.environ, "SQLITE_FILE": str(database)},
+    )
+    try:
+        limits = httpx.Limits(max_connections=spec["concurrency"], max_keepalive_connections=spec["concurrency"])
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    client.get("/")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise SystemExit("uvicorn did not start")
+                    time.sleep(0.2)
+            return run_scenarios(client, spec)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def dataset(data_dir: Path, users: int, seed: int, start: date) -> tuple:
+    """Return the cached database for ``users`` and its row counts, generating it on first use."""
+    from scripts.generate_data import generate
+
+    path = data_dir / f"bench-{users}-{seed}-{start.isoformat()}.db"
+    counts_path = path.with_suffix(".json")
+    if not path.exists() or not counts_path.exists():
+        print(f"Generating {users:,} users into {path}", file=sys.stderr)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        counts = generate(path, users=users, start_day=start, seed=seed)
+        counts_path.write_text(json.dumps(counts))
+    return path, json.loads(counts_path.read_text())
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], metric: str, threshold: float
+) -> List[str]:
+    """Describe every scenario whose ``metric`` is more than ``threshold`` above the baseline."""
+    regressions = []
+    for size, scenarios_now in current["sizes"].items():
+        before = baseline.get("sizes", {}).get(size, {})
+        for name, result in scenarios_now.items():
+            if name not in before:
+                continue
+            old, new = before[name][metric], result[metric]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(f"{size} users / {name}: {metric} {old:.2f} -> {new:.2f} (+{new / old - 1:.0%})")
+    return regressions
+
+
+def print_table(size: str, results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]], metric: str) -> None:
+    before = (baseline or {}).get("sizes", {}).get(size, {})
+    print(f"\n{int(size):,} users")
+    print(f"{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'vs base':>10}")
+    for name, result in results.items():
+        delta = ""
+        if name in before and before[name][metric] > 0:
+            delta = f"{result[metric] / before[name][metric] - 1:+.0%}"
+        print(
+            f"{name:<18}{result['rps']:>10.0f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{result['errors']:>8}{delta:>10}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Users per dataset")
+    parser.add_argument("--server", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--requests", type=int, default=300, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="Untimed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads")
+    parser.add_argument("--scenarios", nargs="*", default=[], help="Run only these scenarios")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, default=START_DAY, help="First day of generated slots")
+    parser.add_argument("--data-dir", type=Path, default=Path(tempfile.gettempdir()) / "coffee-matcher-bench")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results to --baseline")
+    parser.add_argument("--metric", choices=METRICS, default="p95_ms")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown, e.g. 0.2 = 20%%")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.worker:
+        worker(json.loads(args.worker))
+        return
+    if args.update_baseline and not args.baseline:
+        raise SystemExit("--update-baseline needs --baseline")
+
+    baseline = None
+    if args.baseline and args.baseline.exists() and not args.update_baseline:
+        baseline = json.loads(args.baseline.read_text())
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "created": datetime.utcnow().isoformat(timespec="seconds"),
+            "server": args.server,
+            "workers": args.workers if args.server == "uvicorn" else None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "start": args.start.isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "async_db": os.environ.get("ASYNC_DB", ""),
+        },
+        "sizes": {},
+    }
+    errors = 0
+    for users in args.sizes:
+        source, counts = dataset(args.data_dir, users, args.seed, args.start)
+        spec = {
+            "counts": counts,
+            "start": args.start.isoformat(),
+            "seed": args.seed,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "scenarios": args.scenarios,
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / "bench.db"
+            shutil.copyfile(source, database)
+            if args.server == "uvicorn":
+                results = run_uvicorn(database, spec, args.workers)
+            else:
+                results = run_inprocess(database, spec)
+        report["sizes"][str(users)] = results
+        errors += sum(int(result["errors"]) for result in results.values())
+        print_table(str(users), results, baseline, args.metric)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline written to {args.baseline}")
+
+    failed = False
+    if errors:
+        print(f"\n{errors} requests returned an unexpected status")
+        failed = True
+    if baseline is not None:
+        if baseline.get("meta", {}).get("server") != args.server:
+            print(f"\nNote: baseline was recorded with --server {baseline['meta'].get('server')}")
+        regressions = compare(report, baseline, args.metric, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            failed = True
+        else:
+            print(f"\nNo {args.metric} regressions beyond {args.threshold:.0%}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
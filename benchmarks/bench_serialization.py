@@ -0,0 +1,102 @@
+"""Time large list responses through the default and the ``fast_json`` serialization paths.
+
+    python -m benchmarks.bench_serialization --rows 1000 10000
+
+The default path loads ORM entities, validates them against the response
+model and encodes them with the stdlib ``json``. The fast path selects the
+read schema's columns and encodes the row dicts with orjson. Both paths run
+in one process against a copy of a ``scripts.generate_data`` database, with
+the read-through cache off so every request queries. The two bodies are
+checked to be identical.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.bench_api import START_DAY, dataset
+
+PATHS = {"users": "/api/v1/users/?limit={rows}", "timeslots": "/api/v1/timeslots/?limit={rows}"}
+
+
+def timed(client: Any, path: str, repeat: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        client.get(path)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"{path} answered {response.status_code}: {response.text[:200]}")
+    return samples
+
+
+def run(database: Path, rows: List[int], repeat: int, warmup: int) -> List[Dict[str, Any]]:
+    # Settings are read at import time, so configure the app before importing it.
+    os.environ.update(
+        {"SQLITE_FILE": str(database), "CACHE_BACKEND": "none", "MAX_PAGE_SIZE": str(max(rows))}
+    )
+    from fastapi.testclient import TestClient
+
+    from app.core.config import get_settings
+    from app.main import app
+
+    settings = get_settings()
+    results = []
+    with TestClient(app) as client:
+        for count in rows:
+            for name, template in PATHS.items():
+                path = template.format(rows=count)
+                timings: Dict[bool, List[float]] = {}
+                bodies = {}
+                for fast in (False, True):
+                    settings.fast_json = fast
+                    bodies[fast] = client.get(path).json()
+                    timings[fast] = timed(client, path, repeat, warmup)
+                if bodies[False] != bodies[True]:
+                    raise SystemExit(f"{path}: fast path body differs from the default one")
+                default, fast = statistics.median(timings[False]), statistics.median(timings[True])
+                results.append(
+                    {
+                        "endpoint": name,
+                        "rows": len(bodies[True]["items"]),
+                        "default_ms": default,
+                        "fast_ms": fast,
+                        "speedup": default / fast,
+                    }
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Page sizes to request")
+    parser.add_argument("--users", type=int, default=10000, help="Users in the generated dataset")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed requests per path and mode")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, default=Path(tempfile.gettempdir()) / "coffee-matcher-bench")
+    args = parser.parse_args()
+
+    source, _ = dataset(args.data_dir, args.users, args.seed, START_DAY)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        shutil.copyfile(source, database)
+        results = run(database, args.rows, args.repeat, args.warmup)
+
+    print(f"{'endpoint':<12}{'rows':>8}{'default ms':>12}{'fast ms':>10}{'speedup':>9}")
+    for result in results:
+        print(
+            f"{result['endpoint']:<12}{result['rows']:>8}{result['default_ms']:>12.1f}"
+            f"{result['fast_ms']:>10.1f}{result['speedup']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Compare SQLite engine setups under mixed read/write traffic from a thread pool.
+
+    python -m benchmarks.bench_sqlite_tuning --threads 16 --seconds 10
+
+Each configuration gets a fresh database seeded with users and slots. Worker
+threads then run a mix of reads (user by id, a user's slots) and writes
+(insert a slot, update a slot) for a fixed time. The report lists
+operations per second and how many operations failed with
+``database is locked``.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import Settings
+from app.db.session import RoutingSession, create_db_engine
+from app.models.match_request import MatchRequest  # noqa: F401
+from app.models.timeslot import TimeSlot
+from app.models.user import User
+from app.models.user_preference import UserPreference  # noqa: F401
+from app.models.venue import Venue  # noqa: F401
+
+SEED_USERS = 2000
+SLOTS_PER_USER = 5
+
+
+def _baseline(settings: Settings) -> tuple[Engine, Optional[Engine]]:
+    # What app/db/session.py used to build: default pool, rollback journal.
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    return engine, None
+
+
+def _tuned(settings: Settings) -> tuple[Engine, Optional[Engine]]:
+    return create_db_engine(settings), None
+
+
+def _single_writer(settings: Settings) -> tuple[Engine, Optional[Engine]]:
+    return create_db_engine(settings), create_db_engine(settings, writer=True)
+
+
+CONFIGS: Dict[str, Callable[[Settings], tuple[Engine, Optional[Engine]]]] = {
+    "baseline": _baseline,
+    "tuned": _tuned,
+    "tuned+single-writer": _single_writer,
+}
+
+
+def _seed(engine: Engine) -> None:
+    SQLModel.metadata.create_all(engine)
+    base = datetime(2030, 1, 1, 9)
+    with Session(engine) as session:
+        session.execute(
+            insert(User),
+            [{"name": f"User {i}", "email": f"user{i}@example.com"} for i in range(1, SEED_USERS + 1)],
+        )
+        session.execute(
+            insert(TimeSlot),
+            [
+                {
+                    "user_id": user_id,
+                    "start_time": base + timedelta(hours=slot),
+                    "end_time": base + timedelta(hours=slot, minutes=30),
+                    "status": "available",
+                }
+                for user_id in range(1, SEED_USERS + 1)
+                for slot in range(SLOTS_PER_USER)
+            ],
+        )
+        session.commit()
+
+
+def _operation(session: Session, rng: random.Random, write_ratio: float) -> None:
+    user_id = rng.randint(1, SEED_USERS)
+    if rng.random() >= write_ratio:
+        if rng.random() < 0.5:
+            session.get(User, user_id)
+        else:
+            list(session.exec(select(TimeSlot).where(TimeSlot.user_id == user_id)))
+        return
+
+    if rng.random() < 0.5:
+        start = datetime(2030, 2, 1) + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        session.add(TimeSlot(user_id=user_id, start_time=start, end_time=start + timedelta(minutes=30)))
+    else:
+        slot = session.exec(select(TimeSlot).where(TimeSlot.user_id == user_id)).first()
+        if slot:
+            slot.status = "booked" if slot.status == "available" else "available"
+            session.add(slot)
+    session.commit()
+
+
+def run_config(name: str, threads: int, seconds: float, write_ratio: float) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(sqlite_file=os.path.join(tmp, "bench.db"))
+        engine, writer = CONFIGS[name](settings)
+        _seed(writer or engine)
+
+        counts = {"ops": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker(seed: int) -> None:
+            rng = random.Random(seed)
+            ops = locked = 0
+            while time.perf_counter() < deadline:
+                with RoutingSession(engine, writer=writer) as session:
+                    try:
+                        _operation(session, rng, write_ratio)
+                        ops += 1
+                    except OperationalError as exc:
+                        if "locked" not in str(exc):
+                            raise
+                        locked += 1
+            with lock:
+                counts["ops"] += ops
+                counts["locked"] += locked
+
+        pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        engine.dispose()
+        if writer is not None:
+            writer.dispose()
+        return {"ops_per_second": counts["ops"] / seconds, "locked_errors": counts["locked"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    args = parser.parse_args()
+
+    print(f"{'config':<22}{'ops/s':>12}{'locked':>10}")
+    for name in args.configs:
+        result = run_config(name, args.threads, args.seconds, args.write_ratio)
+        print(f"{name:<22}{result['ops_per_second']:>12.0f}{result['locked_errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
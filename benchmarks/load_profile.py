@@ -0,0 +1,107 @@
+"""Weighted request mix for load tests against a database from ``scripts.generate_data``.
+
+The weights follow the shape of production traffic: mostly profile, venue
+and listing reads, some availability lookups, and a trickle of writes.
+Acting users are drawn from a Zipf-like distribution, so a small set of
+hot users dominates, as it does in production. Sampling is deterministic
+for a given seed.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+API = "/api/v1"
+
+
+@dataclass(frozen=True)
+class Request:
+    name: str
+    method: str
+    path: str
+    json: Optional[Any] = None
+
+
+@dataclass(frozen=True)
+class Operation:
+    name: str
+    weight: float
+    method: str
+    # Formatted with user_id, other_id, start and end.
+    path: str
+    body: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+
+def _new_slot(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"user_id": params["user_id"], "start_time": params["slot_start"], "end_time": params["slot_end"]}
+
+
+DEFAULT_PROFILE: Sequence[Operation] = (
+    Operation("get_user", 25, "GET", API + "/users/{user_id}"),
+    Operation("list_users", 8, "GET", API + "/users/?limit=50"),
+    Operation("list_venues", 8, "GET", API + "/venues/?limit=50"),
+    Operation("bootstrap", 6, "GET", API + "/me/bootstrap/{user_id}?limit=50"),
+    Operation("user_slots", 12, "GET", API + "/timeslots/?user_id={user_id}"),
+    Operation("received", 10, "GET", API + "/matches/received/{user_id}?expand=requester,venue"),
+    Operation("sent", 6, "GET", API + "/matches/sent/{user_id}?expand=target,venue"),
+    Operation("preferences", 5, "GET", API + "/preferences/{user_id}"),
+    Operation("suggestions", 4, "GET", API + "/matches/suggestions/{user_id}?limit=10"),
+    Operation(
+        "mutual",
+        4,
+        "GET",
+        API + "/timeslots/mutual?user_ids={user_id}&user_ids={other_id}&start={start}&end={end}",
+    ),
+    Operation("create_slot", 3, "POST", API + "/timeslots/", body=_new_slot),
+)
+
+
+class LoadProfile:
+    def __init__(
+        self,
+        users: int,
+        *,
+        operations: Sequence[Operation] = DEFAULT_PROFILE,
+        seed: int = 0,
+        start: Optional[datetime] = None,
+        days: int = 14,
+        skew: float = 0.8,
+    ) -> None:
+        self.users = users
+        self.operations = list(operations)
+        self.seed = seed
+        self.start = start or datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        self.days = days
+        weights = np.asarray([operation.weight for operation in self.operations], dtype=float)
+        self.operation_weights = weights / weights.sum()
+        rank_weights = 1.0 / np.arange(1, users + 1) ** skew
+        self.user_weights = rank_weights / rank_weights.sum()
+
+    def sample(self, count: int) -> Iterator[Request]:
+        """Yield ``count`` requests; the same seed and count always yield the same sequence."""
+        rng = np.random.default_rng(self.seed)
+        # Which users are hot is itself seeded, independent of id order.
+        ranking = rng.permutation(np.arange(1, self.users + 1))
+        operations = rng.choice(len(self.operations), size=count, p=self.operation_weights)
+        actors = ranking[rng.choice(self.users, size=count, p=self.user_weights)]
+        others = rng.integers(1, self.users + 1, size=count)
+        day_offsets = rng.integers(0, self.days, size=count)
+        half_hours = rng.integers(0, 18, size=count)
+        window = timedelta(days=self.days)
+        for index, user_id, other_id, day, half_hour in zip(
+            operations.tolist(), actors.tolist(), others.tolist(), day_offsets.tolist(), half_hours.tolist()
+        ):
+            operation = self.operations[index]
+            slot_start = self.start + timedelta(days=day, hours=9, minutes=30 * half_hour)
+            params = {
+                "user_id": user_id,
+                "other_id": other_id if other_id != user_id else user_id % self.users + 1,
+                "start": self.start.isoformat(),
+                "end": (self.start + window).isoformat(),
+                "slot_start": slot_start.isoformat(),
+                "slot_end": (slot_start + timedelta(minutes=30)).isoformat(),
+            }
+            body = operation.body(params) if operation.body else None
+            yield Request(operation.name, operation.method, operation.path.format(**params), body)
@@ -0,0 +1,18 @@
+"""Gunicorn settings for production.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+The app is imported once in the master and forked into each worker. Import
+builds no database engines. They are created in each worker on first use,
+and ``app.db.session`` drops any pooled connections a worker inherits across
+the fork. Every worker runs the app's lifespan, so set
+``INIT_DB_ON_STARTUP=false`` once the schema exists.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
@@ -0,0 +1,80 @@
+"""Check how long a worker takes to import and start the app.
+
+    python -m scripts.check_startup --budget-ms 1500
+
+Imports ``app.main`` in a fresh interpreter under ``python -X importtime``
+and lists the slowest modules by cumulative time. It also checks that the
+import left no database engine built and times the app's startup hook.
+Exits non-zero when the import exceeds ``--budget-ms`` or built an engine,
+so it can gate CI. Compare budgets on the same machine only.
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+PROBE = """
+import time
+import app.main
+from app.db import session
+print("engines-built", session._engines is not None)
+import asyncio
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        print("startup-ms", (time.perf_counter() - begun) * 1000)
+begun = time.perf_counter()
+asyncio.run(start())
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Fail when importing app.main takes longer")
+    parser.add_argument("--top", type=int, default=15, help="How many modules to list")
+    parser.add_argument("--skip-startup", action="store_true", help="Only import; do not run the startup hook")
+    return parser.parse_args()
+
+
+def parse_importtime(report: str) -> List[Tuple[str, float, float]]:
+    """``(module, self_ms, cumulative_ms)`` for each line of an ``-X importtime`` report."""
+    modules = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(own) / 1000, int(cumulative) / 1000))
+    return modules
+
+
+def run() -> None:
+    args = parse_args()
+    probe = PROBE if not args.skip_startup else PROBE.split("import asyncio", 1)[0]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing app.main failed:\n{result.stderr[-2000:]}")
+
+    modules = parse_importtime(result.stderr)
+    total = next(cumulative for name, _, cumulative in modules if name == "app.main")
+    print(f"{'module':<50} {'self ms':>9} {'cum ms':>9}")
+    for name, own, cumulative in sorted(modules, key=lambda module: module[2], reverse=True)[: args.top]:
+        print(f"{name:<50} {own:>9.1f} {cumulative:>9.1f}")
+
+    output = dict(line.split(" ", 1) for line in result.stdout.splitlines() if " " in line)
+    print(f"\nimport app.main: {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if "startup-ms" in output:
+        print(f"startup hook: {float(output['startup-ms']):.0f} ms")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import took {total:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if output.get("engines-built") != "False":
+        failures.append("importing app.main built a database engine")
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,38 @@
+"""Fill in missing embeddings for users from their ``ai_analysis_json``.
+
+    python -m scripts.embed_users
+
+Users written through the API are embedded as they are saved. This covers
+rows from before the embedding column existed and raw loads. Running
+workers pick the new vectors up at their next index reload.
+"""
+
+import argparse
+import time
+
+from app.crud import _cache, versions
+from app.db.session import init_db, session_scope
+from app.models.user import User
+from app.services import embeddings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=embeddings.BACKFILL_BATCH)
+    return parser.parse_args()
+
+
+def run() -> None:
+    args = parse_args()
+    init_db()
+    started = time.perf_counter()
+    with session_scope() as session:
+        filled = embeddings.backfill(session, batch_size=args.batch_size)
+        if filled:
+            versions.bump(session, versions.USERS)
+    _cache.invalidate_all(User)
+    print(f"Embedded {filled} users ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,404 @@
+"""Generate a large synthetic dataset for load and performance testing.
+
+    python -m scripts.generate_data --users 1000000 --seed 7 --output perf.db
+
+Locations, preference values, venue popularity and match targets follow
+skewed (Zipf-like) distributions. Rows are written with ``executemany`` on a
+raw SQLite connection, with secondary indexes dropped during the load and
+rebuilt at the end. The same ``--seed`` and ``--start`` always produce the
+same database.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import SQLModel
+
+from app.crud.preference_values import normalize
+from app.db import fts, rtree
+from app.services import embeddings, geo
+
+CHUNK_USERS = 50_000
+
+CITIES = [
+    "San Francisco, CA", "New York, NY", "Seattle, WA", "Austin, TX", "Boston, MA",
+    "Los Angeles, CA", "Chicago, IL", "Denver, CO", "Portland, OR", "Atlanta, GA",
+    "Miami, FL", "Washington, DC", "San Diego, CA", "Philadelphia, PA", "Minneapolis, MN",
+    "Salt Lake City, UT", "Nashville, TN", "Raleigh, NC", "Pittsburgh, PA", "Phoenix, AZ",
+    "Toronto, ON", "Vancouver, BC", "London, UK", "Berlin, DE", "Amsterdam, NL",
+    "Paris, FR", "Dublin, IE", "Singapore, SG", "Sydney, AU", "Tokyo, JP",
+]
+# Standard deviation in degrees (~3 km) of points scattered around each city's centre.
+SCATTER_DEGREES = 0.03
+PREFERENCES = {
+    "topic": [
+        "machine learning", "distributed systems", "product management", "design", "startups",
+        "data engineering", "security", "mobile", "frontend", "devops", "climate tech",
+        "fintech", "healthcare", "robotics", "open source", "career growth", "leadership",
+        "compilers", "databases", "web3",
+    ],
+    "coffee": ["espresso", "latte", "cold brew", "pour over", "cappuccino", "americano", "tea", "matcha"],
+    "cuisine": ["japanese", "italian", "mexican", "thai", "indian", "korean", "vegan", "french", "chinese"],
+    "industry": ["saas", "consumer", "enterprise", "research", "gaming", "media", "education", "retail"],
+}
+BIOS = [
+    "Engineer who loves talking about {topic}.",
+    "Working on {topic}; always happy to grab a coffee.",
+    "Curious about {topic} and good espresso.",
+    "Building things in {topic}. Ask me about side projects.",
+]
+MEETING_STYLES = ["one-on-one", "small group", "walk and talk", "remote"]
+SENIORITY = ["junior", "mid", "senior", "lead"]
+SLOT_STATUSES = (["available", "booked"], [0.85, 0.15])
+MATCH_STATUSES = (["pending", "accepted", "rejected"], [0.5, 0.35, 0.15])
+MATCH_COLUMNS = (
+    "requester_id", "target_id", "time_slot_id", "proposed_time", "venue_id", "status", "message", "created_at",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="perf.db", help="SQLite file to create")
+    parser.add_argument("--force", action="store_true", help="Overwrite --output if it exists")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--venues-per-user", type=float, default=0.01)
+    parser.add_argument("--preferences-per-user", type=float, default=4.0, help="Poisson mean")
+    parser.add_argument("--slots-per-user", type=float, default=6.0, help="Poisson mean")
+    parser.add_argument("--matches-per-user", type=float, default=2.0, help="Poisson mean")
+    parser.add_argument("--days", type=int, default=14, help="Slots are spread over this many days")
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=None,
+        help="First day of the slot window (defaults to today; pin it for identical databases)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def sql_datetimes(values: np.ndarray) -> List[str]:
+    """Format datetime64 values exactly as SQLAlchemy stores them in SQLite."""
+    text = np.datetime_as_string(values.astype("datetime64[us]"), unit="us")
+    return np.char.replace(text, "T", " ").tolist()
+
+
+def user_chunks(total: int) -> Iterator[Tuple[int, int]]:
+    for first in range(1, total + 1, CHUNK_USERS):
+        yield first, min(first + CHUNK_USERS, total + 1)
+
+
+def scatter(rng: np.random.Generator, cities: List[int]) -> Iterator[Tuple[float, float]]:
+    """A point near each city's gazetteer coordinates."""
+    centres = np.array([geo.geocode(city) for city in CITIES])[cities]
+    points = centres + rng.normal(0.0, SCATTER_DEGREES, size=centres.shape)
+    return ((round(latitude, 6), round(longitude, 6)) for latitude, longitude in points.tolist())
+
+
+def analyses(rng: np.random.Generator, topic_idx: List[int]) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """An ``ai_analysis_json`` payload per user, led by its bio topic, with the embedding it yields."""
+    topics = PREFERENCES["topic"]
+    others = rng.choice(len(topics), size=(len(topic_idx), 2), p=zipf_weights(len(topics))).tolist()
+    styles = rng.integers(0, len(MEETING_STYLES), size=len(topic_idx)).tolist()
+    levels = rng.integers(0, len(SENIORITY), size=len(topic_idx)).tolist()
+    for topic, extra, style, level in zip(topic_idx, others, styles, levels):
+        interests = list(dict.fromkeys(topics[index] for index in (topic, *extra)))
+        payload = json.dumps(
+            {"interests": interests, "meeting_style": MEETING_STYLES[style], "seniority": SENIORITY[level]}
+        )
+        vector = embeddings.embed(payload)
+        yield payload, embeddings.to_blob(vector) if vector is not None else None
+
+
+def generate_users(
+    rng: np.random.Generator,
+    places: np.random.Generator,
+    analysis: np.random.Generator,
+    first: int,
+    stop: int,
+    city_weights: np.ndarray,
+) -> List[tuple]:
+    ids = np.arange(first, stop)
+    cities = rng.choice(len(CITIES), size=len(ids), p=city_weights).tolist()
+    topics = PREFERENCES["topic"]
+    topic_idx = rng.choice(len(topics), size=len(ids), p=zipf_weights(len(topics))).tolist()
+    bio_idx = rng.integers(0, len(BIOS), size=len(ids)).tolist()
+    return [
+        (
+            user_id,
+            f"User {user_id}",
+            f"user{user_id}@example.com",
+            BIOS[bio].format(topic=topics[topic]),
+            CITIES[city],
+            *point,
+            *payload,
+        )
+        for user_id, city, topic, bio, point, payload in zip(
+            ids.tolist(), cities, topic_idx, bio_idx, scatter(places, cities), analyses(analysis, topic_idx)
+        )
+    ]
+
+
+def preference_values() -> List[tuple]:
+    """Dictionary rows for every generated preference; the values are already normalized."""
+    pairs = [(preference_type, value) for preference_type, values in PREFERENCES.items() for value in values]
+    return [(value_id, *normalize(*pair)) for value_id, pair in enumerate(pairs, start=1)]
+
+
+def generate_preferences(rng: np.random.Generator, first: int, stop: int, mean: float) -> List[tuple]:
+    user_ids = np.repeat(np.arange(first, stop), rng.poisson(mean, size=stop - first))
+    types = list(PREFERENCES)
+    type_idx = rng.integers(0, len(types), size=len(user_ids))
+    rows: List[tuple] = []
+    first_value_id = 1
+    for type_number, preference_type in enumerate(types):
+        mask = type_idx == type_number
+        values = PREFERENCES[preference_type]
+        value_idx = rng.choice(len(values), size=int(mask.sum()), p=zipf_weights(len(values)))
+        confidence = rng.integers(1, 6, size=len(value_idx))
+        rows.extend(
+            (user_id, preference_type, values[value], conf, first_value_id + value)
+            for user_id, value, conf in zip(user_ids[mask].tolist(), value_idx.tolist(), confidence.tolist())
+        )
+        first_value_id += len(values)
+    return rows
+
+
+def generate_slots(
+    rng: np.random.Generator, first: int, stop: int, mean: float, start: datetime, days: int
+) -> List[tuple]:
+    user_ids = np.repeat(np.arange(first, stop), rng.poisson(mean, size=stop - first))
+    # Half-hour starts between 09:00 and 17:30, lasting 30, 60 or 90 minutes.
+    offsets = (
+        rng.integers(0, days, size=len(user_ids)) * 1440
+        + 540
+        + rng.integers(0, 18, size=len(user_ids)) * 30
+    )
+    starts = np.datetime64(start, "m") + offsets.astype("timedelta64[m]")
+    ends = starts + (rng.integers(1, 4, size=len(user_ids)) * 30).astype("timedelta64[m]")
+    statuses = rng.choice(SLOT_STATUSES[0], size=len(user_ids), p=SLOT_STATUSES[1]).tolist()
+    return list(zip(user_ids.tolist(), sql_datetimes(starts), sql_datetimes(ends), statuses))
+
+
+def generate_matches(
+    rng: np.random.Generator,
+    first: int,
+    stop: int,
+    mean: float,
+    popularity: np.ndarray,
+    target_weights: np.ndarray,
+    venue_weights: np.ndarray,
+    start: datetime,
+    days: int,
+) -> List[tuple]:
+    requesters = np.repeat(np.arange(first, stop), rng.poisson(mean, size=stop - first))
+    # Targets follow a power law over a fixed random ranking of users.
+    targets = popularity[rng.choice(len(popularity), size=len(requesters), p=target_weights)]
+    keep = targets != requesters
+    requesters, targets = requesters[keep], targets[keep]
+    venues = rng.choice(len(venue_weights), size=len(requesters), p=venue_weights) + 1
+    proposed = np.datetime64(start, "m") + (
+        rng.integers(0, days, size=len(requesters)) * 1440 + 540 + rng.integers(0, 18, size=len(requesters)) * 30
+    ).astype("timedelta64[m]")
+    created = np.datetime64(start, "s") - rng.integers(0, 7 * 86400, size=len(requesters)).astype("timedelta64[s]")
+    statuses = rng.choice(MATCH_STATUSES[0], size=len(requesters), p=MATCH_STATUSES[1]).tolist()
+    return [
+        (requester, target, None, when, venue, status, "", created_at)
+        for requester, target, when, venue, status, created_at in zip(
+            requesters.tolist(),
+            targets.tolist(),
+            sql_datetimes(proposed),
+            venues.tolist(),
+            statuses,
+            sql_datetimes(created),
+        )
+    ]
+
+
+def generate_venues(
+    rng: np.random.Generator, places: np.random.Generator, count: int, users: int, city_weights: np.ndarray
+) -> List[tuple]:
+    cities = rng.choice(len(CITIES), size=count, p=city_weights).tolist()
+    kinds = rng.choice(["coffee", "restaurant"], size=count, p=[0.7, 0.3]).tolist()
+    prices = rng.choice(["$", "$$", "$$$"], size=count, p=[0.4, 0.45, 0.15]).tolist()
+    creators = rng.integers(1, users + 1, size=count).tolist()
+    return [
+        (venue_id, f"{kind.title()} #{venue_id}", kind, price, CITIES[city], *point, "", creator)
+        for venue_id, city, kind, price, creator, point in zip(
+            range(1, count + 1), cities, kinds, prices, creators, scatter(places, cities)
+        )
+    ]
+
+
+def create_schema(path: Path) -> List[str]:
+    """Create the tables without their secondary indexes; returns the index DDL to run afterwards."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.schema import CreateIndex
+
+    import app.models.collection_version  # noqa: F401
+    import app.models.match_request  # noqa: F401
+    import app.models.preference_value  # noqa: F401
+    import app.models.timeslot  # noqa: F401
+    import app.models.user  # noqa: F401
+    import app.models.user_preference  # noqa: F401
+    import app.models.venue  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{path}")
+    deferred: List[str] = []
+    for table in SQLModel.metadata.sorted_tables:
+        table.create(engine, checkfirst=False)
+        for index in list(table.indexes):
+            deferred.append(str(CreateIndex(index).compile(engine)))
+            index.drop(engine)
+    engine.dispose()
+    return deferred
+
+
+def insert_rows(connection: sqlite3.Connection, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+    placeholders = ", ".join("?" for _ in columns)
+    connection.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+
+def generate(
+    path: Path,
+    *,
+    users: int,
+    venues_per_user: float = 0.01,
+    preferences_per_user: float = 4.0,
+    slots_per_user: float = 6.0,
+    matches_per_user: float = 2.0,
+    days: int = 14,
+    start_day: Optional[date] = None,
+    seed: int = 42,
+) -> Dict[str, int]:
+    """Write a fresh database to ``path``, which must not exist yet; returns row counts per table."""
+    started = time.perf_counter()
+    start = datetime.combine(start_day or date.today(), datetime.min.time())
+    rng = np.random.default_rng(seed)
+    # Coordinates come from their own stream so the other columns do not depend on them.
+    places = np.random.default_rng([seed, 1])
+    analysis = np.random.default_rng([seed, 2])
+    city_weights = zipf_weights(len(CITIES), 1.2)
+    venue_count = max(1, int(users * venues_per_user))
+    venue_weights = zipf_weights(venue_count, 1.05)
+    popularity = rng.permutation(np.arange(1, users + 1))
+    target_weights = zipf_weights(users, 0.8)
+
+    deferred_indexes = create_schema(path)
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.executescript(
+        "PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF; PRAGMA locking_mode=EXCLUSIVE; "
+        "PRAGMA temp_store=MEMORY; PRAGMA cache_size=-262144;"
+    )
+    connection.execute("BEGIN")
+    insert_rows(
+        connection,
+        "venues",
+        ("id", "name", "type", "price_range", "location", "latitude", "longitude", "description", "created_by_id"),
+        generate_venues(rng, places, venue_count, users, city_weights),
+    )
+    insert_rows(connection, "preference_values", ("id", "preference_type", "value"), preference_values())
+    counts = {"venues": venue_count, "users": 0, "user_preferences": 0, "time_slots": 0, "match_requests": 0}
+    for first, stop in user_chunks(users):
+        batches = {
+            "users": (
+                (
+                    "id", "name", "email", "bio", "location", "latitude", "longitude", "ai_analysis_json",
+                    "embedding",
+                ),
+                generate_users(rng, places, analysis, first, stop, city_weights),
+            ),
+            "user_preferences": (
+                ("user_id", "preference_type", "preference_value", "confidence", "value_id"),
+                generate_preferences(rng, first, stop, preferences_per_user),
+            ),
+            "time_slots": (
+                ("user_id", "start_time", "end_time", "status"),
+                generate_slots(rng, first, stop, slots_per_user, start, days),
+            ),
+            "match_requests": (
+                MATCH_COLUMNS,
+                generate_matches(
+                    rng,
+                    first,
+                    stop,
+                    matches_per_user,
+                    popularity,
+                    target_weights,
+                    venue_weights,
+                    start,
+                    days,
+                ),
+            ),
+        }
+        for table, (columns, rows) in batches.items():
+            insert_rows(connection, table, columns, rows)
+            counts[table] += len(rows)
+        print(f"  users {stop - 1:,}/{users:,} ({time.perf_counter() - started:.0f}s)", flush=True)
+    connection.execute("COMMIT")
+    loaded = time.perf_counter()
+
+    for statement in deferred_indexes:
+        connection.execute(statement)
+    # Index the loaded text in one pass instead of row by row through the triggers.
+    for index in fts.INDEXES:
+        for statement in index.ddl():
+            connection.execute(statement)
+        connection.execute(index.rebuild())
+    for index in rtree.INDEXES:
+        for statement in index.ddl() + index.rebuild():
+            connection.execute(statement)
+    now = datetime.utcnow().isoformat(sep=" ")
+    connection.executemany(
+        "INSERT INTO collection_versions (name, version, updated_at) VALUES (?, 1, ?)",
+        [(name, now) for name in ("users", "venues", "time_slots", "match_requests", "user_preferences")],
+    )
+    connection.execute("ANALYZE")
+    connection.close()
+
+    # Hand the file over in the mode the app runs in.
+    sqlite3.connect(path).execute("PRAGMA journal_mode=WAL").close()
+    print(f"Load {loaded - started:.1f}s, indexes {time.perf_counter() - loaded:.1f}s (seed {seed})")
+    return counts
+
+
+def run() -> None:
+    args = parse_args()
+
+    path = Path(args.output).absolute()
+    if path.exists():
+        if not args.force:
+            raise SystemExit(f"{path} exists; pass --force to overwrite it")
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    counts = generate(
+        path,
+        users=args.users,
+        venues_per_user=args.venues_per_user,
+        preferences_per_user=args.preferences_per_user,
+        slots_per_user=args.slots_per_user,
+        matches_per_user=args.matches_per_user,
+        days=args.days,
+        start_day=args.start,
+        seed=args.seed,
+    )
+    summary = ", ".join(f"{count:,} {table}" for table, count in counts.items())
+    print(f"Wrote {summary} to {path}")
+    if os.environ.get("SQLITE_FILE") != str(path):
+        print(f"Serve it with SQLITE_FILE={path}")
+
+
+if __name__ == "__main__":
+    run()
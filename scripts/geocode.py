@@ -0,0 +1,45 @@
+"""Fill in missing coordinates for users and venues from the bundled gazetteer.
+
+    python -m scripts.geocode
+
+Rows written through the API are geocoded as they are saved. This covers
+rows from before the coordinate columns existed and raw loads. Rows whose
+location is not in the gazetteer keep empty coordinates.
+"""
+
+import argparse
+import time
+
+from app.crud import _cache, versions
+from app.db.session import init_db, session_scope
+from app.models.user import User
+from app.models.venue import Venue
+from app.services import geo
+
+TARGETS = {"users": (User, versions.USERS), "venues": (Venue, versions.VENUES)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=sorted(TARGETS), default=None, help="Geocode one table")
+    parser.add_argument("--batch-size", type=int, default=geo.BACKFILL_BATCH)
+    return parser.parse_args()
+
+
+def run() -> None:
+    args = parse_args()
+    init_db()
+    for name, (model, collection) in TARGETS.items():
+        if args.only and name != args.only:
+            continue
+        started = time.perf_counter()
+        with session_scope() as session:
+            filled = geo.backfill(session, model, batch_size=args.batch_size)
+            if filled:
+                versions.bump(session, collection)
+        _cache.invalidate_all(model)
+        print(f"Geocoded {filled} {name} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    run()
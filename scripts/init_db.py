@@ -4,12 +4,14 @@ from datetime import datetime, timedelta
 
 from sqlmodel import select
 
+from app.crud import versions
 from app.db.session import init_db, session_scope
 from app.models.user import User
 from app.models.user_preference import UserPreference
 from app.models.venue import Venue
 from app.models.timeslot import TimeSlot
 from app.models.match_request import MatchRequest
+from app.services import geo
 
 
 USERS = [
@@ -39,6 +41,8 @@ VENUES = [
         "type": "coffee",
         "price_range": "$$",
         "location": "123 Main Street",
+        "latitude": 37.7936,
+        "longitude": -122.3958,
         "description": "Calm ambiance with plenty of outlets.",
     },
     {
@@ -46,6 +50,8 @@ VENUES = [
         "type": "restaurant",
         "price_range": "$$$",
         "location": "88 Sunset Blvd",
+        "latitude": 34.0983,
+        "longitude": -118.3267,
         "description": "Modern Asian fusion ideal for evening meetups.",
     },
 ]
@@ -67,7 +73,9 @@ def seed() -> None:
 
         user_models = []
         for payload in USERS:
-            user = User(**payload)
+            values = dict(payload)
+            geo.fill_coordinates(values)
+            user = User(**values)
             session.add(user)
             user_models.append(user)
         session.flush()
@@ -113,6 +121,7 @@ def seed() -> None:
             )
             session.add(match)
 
+        versions.bump(session, *versions.ALL)
         print("Seed data inserted successfully.")
 
 
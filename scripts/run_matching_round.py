@@ -0,0 +1,54 @@
+"""Pair every available user for one matching round and create their match requests."""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.db.session import init_db, session_scope
+from app.services import scheduler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Round start (ISO format, defaults to now)",
+    )
+    parser.add_argument("--days", type=int, default=7, help="Length of the round window")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to CPU count)")
+    parser.add_argument("--candidates", type=int, default=20, help="Candidates considered per user")
+    parser.add_argument("--message", default="You've been matched for this week's coffee roulette!")
+    parser.add_argument("--dry-run", action="store_true", help="Compute pairings without writing them")
+    return parser.parse_args()
+
+
+def run() -> None:
+    args = parse_args()
+    start = args.start or datetime.utcnow()
+    end = start + timedelta(days=args.days)
+    init_db()
+
+    started = time.perf_counter()
+    with session_scope() as session:
+        groups = scheduler.load_round(session, start, end)
+    users = sum(len(group.users) for group in groups)
+    print(f"Loaded {users} users in {len(groups)} locations ({time.perf_counter() - started:.1f}s)")
+
+    result = scheduler.pair_groups(groups, workers=args.workers, candidates_per_user=args.candidates)
+    pairings = result.pairings
+    total = sum(pairing.score for pairing in pairings)
+    print(f"Built {len(pairings)} pairings, total score {total:.2f} ({time.perf_counter() - started:.1f}s)")
+    if result.unscheduled:
+        print(f"Dropped {len(result.unscheduled)} matched pairs with no shared meeting slot")
+
+    if args.dry_run:
+        return
+    with session_scope() as session:
+        created = scheduler.write_pairings(session, pairings, message=args.message)
+    print(f"Created {created} match requests ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+"""Export a table to NDJSON/CSV, or import one, without going through the API."""
+
+import argparse
+import sys
+import time
+
+from app.db.session import init_db
+from app.services import transfer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ("export", "import"):
+        sub = subparsers.add_parser(command)
+        sub.add_argument("entity", choices=sorted(transfer.ENTITIES))
+        sub.add_argument("path", nargs="?", default="-", help="File to write/read ('-' for stdout/stdin)")
+        sub.add_argument("--format", choices=sorted(transfer.FORMATS), default="ndjson")
+    subparsers.choices["import"].add_argument(
+        "--chunk-size", type=int, default=transfer.BATCH_SIZE, help="Rows per transaction"
+    )
+    return parser.parse_args()
+
+
+def run() -> None:
+    args = parse_args()
+    init_db()
+    started = time.perf_counter()
+    if args.command == "export":
+        output = sys.stdout if args.path == "-" else open(args.path, "w", encoding="utf-8", newline="")
+        try:
+            for chunk in transfer.export_chunks(args.entity, args.format):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        print(f"Exported {args.entity} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+    try:
+        inserted = transfer.import_rows(args.entity, args.format, source, chunk_size=args.chunk_size)
+    except transfer.ImportAborted as exc:
+        sys.exit(f"Import failed after {exc.inserted} committed {args.entity}: {exc}")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"Imported {inserted} {args.entity} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    run()
@@ -7,6 +7,9 @@ const TIME_CHOICES = [
     "15:00", "15:30", "16:00", "16:30", "17:00", "17:30",
 ];
 
+// Relations embedded in match request listings, matching MATCH_EXPAND on the server.
+const MATCH_EXPAND = "requester,target,venue";
+
 const state = {
     currentUser: null,
     users: [],
@@ -14,10 +17,15 @@ const state = {
     targetSlots: [],
     receivedMatches: [],
     sentMatches: [],
+    timeslots: [],
+    // list key -> { path, cursor } while the server has more pages; see firstPage().
+    more: {},
     selectedDay: null,
-    selectedTime: null,
+    selectedTimes: [],
     matchFilter: "all",
     pendingInviteTarget: null,
+    matchStream: null,
+    matchReload: null,
 };
 
 const dom = {};
@@ -119,6 +127,7 @@ function bindEvents() {
         }
     });
     dom.venueForm.addEventListener("submit", handleCreateVenue);
+    dom.appView.addEventListener("click", handleLoadMore);
 }
 
 async function handleLogin(event) {
@@ -172,24 +181,35 @@ async function handleRegister(event) {
 
 async function enterApp(user) {
     state.currentUser = user;
-    state.selectedTime = null;
+    state.selectedTimes = [];
     state.matchFilter = "all";
     toggleAppView(true);
     renderDayChips();
-    await Promise.all([bootstrapDirectory(), loadVenues()]);
-    await loadTimeslots();
-    await loadMatches();
+    const data = await request(`/me/bootstrap/${user.id}`);
+    state.currentUser = data.user;
+    state.users = firstPage("users", "/users/", data.users);
+    state.venues = firstPage("venues", "/venues/", data.venues);
+    state.receivedMatches = firstPage("received", `/matches/received/${user.id}?expand=${MATCH_EXPAND}`, data.received);
+    state.sentMatches = firstPage("sent", `/matches/sent/${user.id}?expand=${MATCH_EXPAND}`, data.sent);
+    state.timeslots = firstPage("timeslots", `/timeslots/?user_id=${user.id}`, data.timeslots);
+    renderUsers();
+    renderTimeslots();
+    renderMatches();
     renderProfile();
     renderVenues();
     updateMatchFilterButtons();
+    openMatchStream();
 }
 
 function handleLogout() {
+    closeMatchStream();
     state.currentUser = null;
     state.targetSlots = [];
     state.receivedMatches = [];
     state.sentMatches = [];
-    state.selectedTime = null;
+    state.timeslots = [];
+    state.more = {};
+    state.selectedTimes = [];
     dom.usersList.innerHTML = "";
     dom.venuesList.innerHTML = "";
     dom.matchesReceived.innerHTML = "";
@@ -241,7 +261,7 @@ function handleDayClick(event) {
         return;
     }
     state.selectedDay = target.dataset.date;
-    state.selectedTime = null;
+    state.selectedTimes = [];
     dom.availabilityDays.querySelectorAll(".chip").forEach((chip) => chip.classList.remove("chip--selected"));
     target.classList.add("chip--selected");
     renderTimeChips();
@@ -256,7 +276,7 @@ function renderTimeChips() {
         button.className = "chip";
         button.dataset.time = time;
         button.textContent = time;
-        if (time === state.selectedTime) {
+        if (state.selectedTimes.includes(time)) {
             button.classList.add("chip--selected");
         }
         dom.availabilityTimes.appendChild(button);
@@ -269,42 +289,45 @@ function handleTimeClick(event) {
     if (!target || !state.currentUser) {
         return;
     }
-    state.selectedTime = target.dataset.time;
-    dom.availabilityTimes.querySelectorAll(".chip").forEach((chip) => chip.classList.remove("chip--selected"));
-    target.classList.add("chip--selected");
+    const time = target.dataset.time;
+    state.selectedTimes = state.selectedTimes.includes(time)
+        ? state.selectedTimes.filter((item) => item !== time)
+        : [...state.selectedTimes, time].sort();
+    target.classList.toggle("chip--selected", state.selectedTimes.includes(time));
     updateAvailabilityConfirm();
 }
 
 function updateAvailabilityConfirm() {
-    const ready = Boolean(state.currentUser && state.selectedDay && state.selectedTime);
+    const ready = Boolean(state.currentUser && state.selectedDay && state.selectedTimes.length);
     dom.availabilityConfirm.disabled = !ready;
 }
 
 async function handleConfirmAvailability() {
-    if (!state.currentUser || !state.selectedDay || !state.selectedTime) {
+    if (!state.currentUser || !state.selectedDay || !state.selectedTimes.length) {
         return;
     }
 
-    const startISO = new Date(`${state.selectedDay}T${state.selectedTime}:00`);
-    const endISO = new Date(startISO.getTime() + 30 * 60 * 1000);
-
-    if (Number.isNaN(startISO.getTime())) {
+    const starts = state.selectedTimes.map((time) => new Date(`${state.selectedDay}T${time}:00`));
+    if (starts.some((start) => Number.isNaN(start.getTime()))) {
         showStatus("Unable to add availability for that time.", true);
         return;
     }
 
     try {
-        await request("/timeslots/", {
+        // One request and one transaction for the whole selection.
+        await request("/timeslots/batch", {
             method: "POST",
-            body: JSON.stringify({
+            body: JSON.stringify(starts.map((start) => ({
                 user_id: state.currentUser.id,
-                start_time: startISO.toISOString(),
-                end_time: endISO.toISOString(),
+                start_time: start.toISOString(),
+                end_time: new Date(start.getTime() + 30 * 60 * 1000).toISOString(),
                 status: "available",
-            }),
+            }))),
         });
-        showStatus(`Added availability for ${formatDateTime(startISO.toISOString())}.`);
-        state.selectedTime = null;
+        showStatus(starts.length === 1
+            ? `Added availability for ${formatDateTime(starts[0].toISOString())}.`
+            : `Added ${starts.length} availability slots.`);
+        state.selectedTimes = [];
         renderTimeChips();
         await loadTimeslots();
     } catch (error) {
@@ -316,7 +339,7 @@ async function bootstrapDirectory() {
     if (!state.currentUser) {
         return;
     }
-    const users = await request("/users/");
+    const users = firstPage("users", "/users/", await request("/users/"));
     state.users = users;
     const fresh = users.find((item) => item.id === state.currentUser.id);
     if (fresh) {
@@ -327,8 +350,7 @@ async function bootstrapDirectory() {
 }
 
 async function loadVenues() {
-    const venues = await request("/venues/");
-    state.venues = venues;
+    state.venues = await requestFirst("venues", "/venues/");
     renderVenues();
 }
 
@@ -337,8 +359,8 @@ async function loadTimeslots() {
         return;
     }
     try {
-        const slots = await request(`/timeslots/?user_id=${state.currentUser.id}`);
-        renderTimeslots(slots);
+        state.timeslots = await requestFirst("timeslots", `/timeslots/?user_id=${state.currentUser.id}`);
+        renderTimeslots();
     } catch (error) {
         dom.timeslotsList.innerHTML = `<p class="error">${escapeHtml(error.message)}</p>`;
     }
@@ -350,8 +372,8 @@ async function loadMatches() {
     }
     try {
         const [received, sent] = await Promise.all([
-            request(`/matches/received/${state.currentUser.id}`),
-            request(`/matches/sent/${state.currentUser.id}`),
+            requestFirst("received", `/matches/received/${state.currentUser.id}?expand=${MATCH_EXPAND}`),
+            requestFirst("sent", `/matches/sent/${state.currentUser.id}?expand=${MATCH_EXPAND}`),
         ]);
         state.receivedMatches = received;
         state.sentMatches = sent;
@@ -362,6 +384,35 @@ async function loadMatches() {
     }
 }
 
+function openMatchStream() {
+    closeMatchStream();
+    if (!window.EventSource || !state.currentUser) {
+        return;
+    }
+    state.matchStream = new EventSource(`${API_BASE}/matches/stream/${state.currentUser.id}`);
+    state.matchStream.addEventListener("match_request", scheduleMatchReload);
+    // Catch up on anything missed while the connection was down.
+    state.matchStream.addEventListener("open", scheduleMatchReload);
+}
+
+function closeMatchStream() {
+    if (state.matchStream) {
+        state.matchStream.close();
+        state.matchStream = null;
+    }
+}
+
+function scheduleMatchReload() {
+    // Coalesce bursts of events into one reload.
+    if (state.matchReload) {
+        return;
+    }
+    state.matchReload = setTimeout(async () => {
+        state.matchReload = null;
+        await loadMatches();
+    }, 250);
+}
+
 async function handleProfileUpdate(event) {
     event.preventDefault();
     if (!state.currentUser) {
@@ -408,8 +459,9 @@ function renderProfile() {
     dom.profileBioInput.value = user.bio || "";
 }
 
-function renderTimeslots(slots) {
-    if (!slots || slots.length === 0) {
+function renderTimeslots() {
+    const slots = state.timeslots;
+    if (slots.length === 0) {
         dom.timeslotsList.innerHTML = '<p class="empty">No availability yet. Use the buttons above to add a slot.</p>';
         return;
     }
@@ -421,7 +473,7 @@ function renderTimeslots(slots) {
                 <p class="muted">Ends at ${formatTime(slot.end_time)} · Status: ${escapeHtml(slot.status)}</p>
             </article>
         `)
-        .join("");
+        .join("") + loadMoreButton("timeslots");
 }
 
 function renderUsers() {
@@ -432,7 +484,7 @@ function renderUsers() {
 
     dom.usersList.innerHTML = state.users
         .map((user) => renderUserCard(user))
-        .join("");
+        .join("") + loadMoreButton("users");
 
     dom.usersList.querySelectorAll(".invite-btn").forEach((button) => {
         button.addEventListener("click", () => {
@@ -473,7 +525,7 @@ function renderVenues() {
 
     dom.venuesList.innerHTML = state.venues
         .map((venue) => renderVenueCard(venue))
-        .join("");
+        .join("") + loadMoreButton("venues");
 }
 
 function renderVenueCard(venue) {
@@ -503,13 +555,14 @@ function renderMatches() {
     const received = filterMatches(state.receivedMatches);
     const sent = filterMatches(state.sentMatches);
 
-    dom.matchesReceived.innerHTML = received.length
+    // Older requests may match the filter even when the loaded ones do not, so the button stays.
+    dom.matchesReceived.innerHTML = (received.length
         ? received.map((match) => renderMatchCard(match, true)).join("")
-        : '<p class="empty">No requests match this filter.</p>';
+        : '<p class="empty">No requests match this filter.</p>') + loadMoreButton("received");
 
-    dom.matchesSent.innerHTML = sent.length
+    dom.matchesSent.innerHTML = (sent.length
         ? sent.map((match) => renderMatchCard(match, false)).join("")
-        : '<p class="empty">No requests match this filter.</p>';
+        : '<p class="empty">No requests match this filter.</p>') + loadMoreButton("sent");
 
     dom.matchesReceived.querySelectorAll("[data-action]").forEach((button) => {
         button.addEventListener("click", async () => {
@@ -528,9 +581,9 @@ function filterMatches(matches) {
 }
 
 function renderMatchCard(match, isIncoming) {
-    const requester = state.users.find((user) => user.id === match.requester_id);
-    const target = state.users.find((user) => user.id === match.target_id);
-    const venue = state.venues.find((item) => item.id === match.venue_id);
+    const requester = match.requester || state.users.find((user) => user.id === match.requester_id);
+    const target = match.target || state.users.find((user) => user.id === match.target_id);
+    const venue = match.venue || state.venues.find((item) => item.id === match.venue_id);
     const normalizedStatus = (match.status || "pending").toLowerCase();
     const statusLabel = normalizedStatus.charAt(0).toUpperCase() + normalizedStatus.slice(1);
     const classes = ["card", `match-card--${normalizedStatus}`];
@@ -566,6 +619,7 @@ async function respondToMatch(matchId, action) {
             body: JSON.stringify(payload),
         });
         showStatus(`Invitation ${action === "accept" ? "accepted" : "rejected"}.`);
+        // Events reach only streams held by the worker that published them; reload our own change directly.
         await loadMatches();
     } catch (error) {
         showStatus(error.message, true);
@@ -621,7 +675,8 @@ function populateInviteVenues() {
 
 async function loadTargetSlots(userId) {
     try {
-        const slots = await request(`/timeslots/?user_id=${userId}`);
+        // The first page only; the select is for picking a near-term slot.
+        const { items: slots } = await request(`/timeslots/?user_id=${userId}`);
         state.targetSlots = slots.filter((slot) => (slot.status || "").toLowerCase() === "available");
         if (state.targetSlots.length === 0) {
             // fall back to showing the raw slots so requester can still choose
@@ -689,6 +744,7 @@ async function handleSendInvite(event) {
         });
         showStatus("Invitation sent.");
         closeInviteModal();
+        // Events reach only streams held by the worker that published them; reload our own change directly.
         await loadMatches();
     } catch (error) {
         showStatus(error.message, true);
@@ -776,6 +832,54 @@ async function request(path, options = {}) {
     return payload;
 }
 
+// Listings show their first page; "Load more" fetches the next one on demand.
+function firstPage(key, path, page) {
+    state.more[key] = page.next_cursor ? { path, cursor: page.next_cursor } : null;
+    return page.items;
+}
+
+async function requestFirst(key, path) {
+    return firstPage(key, path, await request(path));
+}
+
+async function nextPage(key) {
+    const more = state.more[key];
+    if (!more) {
+        return [];
+    }
+    const separator = more.path.includes("?") ? "&" : "?";
+    return firstPage(key, more.path, await request(`${more.path}${separator}cursor=${encodeURIComponent(more.cursor)}`));
+}
+
+function loadMoreButton(key) {
+    return state.more[key]
+        ? `<button type="button" class="load-more" data-load-more="${key}">Load more</button>`
+        : "";
+}
+
+const LOADED_PAGES = {
+    users: (items) => { state.users.push(...items); renderUsers(); },
+    venues: (items) => { state.venues.push(...items); renderVenues(); },
+    timeslots: (items) => { state.timeslots.push(...items); renderTimeslots(); },
+    received: (items) => { state.receivedMatches.push(...items); renderMatches(); },
+    sent: (items) => { state.sentMatches.push(...items); renderMatches(); },
+};
+
+async function handleLoadMore(event) {
+    const button = event.target.closest("[data-load-more]");
+    if (!button) {
+        return;
+    }
+    const key = button.dataset.loadMore;
+    button.disabled = true;
+    try {
+        LOADED_PAGES[key](await nextPage(key));
+    } catch (error) {
+        button.disabled = false;
+        showStatus(error.message, true);
+    }
+}
+
 function showStatus(message, isError = false) {
     dom.status.textContent = message;
     dom.status.classList.toggle("status--error", Boolean(isError));
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import get_cache
+from app.core.config import get_settings
+from app.main import app
+
+API = "/api/v1"
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_FILE", str(tmp_path / "test.db"))
+    get_settings.cache_clear()
+    get_cache().clear()
+    with TestClient(app) as test_client:
+        yield test_client
+    get_settings.cache_clear()
+
+
+def _create(client, path, payload):
+    response = client.post(f"{API}{path}", json=payload)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_accepting_two_requests_for_one_slot_books_it_once(client):
+    host = _create(client, "/users/", {"name": "Host", "email": "host@example.com"})
+    first = _create(client, "/users/", {"name": "First", "email": "first@example.com"})
+    second = _create(client, "/users/", {"name": "Second", "email": "second@example.com"})
+    venue = _create(
+        client, "/venues/", {"name": "Cafe", "type": "coffee", "price_range": "$", "location": "Seattle"}
+    )
+    start = (datetime.utcnow() + timedelta(days=1)).replace(microsecond=0)
+    slot = _create(
+        client,
+        "/timeslots/",
+        {"user_id": host, "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()},
+    )
+    requests = [
+        _create(
+            client,
+            "/matches/",
+            {
+                "requester_id": requester,
+                "target_id": host,
+                "time_slot_id": slot,
+                "proposed_time": start.isoformat(),
+                "venue_id": venue,
+            },
+        )
+        for requester in (first, second)
+    ]
+
+    # The same call the web client makes for "Accept".
+    accepted = client.put(f"{API}/matches/{requests[0]}", json={"status": "accepted"})
+    assert accepted.status_code == 200, accepted.text
+    assert accepted.json()["status"] == "accepted"
+
+    conflict = client.put(f"{API}/matches/{requests[1]}", json={"status": "accepted"})
+    assert conflict.status_code == 409
+
+    received = client.get(f"{API}/matches/received/{host}").json()["items"]
+    assert {item["id"]: item["status"] for item in received} == {
+        requests[0]: "accepted",
+        requests[1]: "rejected",
+    }
+    slots = client.get(f"{API}/timeslots/", params={"user_id": host}).json()["items"]
+    assert [item["status"] for item in slots] == ["booked"]